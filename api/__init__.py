@@ -1,34 +1,62 @@
 from .create_organization import router as create_org_router
+from .import_organizations import router as import_orgs_router
 from .list_organizations import router as list_orgs_router
 from .create_plant import router as create_plant_router
+from .import_plants import router as import_plants_router
 from .list_plants import router as list_plants_router
 from .create_user import router as create_user_router
+from .import_users import router as import_users_router
 from .list_users import router as list_users_router
 from .list_rt_consumption import router as list_rt_consumption_router
 from .list_rt_generation import router as list_rt_generation_router
+from .aggregate_generation import router as aggregate_generation_router
+from .imbalance_settlement import router as imbalance_settlement_router
 from .list_mpc import router as list_mpc_router
 from .list_smp import router as list_smp_router
 from .list_demand_forecast import router as list_demand_forecast_router
+from .list_rollups import router as list_rollups_router
+from .list_series import router as list_series_router
 from .create_plant_event import router as create_plant_event_router
 from .finish_plant_event import router as finish_plant_event_router
+from .recompute_status import router as recompute_status_router
 from .list_plant_events import router as list_plant_events_router
+from .plant_availability import router as plant_availability_router
+from .dashboard_summary import router as dashboard_summary_router
+from .stream_events import router as stream_events_router
+from .pool_status import router as pool_status_router
+from .prometheus_metrics import router as prometheus_metrics_router
+from .health import router as health_router
 from .login import router as login_router
 
 all_routers=[
     create_org_router,
+    import_orgs_router,
     list_orgs_router,
     create_plant_router,
+    import_plants_router,
     list_plants_router,
     create_user_router,
+    import_users_router,
     list_users_router,
     list_rt_consumption_router,
     list_rt_generation_router,
+    aggregate_generation_router,
+    imbalance_settlement_router,
     list_mpc_router,
     list_smp_router,
     list_demand_forecast_router,
+    list_rollups_router,
+    list_series_router,
     create_plant_event_router,
     finish_plant_event_router,
+    recompute_status_router,
     list_plant_events_router,
+    plant_availability_router,
+    dashboard_summary_router,
+    stream_events_router,
+    pool_status_router,
+    prometheus_metrics_router,
+    health_router,
     login_router
 ]
 
@@ -0,0 +1,167 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from datetime import datetime
+from typing import Optional
+from enum import Enum
+
+import models
+from .login import Principal, get_current_user
+from .read_session import get_read_db
+from .list_rt_generation import generation_time_limit, check_generation_access, apply_generation_scope
+
+router = APIRouter(
+    prefix="/generation",
+    tags=["Generation Management"],
+)
+
+#------models-----------
+class GroupBy(str, Enum):
+    PLANT = "plant"
+    FUEL_TYPE = "fuel_type"
+    YEKDEM = "is_yekdem"
+    RES = "is_res"
+    ORGANIZATION = "organization"
+
+class Bucket(str, Enum):
+    HOUR = "hour"
+    DAY = "day"
+    WEEK = "week"
+
+class SortOrder(str, Enum):
+    ASC = "asc"
+    DESC = "desc"
+
+
+METRICS = ("actual_generation", "planned_generation", "settlement_generation")
+AGGREGATES = {"sum": func.sum, "avg": func.avg, "min": func.min, "max": func.max}
+
+# actual_generation_sum, actual_generation_avg, ... planned_generation_max
+OrderBy = Enum("OrderBy", {f"{m}_{a}": f"{m}_{a}" for m in METRICS for a in AGGREGATES}, type=str)
+
+GROUP_COLUMNS = {
+    GroupBy.PLANT: [
+        models.PowerPlant.id.label("power_plant_id"),
+        models.PowerPlant.name.label("plant_name"),
+        models.PowerPlant.eic,
+        models.PowerPlant.fuel_type,
+    ],
+    GroupBy.FUEL_TYPE: [models.PowerPlant.fuel_type],
+    GroupBy.YEKDEM: [models.PowerPlant.is_yekdem],
+    GroupBy.RES: [models.PowerPlant.is_res],
+    GroupBy.ORGANIZATION: [
+        models.PowerPlant.organization_id,
+        models.Organization.name.label("organization_name"),
+    ],
+}
+
+
+async def aggregate_generation(
+    db: AsyncSession,
+    current_user: Principal,
+    start_date: datetime,
+    end_date: datetime,
+    group_by: GroupBy,
+    bucket: Optional[Bucket] = None,
+    power_plant_id: Optional[int] = None,
+    organization_id: Optional[int] = None,
+    order_by: Optional[OrderBy] = None,
+    order: SortOrder = SortOrder.DESC,
+    top_n: Optional[int] = None,
+):
+    """GROUP BY runs in the database, only one row per group (and bucket) is returned.
+
+    When a bucket is given, top_n is applied inside every bucket (e.g. top 3 plants of each day).
+    """
+    time_limit = generation_time_limit()
+
+    # time control
+    if end_date > time_limit:
+        end_date = time_limit
+    if start_date > time_limit:
+        return []
+
+    # --- 1. security-----
+    await check_generation_access(db, current_user, power_plant_id, organization_id)
+
+    # --- 2. query
+    group_columns = list(GROUP_COLUMNS[group_by])
+    if bucket:
+        group_columns.insert(0, func.date_trunc(bucket.value, models.GenerationData.timestamp).label("bucket"))
+
+    aggregate_columns = {}
+    for metric in METRICS:
+        column = getattr(models.GenerationData, metric)
+        for name, aggregate in AGGREGATES.items():
+            aggregate_columns[f"{metric}_{name}"] = aggregate(column)
+
+    query = select(
+        *group_columns,
+        *[expression.label(label) for label, expression in aggregate_columns.items()],
+        func.count().label("hours")
+    ).join(models.PowerPlant, models.GenerationData.power_plant_id == models.PowerPlant.id)
+
+    if group_by == GroupBy.ORGANIZATION:
+        query = query.join(models.Organization, models.PowerPlant.organization_id == models.Organization.id)
+
+    query = query.filter(
+        models.GenerationData.timestamp >= start_date,
+        models.GenerationData.timestamp <= end_date
+    )
+
+    # --- 3.filter
+    query = apply_generation_scope(query, current_user, power_plant_id, organization_id)
+    query = query.group_by(*group_columns)
+
+    # --- 4.order / top-n
+    sort_key = None
+    if order_by:
+        sort_key = aggregate_columns[order_by.value]
+        sort_key = sort_key.asc() if order == SortOrder.ASC else sort_key.desc()
+    elif top_n:
+        # top-n without order_by: the largest total generation, bucketed or not
+        sort_key = aggregate_columns["actual_generation_sum"].desc()
+
+    if top_n and bucket:
+        # rank inside every bucket, then cut with a window function
+        ranked = query.add_columns(
+            func.row_number().over(partition_by=group_columns[0], order_by=sort_key).label("rank")
+        ).subquery()
+        results = (await db.execute(
+            select(ranked).filter(ranked.c.rank <= top_n).order_by(ranked.c.bucket, ranked.c.rank)
+        )).all()
+    else:
+        if bucket:
+            query = query.order_by(group_columns[0])
+        if sort_key is not None:
+            query = query.order_by(sort_key)
+        if top_n:
+            query = query.limit(top_n)
+        results = (await db.execute(query)).all()
+
+    return [{key: value for key, value in row._mapping.items() if key != "rank"} for row in results]
+
+
+@router.post("/aggregate",status_code=200,summary="Aggregated generation data (per plant, fuel type, organization...)")
+async def aggregate_realtime_generation(
+    start_date: datetime,
+    end_date: datetime,
+    group_by: GroupBy = GroupBy.PLANT,
+    bucket: Optional[Bucket] = None,
+    power_plant_id: Optional[int] = None,
+    organization_id: Optional[int] = None,
+    order_by: Optional[OrderBy] = None,
+    order: SortOrder = SortOrder.DESC,
+    top_n: Optional[int] = Query(None, ge=1),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    return await aggregate_generation(
+        db, current_user, start_date, end_date, group_by,
+        bucket=bucket,
+        power_plant_id=power_plant_id,
+        organization_id=organization_id,
+        order_by=order_by,
+        order=order,
+        top_n=top_n,
+    )
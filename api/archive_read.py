@@ -0,0 +1,107 @@
+from sqlalchemy import select, func
+from datetime import datetime, time, timedelta
+from typing import Optional
+import asyncio
+
+import archive
+import models
+from partitions import RETENTION_DAYS
+from .downsampling import bucket_hours
+
+#Read-through of the list endpoints into the Parquet archive (archive.py).
+#A range that starts before the oldest hot day is split at the day after the last archived one:
+#older hours come from the archive, newer ones from the hot table, the result looks the same.
+#Downsampling of such ranges runs on the joined rows with Arrow (group_by), so a bucket that
+#spans the split is computed once.
+
+
+async def archive_split(db, table: str, start: datetime) -> Optional[datetime]:
+    """First hour that is read from the hot table, None when the range does not reach the archive."""
+    if not archive.ARCHIVE_DIR:
+        return None
+    # every archived day is older than the retention window, newer ranges skip the lookup
+    cutoff = datetime.combine(datetime.now().date() - timedelta(days=RETENTION_DAYS), time())
+    if start >= cutoff:
+        return None
+    last_day = (await db.execute(
+        select(func.max(models.ArchivedPartition.day)).filter(models.ArchivedPartition.table_name == table)
+    )).scalar()
+    if last_day is None:
+        return None
+    split = datetime.combine(last_day + timedelta(days=1), time())
+    return split if start < split else None
+
+
+def arrow_rows(data, fields: list) -> list:
+    return list(zip(*[data.column(field).to_pylist() for field in fields]))
+
+
+def lookup_columns(data, key: str, rows: list, names: list):
+    """Adds names to data, looked up by data[key] in rows of (key, *values) (plant columns)."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    index = pc.index_in(data[key], value_set=pa.array([row[0] for row in rows], type=data.schema.field(key).type))
+    for i, name in enumerate(names):
+        data = data.append_column(name, pa.array([row[i + 1] for row in rows]).take(index))
+    return data
+
+
+def downsample_arrow(data, fields: list, value_fields: list, start: datetime, hours: int):
+    """Same buckets and columns as downsampling.downsample, computed on an Arrow table."""
+    import numpy as np
+    import pyarrow as pa
+
+    columns, out_fields = ["timestamp"], ["timestamp"]
+    for field in fields:
+        if field in value_fields:
+            columns += [f"{field}_mean", f"{field}_min", f"{field}_max"]
+            out_fields += [field, f"{field}_min", f"{field}_max"]
+        elif field != "timestamp":
+            columns.append(field)
+            out_fields.append(field)
+    if data.num_rows == 0:
+        return [], out_fields
+
+    origin = np.datetime64(start.replace(minute=0, second=0, microsecond=0), "us")
+    step = np.timedelta64(hours, "h")
+    timestamps = data.column("timestamp").to_numpy()
+    buckets = origin + (timestamps - origin) // step * step
+    data = data.set_column(data.schema.get_field_index("timestamp"), "timestamp",
+                           pa.array(buckets.astype("datetime64[us]")))
+
+    keys = [field for field in fields if field != "timestamp" and field not in value_fields]
+    grouped = data.group_by(["timestamp", *keys]).aggregate(
+        [(field, aggregate) for field in value_fields for aggregate in ("mean", "min", "max")]
+    ).sort_by([("timestamp", "ascending"), *[(key, "ascending") for key in keys]])
+
+    return arrow_rows(grouped, columns), out_fields
+
+
+async def read_through(db, table: str, query, fields: list, value_fields: list, start: datetime, end: datetime,
+                       max_points: Optional[int] = None, resolution=None, read_archived=None):
+    """(rows, fields) of a range that reaches into the archive, None when the hot table covers it.
+
+    query is the endpoint's list query before downsampling. read_archived(start, end) returns the
+    archived hours of [start, end) as an Arrow table with the fields, by default the same columns
+    read from the table's archive.
+    """
+    split = await archive_split(db, table, start)
+    if split is None:
+        return None
+    import pyarrow as pa
+
+    if read_archived is None:
+        async def read_archived(archive_start, archive_end):
+            return await asyncio.to_thread(archive.read_archive, table, archive_start, archive_end, fields)
+
+    archived = await read_archived(start, min(split, end + timedelta(microseconds=1)))
+    hot = (await db.execute(query.filter(query.selected_columns.timestamp >= split))).all() if end >= split else []
+
+    hours = bucket_hours(start, end, max_points, resolution)
+    if hours <= 1:
+        return (arrow_rows(archived, fields) if archived is not None else []) + list(hot), fields
+
+    hot = pa.table([pa.array([row[i] for row in hot]) for i in range(len(fields))], names=fields)
+    data = hot if archived is None else pa.concat_tables([archived.select(fields), hot.cast(archived.select(fields).schema)])
+    return downsample_arrow(data, fields, value_fields, start, hours)
@@ -0,0 +1,119 @@
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import IntegrityError
+import csv
+import io
+import json
+
+#Shared parts of the bulk import endpoints (organizations, plants, users).
+#The upload is a JSON array or a CSV file (text/csv body or multipart field "file").
+#Every row gets a result: references and duplicates are resolved with one query per kind,
+#the valid rows are inserted with one statement in one transaction.
+
+MAX_IMPORT_ROWS = 5000
+
+
+async def read_records(request: Request) -> list:
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        upload = (await request.form()).get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail='CSV file is expected in the "file" field')
+        records = parse_csv(await upload.read())
+    elif "csv" in content_type:
+        records = parse_csv(await request.body())
+    else:
+        try:
+            records = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or a CSV file")
+        if not isinstance(records, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or a CSV file")
+
+    if not records:
+        raise HTTPException(status_code=400, detail="No rows to import")
+    if len(records) > MAX_IMPORT_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_IMPORT_ROWS} rows can be imported at once")
+    return records
+
+
+def parse_csv(data: bytes) -> list:
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV file must be UTF-8")
+    # empty cells are missing values, the model defaults apply
+    return [{key: value for key, value in row.items() if key and value not in ("", None)}
+            for row in csv.DictReader(io.StringIO(text))]
+
+
+class ImportReport:
+    """Per-row results, rows are numbered from 1 in upload order."""
+
+    def __init__(self, records: list, model: type[BaseModel]):
+        self.results = [{"row": i + 1, "status": "pending"} for i in range(len(records))]
+        self.valid = {}  # row index -> validated model
+        for i, record in enumerate(records):
+            try:
+                if not isinstance(record, dict):
+                    raise TypeError("row must be an object")
+                self.valid[i] = model.model_validate(record)
+            except ValidationError as e:
+                self.fail(i, *[f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()])
+            except TypeError as e:
+                self.fail(i, str(e))
+
+    def fail(self, i: int, *errors: str):
+        result = self.results[i]
+        result["status"] = "failed"
+        result.setdefault("errors", []).extend(errors)
+        self.valid.pop(i, None)
+
+    def reject_duplicates(self, field: str, existing: set, label: str):
+        """Fails rows whose field is already in the database or repeats an earlier row of the upload."""
+        seen = set()
+        for i, row in list(self.valid.items()):
+            value = getattr(row, field)
+            if value in existing:
+                self.fail(i, f"{field}: {label} with this {field} already exists")
+            elif value in seen:
+                self.fail(i, f"{field}: duplicate in the upload")
+            seen.add(value)
+
+    def values(self, field: str) -> set:
+        return {getattr(row, field) for row in self.valid.values()}
+
+    def created(self, i: int, **values):
+        self.results[i].update(status="created", **values)
+
+    def response(self, all_or_nothing: bool):
+        failed = sum(result["status"] == "failed" for result in self.results)
+        created = sum(result["status"] == "created" for result in self.results)
+        body = {"created": created, "failed": failed, "rows": self.results}
+        if all_or_nothing and failed:
+            return JSONResponse(status_code=422, content=body)
+        return body
+
+
+async def insert_rows(db, report: ImportReport, table, rows: dict, returning: str, all_or_nothing: bool):
+    """rows: row index -> column values. One INSERT ... RETURNING, one commit."""
+    if all_or_nothing and len(report.valid) < len(report.results):
+        for i in report.valid:
+            report.results[i]["status"] = "skipped"
+        return
+
+    if rows:
+        key = getattr(table, returning)
+        try:
+            inserted = (await db.execute(
+                table.__table__.insert().returning(table.id, key), list(rows.values())
+            )).all()
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise HTTPException(status_code=409, detail="Conflicting rows were written concurrently, please retry")
+        ids = {row[1]: row[0] for row in inserted}
+        for i, values in rows.items():
+            report.created(i, id=ids[values[returning]], **{returning: values[returning]})
+
@@ -0,0 +1,87 @@
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from datetime import timezone
+from email.utils import format_datetime
+from typing import Optional
+import hashlib
+
+import models
+from .login import Principal
+from .formats import content_coding
+
+#ETag / Last-Modified for the read endpoints.
+#The validators come from data_versions (one row per table, see versions.py), so checking them
+#is one primary key lookup; a client with a current copy gets 304 before the list query runs.
+
+
+class Validators:
+    def __init__(self, etag: Optional[str], last_modified=None):
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def headers(self) -> dict:
+        if self.etag is None:
+            return {}
+        headers = {"ETag": self.etag, "Cache-Control": "private, no-cache"}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+        return headers
+
+    def matches(self, request: Request) -> bool:
+        if self.etag is None:
+            return False
+        if_none_match = request.headers.get("if-none-match")
+        if not if_none_match:
+            return False
+        # weak comparison, as If-None-Match requires
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or self.etag in tags
+
+    def not_modified(self) -> Response:
+        return Response(status_code=304, headers={**self.headers, "Vary": "Accept, Accept-Encoding"})
+
+
+def published_hour(time_limit):
+    # rows are hourly, the visible set only changes when the publication limit crosses an hour
+    return time_limit.replace(minute=0, second=0, microsecond=0)
+
+
+async def data_validators(request: Request, db: AsyncSession, tables, current_user: Principal, *key) -> Validators:
+    """Validators of a response built from the given tables.
+
+    The ETag covers the table versions, the request (path, query, body), the negotiated
+    format / encoding, the user's scope and *key (e.g. the hour-floored publication limit,
+    which moves the visible window without a write).
+    """
+    versions = (await db.execute(select(
+        models.DataVersion.table_name,
+        models.DataVersion.version,
+        models.DataVersion.updated_at
+    ).filter(models.DataVersion.table_name.in_(tables)))).all()
+
+    # without a marker for every table a change could go unnoticed, no validators then
+    if len(versions) != len(set(tables)):
+        return Validators(None)
+
+    digest = hashlib.blake2b(digest_size=16)
+    parts = (
+        request.method,
+        request.url.path,
+        request.url.query,
+        await request.body(),
+        request.headers.get("accept", ""),
+        # a strong ETag names one representation: zstd, gzip and identity bodies get their own
+        content_coding(request),
+        current_user.role,
+        current_user.organization_id,
+        sorted((name, version) for name, version, _ in versions),
+        key,
+    )
+    for part in parts:
+        digest.update(repr(part).encode())
+        digest.update(b"\x00")
+
+    updated = [updated_at for _, _, updated_at in versions if updated_at is not None]
+    return Validators(f'"{digest.hexdigest()}"', max(updated) if updated else None)
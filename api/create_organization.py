@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from database import get_db
 import models
 
-from .login import get_current_user
+from .login import Principal, get_current_user
 
 
 router=APIRouter(
@@ -12,7 +12,7 @@ router=APIRouter(
 )
 
 @router.post("/",status_code=201,summary="Create New Organization")
-def create_organization(name:str, eic:str, db:Session=Depends(get_db),current_user: models.User = Depends(get_current_user)):
+def create_organization(name:str, eic:str, db:Session=Depends(get_db),current_user: Principal = Depends(get_current_user)):
     
     if current_user.role != "super_admin":
         raise HTTPException(
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from database import get_db
 import models
 
-from .login import get_current_user
+from .login import Principal, get_current_user
 
 router=APIRouter(
     prefix="/plants",
@@ -20,7 +20,7 @@ def create_plant(
     is_yekdem:bool=False,
     is_res: bool=False,
     db:Session=Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     
     if current_user.role != "super_admin":
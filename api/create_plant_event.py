@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import text 
 from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel
@@ -8,7 +7,9 @@ from enum import Enum
 
 from database import get_db
 import models 
-from .login import get_current_user
+from recompute import recompute_worker
+from .login import Principal, get_current_user
+from .read_session import recent_writes
 
 router = APIRouter(
     prefix="/plant-events",
@@ -34,7 +35,7 @@ class EventCreateInput(BaseModel):
 def create_plant_event(
     event_data: EventCreateInput,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     # 1. authorization control
     if current_user.role == "analyst":
@@ -77,12 +78,10 @@ def create_plant_event(
     db.add(new_event)
     db.commit()
     db.refresh(new_event)
+    # this user's next reads see the event (primary instead of the lagging replica)
+    recent_writes.mark(current_user.id)
 
-    # triggering the simulation
-    try:
-        db.execute(text("SELECT simulate_hourly_energy_data()"))
-        db.commit()
-    except Exception as e:
-        print(f"Warning: An error occurred while triggering the simulation:{e}")
+    # only this plant's generation is recomputed, in the background (poll /plant-events/recompute/{job_id})
+    job = recompute_worker.submit(plant.id)
 
-    return {"Message": "Event initiated. Production data updated in real time.", "event_id": new_event.id}
\ No newline at end of file
+    return {"Message": "Event initiated. Production data is being updated.", "event_id": new_event.id, "recompute_job_id": job.id}
\ No newline at end of file
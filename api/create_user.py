@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException,status
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from database import get_async_db
 import models
+from passwords import password_hasher, PasswordPoolBusy
 
-from .login import get_current_user
+from .login import Principal, get_current_user, principal_cache
+from .list_users import public_user
 
 router=APIRouter(
     prefix="/users",
@@ -11,7 +14,7 @@ router=APIRouter(
 )
 
 @router.post("/",status_code=201,summary="Create new user")
-def create_user(
+async def create_user(
     username:str,
     password:str,
     first_name:str,
@@ -19,8 +22,8 @@ def create_user(
     email:str,
     role:str,
     organization_id:int,
-    db:Session=Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db:AsyncSession=Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     if current_user.role != "super_admin":
         raise HTTPException(
@@ -29,23 +32,33 @@ def create_user(
         )
     
 
-    org=db.query(models.Organization).filter(models.Organization.id==organization_id).first()
+    org=(await db.execute(select(models.Organization).filter(models.Organization.id==organization_id))).scalars().first()
     if not org:
         raise HTTPException(
             status_code=404,
             detail=f"{organization_id} is not found!"
         )
     
-    existing_user=db.query(models.User).filter(models.User.username==username).first()
+    existing_user=(await db.execute(select(models.User).filter(models.User.username==username))).scalars().first()
     if existing_user:
         raise HTTPException(
             status_code=400,
             detail="This user is already exist!"
         )
     
+    # bcrypt runs in the password pool, not on the event loop
+    try:
+        password_hash=await password_hasher.hash(password)
+    except PasswordPoolBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Password hashing is busy, try again.",
+            headers={"Retry-After": "1"}
+        )
+
     new_user=models.User(
         username=username,
-        password_hash=password,
+        password_hash=password_hash,
         first_name=first_name,
         last_name=last_name,
         email=email,
@@ -54,6 +67,9 @@ def create_user(
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+    await db.commit()
+    await db.refresh(new_user)
+
+    # cached tokens of this username must be verified again
+    principal_cache.invalidate_user(new_user.username)
+    return public_user(new_user)
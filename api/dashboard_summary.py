@@ -0,0 +1,142 @@
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from datetime import datetime, timedelta
+
+import models
+from .login import Principal, get_current_user
+from .read_session import get_read_db
+from .conditional import data_validators, published_hour
+from .aggregate_generation import aggregate_generation, GroupBy, OrderBy, SortOrder
+
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["Dashboard"],
+)
+
+# publication lags of the Transparency Platform endpoints
+CONSUMPTION_LAG = timedelta(hours=2)
+SMP_LAG = timedelta(hours=4)
+
+CHART_WINDOW = timedelta(hours=24)
+CHART_POINTS = 10
+TOP_PLANTS = 3
+
+SUMMARY_TABLES = ["power_plants", "national_consumption", "market_prices", "market_price_rollups", "generation_data"]
+
+
+@router.get("/summary",status_code=200,summary="Everything the dashboard needs in one response")
+async def dashboard_summary(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    # all queries below run on the same session / connection
+    now = datetime.now()
+
+    # every window below moves with the hour, the versions cover the writes
+    validators = await data_validators(request, db, SUMMARY_TABLES, current_user, published_hour(now))
+    if validators.matches(request):
+        return validators.not_modified()
+    response.headers.update(validators.headers)
+
+    window_start = now - CHART_WINDOW
+    yesterday_start = (now - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    yesterday_end = yesterday_start + timedelta(days=1) - timedelta(microseconds=1)
+
+    # --- 1. plant status counts
+    status_query = select(models.PowerPlant.current_status, func.count())
+    if current_user.role != "super_admin":
+        status_query = status_query.filter(models.PowerPlant.organization_id == current_user.organization_id)
+    status_counts = dict((await db.execute(status_query.group_by(models.PowerPlant.current_status))).all())
+
+    plants = {
+        "total": sum(status_counts.values()),
+        "active": status_counts.get("Active", 0),
+        "failure": status_counts.get("Failure", 0),
+        "maintenance": status_counts.get("Maintenance", 0),
+    }
+
+    # --- 2. latest consumption and forecast
+    last_consumption = (await db.execute(select(
+        models.NationalConsumption.timestamp,
+        models.NationalConsumption.actual_consumption
+    ).filter(
+        models.NationalConsumption.timestamp >= window_start,
+        models.NationalConsumption.timestamp <= now - CONSUMPTION_LAG
+    ).order_by(models.NationalConsumption.timestamp.desc()).limit(1))).first()
+
+    last_forecast = (await db.execute(select(
+        models.NationalConsumption.timestamp,
+        models.NationalConsumption.demand_forecast
+    ).filter(
+        models.NationalConsumption.timestamp >= window_start,
+        models.NationalConsumption.timestamp <= now
+    ).order_by(models.NationalConsumption.timestamp.desc()).limit(1))).first()
+
+    # --- 3. PTF / SMP chart (PTF and SMF are in the same row, no merge needed)
+    chart_rows = (await db.execute(select(
+        models.MarketPrice.timestamp,
+        models.MarketPrice.price_ptf,
+        models.MarketPrice.price_smf
+    ).filter(
+        models.MarketPrice.timestamp >= window_start,
+        models.MarketPrice.timestamp <= now - SMP_LAG
+    ).order_by(models.MarketPrice.timestamp.desc()).limit(CHART_POINTS))).all()
+
+    # --- 4. yesterday's min / max prices
+    # one row of the daily rollup once yesterday's SMF is fully published, raw hours before that
+    prices = None
+    if yesterday_end <= now - SMP_LAG:
+        prices = (await db.execute(select(
+            models.MarketPriceRollup.price_ptf_max.label("max_ptf"),
+            models.MarketPriceRollup.price_ptf_min.label("min_ptf"),
+            models.MarketPriceRollup.price_smf_max.label("max_smf"),
+            models.MarketPriceRollup.price_smf_min.label("min_smf")
+        ).filter(
+            models.MarketPriceRollup.period == "day",
+            models.MarketPriceRollup.period_start == yesterday_start
+        ))).first()
+
+    if prices is None:
+        smp_visible = models.MarketPrice.timestamp <= now - SMP_LAG
+        prices = (await db.execute(select(
+            func.max(models.MarketPrice.price_ptf).label("max_ptf"),
+            func.min(models.MarketPrice.price_ptf).label("min_ptf"),
+            func.max(models.MarketPrice.price_smf).filter(smp_visible).label("max_smf"),
+            func.min(models.MarketPrice.price_smf).filter(smp_visible).label("min_smf")
+        ).filter(
+            models.MarketPrice.timestamp >= yesterday_start,
+            models.MarketPrice.timestamp <= yesterday_end
+        ))).one()
+
+    # --- 5. yesterday's top plants (lowest for super admin, highest for the others)
+    top_plants = await aggregate_generation(
+        db, current_user, yesterday_start, yesterday_end, GroupBy.PLANT,
+        order_by=OrderBy.actual_generation_sum,
+        order=SortOrder.ASC if current_user.role == "super_admin" else SortOrder.DESC,
+        top_n=TOP_PLANTS,
+    )
+
+    return {
+        "plants": plants,
+        "consumption": {
+            "timestamp": last_consumption.timestamp,
+            "actual_consumption": last_consumption.actual_consumption
+        } if last_consumption else None,
+        "forecast": {
+            "timestamp": last_forecast.timestamp,
+            "demand_forecast": last_forecast.demand_forecast
+        } if last_forecast else None,
+        "market_chart": [{
+            "timestamp": row.timestamp,
+            "price_ptf": row.price_ptf,
+            "price_smf": row.price_smf
+        } for row in reversed(chart_rows)],
+        "prices": {key: value or 0 for key, value in prices._mapping.items()},
+        "top_plants": [{
+            "plant_name": row["plant_name"],
+            "actual_generation": row["actual_generation_sum"]
+        } for row in top_plants],
+    }
@@ -0,0 +1,83 @@
+from fastapi import HTTPException
+from sqlalchemy import select, func, literal
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Optional
+import math
+
+#Server-side downsampling of the hourly series for charts.
+#max_points (or a fixed resolution) turns the hours into buckets with date_bin in the database;
+#every value column becomes the bucket average plus <column>_min / <column>_max, so the payload
+#follows the chart width instead of the date range and peaks stay visible.
+
+MAX_CHART_POINTS = 5000
+# bucket widths picked for max_points, in hours (ticks stay on round hours / days / weeks)
+NICE_STEPS_HOURS = (1, 2, 3, 4, 6, 8, 12, 24, 48, 72, 168)
+
+
+class Resolution(str, Enum):
+    HOUR = "1h"
+    HOURS_3 = "3h"
+    HOURS_6 = "6h"
+    HOURS_12 = "12h"
+    DAY = "1d"
+    WEEK = "1w"
+
+
+RESOLUTION_HOURS = {
+    Resolution.HOUR: 1,
+    Resolution.HOURS_3: 3,
+    Resolution.HOURS_6: 6,
+    Resolution.HOURS_12: 12,
+    Resolution.DAY: 24,
+    Resolution.WEEK: 168,
+}
+
+
+def bucket_hours(start: datetime, end: datetime, max_points: Optional[int], resolution: Optional[Resolution]) -> int:
+    if max_points and resolution:
+        raise HTTPException(status_code=400, detail="max_points and resolution can not be used together")
+    if resolution:
+        return RESOLUTION_HOURS[resolution]
+    if not max_points:
+        return 1
+
+    hours = math.floor((end - start) / timedelta(hours=1)) + 1
+    needed = math.ceil(hours / max_points)
+    for step in NICE_STEPS_HOURS:
+        if step >= needed:
+            return step
+    return math.ceil(needed / 24) * 24
+
+
+def downsample(query, fields: list, value_fields: list, start: datetime, end: datetime,
+               max_points: Optional[int] = None, resolution: Optional[Resolution] = None):
+    """(query, fields) of the bucketed series, unchanged when the bucket is one hour.
+
+    query must select the columns named in fields (timestamp included). Columns that are not
+    values (plant name, eic ...) are kept as group keys, so every plant is downsampled on its own.
+    """
+    hours = bucket_hours(start, end, max_points, resolution)
+    if hours <= 1:
+        return query, fields
+
+    raw = query.order_by(None).subquery()
+    # buckets start at the requested hour, not at the epoch
+    origin = start.replace(minute=0, second=0, microsecond=0)
+    bucket = func.date_bin(literal(timedelta(hours=hours)), raw.c.timestamp, literal(origin)).label("timestamp")
+    keys = [raw.c[field] for field in fields if field != "timestamp" and field not in value_fields]
+
+    columns, out_fields = [bucket], ["timestamp"]
+    for field in fields:
+        if field in value_fields:
+            columns += [
+                func.avg(raw.c[field]).label(field),
+                func.min(raw.c[field]).label(f"{field}_min"),
+                func.max(raw.c[field]).label(f"{field}_max"),
+            ]
+            out_fields += [field, f"{field}_min", f"{field}_max"]
+        elif field != "timestamp":
+            columns.append(raw.c[field])
+            out_fields.append(field)
+
+    return select(*columns).group_by(bucket, *keys).order_by(bucket, *keys), out_fields
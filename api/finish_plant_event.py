@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException,status
 from sqlalchemy.orm import Session
-from sqlalchemy import text 
 from datetime import datetime
 from pydantic import BaseModel
 
 from database import get_db
 import models
-from .login import get_current_user
+from recompute import recompute_worker
+from .login import Principal, get_current_user
+from .read_session import recent_writes
 
 router = APIRouter(
     prefix="/plant-events",
@@ -25,7 +26,7 @@ class EventFinishInput(BaseModel):
 def finish_plant_event(
     input_data: EventFinishInput,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     # 1. find event
     event = db.query(models.PlantEvent).filter(models.PlantEvent.id == input_data.event_id).first()
@@ -51,12 +52,10 @@ def finish_plant_event(
     plant.current_status = "Active" #The power plant has been reactivated.
 
     db.commit()
+    # this user's next reads see the event (primary instead of the lagging replica)
+    recent_writes.mark(current_user.id)
 
-    # triggering the simulation
-    try:
-        db.execute(text("SELECT simulate_hourly_energy_data()"))
-        db.commit()
-    except Exception as e:
-        print(f"Warning: An error occurred while triggering the simulation:{e}")
+    # only this plant's generation is recomputed, in the background (poll /plant-events/recompute/{job_id})
+    job = recompute_worker.submit(plant.id)
 
-    return {"Message: The incident has been terminated. The switchboard is back in 'Active' mode and the data has been updated."}
\ No newline at end of file
+    return {"Message": "The incident has been terminated. The switchboard is back in 'Active' mode and the data is being updated.", "recompute_job_id": job.id}
\ No newline at end of file
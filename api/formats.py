@@ -0,0 +1,269 @@
+from fastapi import Request, Response, HTTPException
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+import csv
+import importlib
+import io
+import json
+import os
+
+import database
+from instrumentation import timed
+
+#Response formats of the time-series endpoints.
+#json (default) keeps the old list-of-objects shape, the others are column oriented.
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# pyarrow / zstandard are imported on first use, pyarrow alone adds ~0.1s to the start up
+_optional_modules = {}
+
+
+def optional_module(name: str):
+    """The module, or None when it is not installed."""
+    if name not in _optional_modules:
+        try:
+            _optional_modules[name] = importlib.import_module(name)
+        except ImportError:
+            _optional_modules[name] = None
+    return _optional_modules[name]
+
+# responses smaller than this are not compressed (GZipMiddleware uses the same limit)
+COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", 1024))
+# rows fetched per round trip from the server-side cursor in streaming mode
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", 2000))
+
+
+class ResponseFormat(str, Enum):
+    JSON = "json"
+    COLUMNAR = "columnar"
+    ARROW = "arrow"
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+MEDIA_TYPES = {
+    ResponseFormat.JSON: "application/json",
+    ResponseFormat.COLUMNAR: "application/vnd.energysys.columnar+json",
+    ResponseFormat.ARROW: "application/vnd.apache.arrow.stream",
+    ResponseFormat.CSV: "text/csv",
+    ResponseFormat.NDJSON: "application/x-ndjson",
+}
+
+# formats that can be produced chunk by chunk
+STREAMABLE_FORMATS = (ResponseFormat.JSON, ResponseFormat.NDJSON, ResponseFormat.CSV, ResponseFormat.ARROW)
+
+
+def negotiate_format(request: Request, format: Optional[ResponseFormat] = None) -> ResponseFormat:
+    # ?format=... wins, otherwise the Accept header decides
+    if format:
+        return format
+    accept = request.headers.get("accept", "")
+    for fmt in (ResponseFormat.COLUMNAR, ResponseFormat.ARROW, ResponseFormat.CSV, ResponseFormat.NDJSON):
+        if MEDIA_TYPES[fmt] in accept:
+            return fmt
+    return ResponseFormat.JSON
+
+
+def dumps(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, default=lambda value: value.isoformat()).encode()
+
+
+def content_coding(request: Request) -> str:
+    """Encoding of a (large enough) response to this request: zstd, gzip (GZipMiddleware) or identity."""
+    accept_encoding = request.headers.get("accept-encoding", "")
+    if "zstd" in accept_encoding and optional_module("zstandard") is not None:
+        return "zstd"
+    return "gzip" if "gzip" in accept_encoding else "identity"
+
+
+def compress(request: Request, body: bytes):
+    """zstd when the client and the server support it, gzip is left to GZipMiddleware."""
+    if len(body) < COMPRESSION_MIN_BYTES or content_coding(request) != "zstd":
+        return body, None
+    return optional_module("zstandard").ZstdCompressor(level=3).compress(body), "zstd"
+
+
+def to_columns(rows, fields):
+    # rows -> {field: [values]}, one pass with zip
+    if not rows:
+        return {field: [] for field in fields}
+    return dict(zip(fields, (list(values) for values in zip(*rows))))
+
+
+def encode_columnar(columns: dict, dictionary: Optional[tuple]) -> bytes:
+    payload = {"length": len(next(iter(columns.values()), []))}
+
+    # repeated strings (plant name, eic, fuel type) are sent once in a dictionary
+    if dictionary:
+        key, name, dictionary_fields = dictionary
+        keys = zip(*(columns.pop(field) for field in dictionary_fields))
+        index = {}
+        columns[key] = [index.setdefault(k, len(index)) for k in keys]
+        payload[name] = [dict(zip(dictionary_fields, k)) for k in index]
+
+    payload["columns"] = columns
+    return dumps(payload)
+
+
+def encode_arrow(columns: dict, dictionary: Optional[tuple]) -> bytes:
+    pa = optional_module("pyarrow")
+    if pa is None:
+        raise HTTPException(status_code=406, detail="Arrow format is not available on this server")
+
+    dictionary_fields = dictionary[2] if dictionary else ()
+    arrays = {}
+    for field, values in columns.items():
+        array = pa.array(values)
+        if field in dictionary_fields:
+            array = array.dictionary_encode()
+        arrays[field] = array
+    table = pa.table(arrays)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_csv(columns: dict, header: bool = True) -> bytes:
+    for field, values in columns.items():
+        if values and isinstance(values[0], datetime):
+            columns[field] = [value.isoformat() for value in values]
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns.keys())
+    writer.writerows(zip(*columns.values()))
+    return buffer.getvalue().encode()
+
+
+def render_rows(request: Request, fmt: ResponseFormat, rows, fields, dictionary: Optional[tuple] = None,
+                headers: Optional[dict] = None):
+    """Renders query rows in the negotiated format.
+
+    rows are tuples in the order of fields. dictionary=(key, name, fields) moves the given
+    fields into a dictionary (columnar json) or dictionary-encoded arrays (arrow).
+    headers (e.g. ETag) are added to the response.
+    """
+    with timed("serialize"):
+        if fmt == ResponseFormat.JSON and not headers:
+            return [dict(zip(fields, row)) for row in rows]
+
+        if fmt == ResponseFormat.JSON:
+            body = dumps([dict(zip(fields, row)) for row in rows])
+        elif fmt == ResponseFormat.NDJSON:
+            body = b"".join(dumps(dict(zip(fields, row))) + b"\n" for row in rows)
+        elif fmt == ResponseFormat.COLUMNAR:
+            body = encode_columnar(to_columns(rows, fields), dictionary)
+        elif fmt == ResponseFormat.ARROW:
+            body = encode_arrow(to_columns(rows, fields), dictionary)
+        else:
+            body = encode_csv(to_columns(rows, fields))
+
+        body, encoding = compress(request, body)
+    headers = {**(headers or {}), "Vary": "Accept, Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+
+def should_stream(fmt: ResponseFormat, stream: bool) -> bool:
+    if fmt == ResponseFormat.NDJSON:
+        return True
+    if stream and fmt not in STREAMABLE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"{fmt.value} format can not be streamed")
+    return stream
+
+
+async def iterate_chunks(query, bind=None):
+    """Server-side cursor, only STREAM_CHUNK_ROWS rows are in memory at a time.
+
+    The stream has its own session: it lives as long as the response, not the request handler.
+    bind is the engine of the request's session (the replica for the read endpoints), the primary by default.
+    """
+    async with (database.AsyncSessionLocal(bind=bind) if bind is not None else database.AsyncSessionLocal()) as session:
+        result = await session.stream(query.execution_options(yield_per=STREAM_CHUNK_ROWS))
+        async for rows in result.partitions():
+            yield rows
+
+
+def stream_rows(fmt: ResponseFormat, query, fields, dictionary: Optional[tuple] = None,
+                headers: Optional[dict] = None, bind=None) -> StreamingResponse:
+    """Streams the query result as NDJSON, a chunked JSON array, CSV or Arrow record batches."""
+
+    pa = optional_module("pyarrow")
+
+    async def generate():
+        first = True
+        arrow_sink = arrow_writer = arrow_schema = None
+
+        async for rows in iterate_chunks(query, bind):
+            if fmt == ResponseFormat.NDJSON:
+                yield b"".join(dumps(dict(zip(fields, row))) + b"\n" for row in rows)
+            elif fmt == ResponseFormat.JSON:
+                # [ row, row ... ] written piece by piece
+                chunk = dumps([dict(zip(fields, row)) for row in rows])[1:-1]
+                yield (b"[" if first else b",") + chunk
+            elif fmt == ResponseFormat.CSV:
+                yield encode_csv(to_columns(rows, fields), header=first)
+            else:
+                batch = arrow_batch(to_columns(rows, fields), dictionary, arrow_writer and arrow_schema)
+                if arrow_writer is None:
+                    arrow_schema = batch.schema
+                    arrow_sink = io.BytesIO()
+                    arrow_writer = pa.ipc.new_stream(arrow_sink, batch.schema)
+                arrow_writer.write_batch(batch)
+                yield take_buffer(arrow_sink)
+            first = False
+
+        # closing / empty results
+        if fmt == ResponseFormat.JSON:
+            yield b"[]" if first else b"]"
+        elif fmt == ResponseFormat.CSV and first:
+            yield encode_csv(to_columns([], fields))
+        elif fmt == ResponseFormat.ARROW:
+            if arrow_writer is None:
+                arrow_sink = io.BytesIO()
+                arrow_writer = pa.ipc.new_stream(arrow_sink, arrow_batch(to_columns([], fields), dictionary).schema)
+            arrow_writer.close()
+            yield take_buffer(arrow_sink)
+
+    if fmt == ResponseFormat.ARROW and pa is None:
+        raise HTTPException(status_code=406, detail="Arrow format is not available on this server")
+
+    return StreamingResponse(generate(), media_type=MEDIA_TYPES[fmt],
+                             headers={**(headers or {}), "Vary": "Accept, Accept-Encoding"})
+
+
+def arrow_batch(columns: dict, dictionary: Optional[tuple], schema=None):
+    pa = optional_module("pyarrow")
+    # later batches reuse the schema of the first one (a chunk of NULLs would infer a null type)
+    if schema is not None:
+        arrays = [pa.array(values, type=schema.field(field).type) for field, values in columns.items()]
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    dictionary_fields = dictionary[2] if dictionary else ()
+    arrays = []
+    for field, values in columns.items():
+        array = pa.array(values, type=pa.timestamp("us") if field == "timestamp" else None)
+        if field in dictionary_fields:
+            array = array.dictionary_encode()
+        arrays.append(array)
+    return pa.RecordBatch.from_arrays(arrays, names=list(columns.keys()))
+
+
+def take_buffer(sink) -> bytes:
+    # bytes written since the last call, the sink is reused for the next batch
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
@@ -0,0 +1,34 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+import asyncio
+import os
+
+import database
+from startup import startup_state
+
+router = APIRouter(
+    tags=["System"],
+)
+
+# the readiness query must answer faster than this
+READY_CHECK_TIMEOUT_SECONDS = float(os.getenv("READY_CHECK_TIMEOUT_SECONDS", 2))
+
+
+@router.get("/healthz",status_code=200,summary="Liveness probe (no database access)")
+def liveness():
+    return {"status": "ok", "uptime_seconds": startup_state.to_dict()["uptime_seconds"]}
+
+
+@router.get("/readyz",status_code=200,summary="Readiness probe and start up timings")
+async def readiness():
+    # the warm up has not finished (or failed): one round trip decides
+    try:
+        async with database.async_engine.connect() as conn:
+            await asyncio.wait_for(conn.exec_driver_sql("SELECT 1"), READY_CHECK_TIMEOUT_SECONDS)
+    except Exception as e:
+        return JSONResponse(status_code=503, content={**startup_state.to_dict(), "status": "unavailable", "error": str(e)})
+
+    if not startup_state.ready:
+        startup_state.ready, startup_state.error = True, None
+    # a down replica does not make the app unready, the reads fall back to the primary
+    return {**startup_state.to_dict(), "status": "ready", "replica": database.replica_health.to_dict()}
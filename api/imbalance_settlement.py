@@ -0,0 +1,88 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from datetime import datetime, timedelta
+from typing import Optional
+
+import models
+from settlement import plant_settlement_query, group_totals, forecast_error_query, IMBALANCE_MARGIN, PLANT_METRICS
+from .login import Principal, get_current_user
+from .read_session import get_read_db
+from .conditional import data_validators, published_hour
+from .dashboard_summary import CONSUMPTION_LAG, SMP_LAG
+from .list_rt_generation import generation_time_limit, check_generation_access
+
+router = APIRouter(
+    prefix="/settlement",
+    tags=["Generation Management"],
+)
+
+# one year at most per request
+MAX_PERIOD = timedelta(days=366)
+
+SETTLEMENT_TABLES = ["generation_data", "market_prices", "national_consumption", "power_plants"]
+
+
+@router.post("/",status_code=200,summary="Imbalance settlement per plant / organization and demand forecast error")
+async def settlement(
+    start_date: datetime,
+    end_date: datetime,
+    request: Request,
+    response: Response,
+    power_plant_id: Optional[int] = None,
+    organization_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    start_date = start_date.replace(tzinfo=None)
+    end_date = end_date.replace(tzinfo=None)
+    if end_date - start_date > MAX_PERIOD:
+        raise HTTPException(status_code=400, detail="At most one year can be settled at once")
+
+    # --- 1. security-----
+    await check_generation_access(db, current_user, power_plant_id, organization_id)
+
+    # generation is published up to yesterday, SMF 4 hours and consumption 2 hours late
+    now = datetime.now()
+    generation_limit = min(generation_time_limit(), now - SMP_LAG)
+    consumption_limit = now - CONSUMPTION_LAG
+
+    validators = await data_validators(request, db, SETTLEMENT_TABLES, current_user,
+                                       published_hour(generation_limit), published_hour(consumption_limit))
+    if validators.matches(request):
+        return validators.not_modified()
+    response.headers.update(validators.headers)
+
+    # --- 2. plants in scope (None: the whole fleet) and one GROUP BY over generation x prices
+    plant_ids = None
+    if current_user.role != "super_admin" or organization_id or power_plant_id:
+        plant_ids = select(models.PowerPlant.id)
+        if current_user.role != "super_admin":
+            plant_ids = plant_ids.filter(models.PowerPlant.organization_id == current_user.organization_id)
+        elif organization_id:
+            plant_ids = plant_ids.filter(models.PowerPlant.organization_id == organization_id)
+        if power_plant_id:
+            plant_ids = plant_ids.filter(models.PowerPlant.id == power_plant_id)
+
+    query = plant_settlement_query(start_date, min(end_date, generation_limit), plant_ids)
+    plants = [dict(row._mapping) for row in (await db.execute(query.order_by(models.PowerPlant.id))).all()]
+
+    # --- 3. organizations and fleet total from the plant rows
+    organizations = group_totals(plants, "organization_id")
+    total = group_totals([{**plant, "fleet": 0} for plant in plants], "fleet")
+
+    # --- 4. national demand forecast error (not organization specific)
+    forecast = (await db.execute(forecast_error_query(start_date, min(end_date, consumption_limit)))).one()
+
+    return {
+        "imbalance_margin": IMBALANCE_MARGIN,
+        "total": {metric: total[0][metric] for metric in PLANT_METRICS} if total else None,
+        "organizations": organizations,
+        "plants": plants,
+        "demand_forecast": {
+            "hours": forecast.hours,
+            "mape": forecast.mape,
+            "mae": forecast.mae,
+            "bias": forecast.bias,
+        },
+    }
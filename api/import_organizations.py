@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, or_
+from pydantic import BaseModel
+
+from database import get_async_db
+import models
+from .login import Principal, get_current_user
+from .bulk_import import read_records, ImportReport, insert_rows
+
+router=APIRouter(
+    prefix="/organizations",
+    tags=["Asset Management"]
+)
+
+
+class OrganizationImport(BaseModel):
+    name: str
+    eic: str
+
+
+@router.post("/bulk",status_code=200,summary="Import organizations (JSON array or CSV)")
+async def import_organizations(
+    request: Request,
+    all_or_nothing: bool = False, # true: nothing is inserted when a row fails (422)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+
+    if current_user.role != "super_admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="no transaction authorization"
+        )
+
+    report = ImportReport(await read_records(request), OrganizationImport)
+
+    # names and EICs are both unique, one query finds the taken ones
+    names, eics = report.values("name"), report.values("eic")
+    existing = (await db.execute(select(models.Organization.name, models.Organization.eic).filter(
+        or_(models.Organization.name.in_(names), models.Organization.eic.in_(eics))
+    ))).all()
+    report.reject_duplicates("eic", {row.eic for row in existing}, "an organization")
+    report.reject_duplicates("name", {row.name for row in existing}, "an organization")
+
+    rows = {i: row.model_dump() for i, row in report.valid.items()}
+    await insert_rows(db, report, models.Organization, rows, "eic", all_or_nothing)
+    return report.response(all_or_nothing)
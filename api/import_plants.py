@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from pydantic import BaseModel
+
+from database import get_async_db
+import models
+from .login import Principal, get_current_user
+from .bulk_import import read_records, ImportReport, insert_rows
+
+router=APIRouter(
+    prefix="/plants",
+    tags=["Asset Management"]
+)
+
+
+class PlantImport(BaseModel):
+    name: str
+    eic: str
+    installed_capacity: float
+    fuel_type: str
+    organization_name: str
+    is_yekdem: bool = False
+    is_res: bool = False
+
+
+@router.post("/bulk",status_code=200,summary="Import power plants (JSON array or CSV)")
+async def import_plants(
+    request: Request,
+    all_or_nothing: bool = False, # true: nothing is inserted when a row fails (422)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+
+    if current_user.role != "super_admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="no transaction authorization"
+        )
+
+    report = ImportReport(await read_records(request), PlantImport)
+
+    # every referenced organization in one query
+    organizations = dict((await db.execute(select(models.Organization.name, models.Organization.id).filter(
+        models.Organization.name.in_(report.values("organization_name"))
+    ))).all())
+    for i, row in list(report.valid.items()):
+        if row.organization_name not in organizations:
+            report.fail(i, "organization_name: No such Organization found!")
+
+    existing = (await db.execute(select(models.PowerPlant.eic).filter(
+        models.PowerPlant.eic.in_(report.values("eic"))
+    ))).scalars().all()
+    report.reject_duplicates("eic", set(existing), "a power plant")
+
+    rows = {i: {
+        **row.model_dump(exclude={"organization_name"}),
+        "organization_id": organizations[row.organization_name],
+        "current_status": "Active",
+    } for i, row in report.valid.items()}
+    await insert_rows(db, report, models.PowerPlant, rows, "eic", all_or_nothing)
+    return report.response(all_or_nothing)
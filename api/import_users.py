@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from pydantic import BaseModel
+import asyncio
+
+from database import get_async_db
+import models
+from passwords import password_hasher, PasswordPoolBusy, PASSWORD_HASH_WORKERS
+from .login import Principal, get_current_user, principal_cache
+from .bulk_import import read_records, ImportReport, insert_rows
+
+router=APIRouter(
+    prefix="/users",
+    tags=["Asset Management"]
+)
+
+
+class UserImport(BaseModel):
+    username: str
+    password: str
+    first_name: str
+    last_name: str
+    email: str
+    role: str
+    organization_id: int
+
+
+@router.post("/bulk",status_code=200,summary="Import users (JSON array or CSV)")
+async def import_users(
+    request: Request,
+    all_or_nothing: bool = False, # true: nothing is inserted when a row fails (422)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+
+    if current_user.role != "super_admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="no transaction authorization"
+        )
+
+    report = ImportReport(await read_records(request), UserImport)
+
+    organization_ids = set((await db.execute(select(models.Organization.id).filter(
+        models.Organization.id.in_(report.values("organization_id"))
+    ))).scalars().all())
+    for i, row in list(report.valid.items()):
+        if row.organization_id not in organization_ids:
+            report.fail(i, f"organization_id: {row.organization_id} is not found!")
+
+    existing = (await db.execute(select(models.User.username).filter(
+        models.User.username.in_(report.values("username"))
+    ))).scalars().all()
+    report.reject_duplicates("username", set(existing), "a user")
+
+    # hashed PASSWORD_HASH_WORKERS at a time, logins keep their place in the password pool
+    hashes = {}
+    valid = list(report.valid.items())
+    if not (all_or_nothing and len(valid) < len(report.results)):
+        try:
+            for start in range(0, len(valid), PASSWORD_HASH_WORKERS):
+                batch = valid[start:start + PASSWORD_HASH_WORKERS]
+                for (i, _), password_hash in zip(batch, await asyncio.gather(
+                        *(password_hasher.hash(row.password) for _, row in batch))):
+                    hashes[i] = password_hash
+        except PasswordPoolBusy:
+            raise HTTPException(
+                status_code=503,
+                detail="Password hashing is busy, try again.",
+                headers={"Retry-After": "1"}
+            )
+
+    rows = {i: {
+        **row.model_dump(exclude={"password"}),
+        "password_hash": hashes.get(i),
+    } for i, row in valid}
+    await insert_rows(db, report, models.User, rows, "username", all_or_nothing)
+
+    # cached tokens of these usernames must be verified again
+    for result in report.results:
+        if result["status"] == "created":
+            principal_cache.invalidate_user(result["username"])
+    return report.response(all_or_nothing)
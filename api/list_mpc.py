@@ -1,23 +1,37 @@
-from fastapi import APIRouter, Depends,HTTPException,status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends,HTTPException,status,Request, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import Optional
 from datetime import datetime
 
-from database import get_db
 import models
-from .login import get_current_user
+from .login import Principal, get_current_user
+from .read_session import get_read_db
+from .formats import ResponseFormat, negotiate_format, render_rows, should_stream, stream_rows
+from .downsampling import downsample, Resolution, MAX_CHART_POINTS
+from .archive_read import read_through
+from .conditional import data_validators
 
 router = APIRouter(
     prefix="/market",
     tags=["Transparency Platform"],
 )
 
+FIELDS = ["timestamp", "price_ptf"]
+
 @router.post("/ptf",status_code=200,summary="List market clearing price")
-def list_mpc(
+async def list_mpc(
     start_date: datetime,
     end_date: datetime,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    request: Request,
+    format: Optional[ResponseFormat] = None,
+    stream: bool = False,
+    max_points: Optional[int] = Query(None, ge=2, le=MAX_CHART_POINTS), # chart width, hours are bucketed to fit
+    resolution: Optional[Resolution] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
+    fmt = negotiate_format(request, format)
     
     # 👇 Timezone temizliği
     if start_date.tzinfo is not None:
@@ -27,12 +41,31 @@ def list_mpc(
         end_date = end_date.replace(tzinfo=None)
 
 
-    results = db.query(
+    # conditional request: one lookup in data_versions, the list query is skipped for a current copy
+    validators = await data_validators(request, db, ["market_prices"], current_user)
+    if validators.matches(request):
+        return validators.not_modified()
+
+    query = select(
         models.MarketPrice.timestamp,
         models.MarketPrice.price_ptf
     ).filter(
         models.MarketPrice.timestamp >= start_date,
         models.MarketPrice.timestamp <= end_date
-    ).order_by(models.MarketPrice.timestamp.asc()).all()
+    ).order_by(models.MarketPrice.timestamp.asc())
+
+    # days older than the hot table are read from the Parquet archive (not streamed)
+    archived = await read_through(db, "market_prices", query, FIELDS, ["price_ptf"], start_date, end_date, max_points, resolution)
+    if archived is not None:
+        return render_rows(request, fmt, *archived, headers=validators.headers)
+
+    # long ranges for charts: avg / min / max per bucket, computed in the database
+    query, fields = downsample(query, FIELDS, ["price_ptf"], start_date, end_date, max_points, resolution)
+
+    # streaming: server-side cursor, flat memory for any date range
+    if should_stream(fmt, stream):
+        return stream_rows(fmt, query, fields, headers=validators.headers, bind=db.bind)
+
+    results = (await db.execute(query)).all()
 
-    return [{"timestamp": row.timestamp, "price_ptf": row.price_ptf} for row in results]
\ No newline at end of file
+    return render_rows(request, fmt, results, fields, headers=validators.headers)
\ No newline at end of file
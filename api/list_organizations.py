@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends,HTTPException,status
+from fastapi import APIRouter, Depends,HTTPException,status,Query,Response
 from sqlalchemy.orm import Session
+from typing import Optional
 from database import get_db
 import models
 
-from .login import get_current_user
+from .login import Principal, get_current_user
+from .pagination import Page, MAX_PAGE_SIZE
 
 router=APIRouter(
     prefix="/organizations",
@@ -11,7 +13,13 @@ router=APIRouter(
 )
 
 @router.get("/",status_code=200,summary="List all organizations")
-def list_organizations(db:Session=Depends(get_db),current_user: models.User = Depends(get_current_user)):
+def list_organizations(
+    response: Response,
+    cursor: Optional[str] = None, # X-Next-Cursor of the previous page
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db:Session=Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
     
     if current_user.role != "super_admin":
         raise HTTPException(
@@ -19,4 +27,5 @@ def list_organizations(db:Session=Depends(get_db),current_user: models.User = De
             detail="no transaction authorization"
         )
     
-    return db.query(models.Organization).all()
\ No newline at end of file
+    page = Page([models.Organization.id], cursor, limit)
+    return page.rows(page.apply(db.query(models.Organization)).all(), response)
\ No newline at end of file
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends,HTTPException,status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends,HTTPException,status,Request,Response,Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from typing import Optional
 from pydantic import BaseModel
 
-from database import get_db
 import models
-from .login import get_current_user
+from .login import Principal, get_current_user
+from .read_session import get_read_db
+from .conditional import data_validators
+from .pagination import Page, MAX_PAGE_SIZE
 
 router = APIRouter(
     prefix="/plant-events",
@@ -19,12 +22,23 @@ class EventListInput(BaseModel):
 
 
 @router.post("/",status_code=200,summary="List plant events")
-def list_plant_events(
+async def list_plant_events(
     input_data: EventListInput,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None, # X-Next-Cursor of the previous page
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    query = db.query(models.PlantEvent).join(models.PowerPlant)
+    # conditional request: unchanged event list -> 304
+    validators = await data_validators(request, db, ["plant_events", "power_plants"], current_user)
+    if validators.matches(request):
+        return validators.not_modified()
+    response.headers.update(validators.headers)
+
+    # plant name is selected with the event (no lazy loading in async sessions)
+    query = select(models.PlantEvent, models.PowerPlant.name.label("plant_name")).join(models.PowerPlant)
 
     # role control 
     if current_user.role != "super_admin":
@@ -34,11 +48,13 @@ def list_plant_events(
     if input_data.power_plant_id:
         query = query.filter(models.PlantEvent.power_plant_id == input_data.power_plant_id)
 
-    results = query.order_by(models.PlantEvent.start_time.desc()).all()
+    # newest first, id keeps the order stable between pages
+    page = Page([models.PlantEvent.start_time, models.PlantEvent.id], cursor, limit, descending=True)
+    results = page.rows((await db.execute(page.apply(query))).all(), response, key=lambda row: row[0])
 
     return [{
         "id": row.id,
-        "plant_name": row.power_plant.name,
+        "plant_name": plant_name,
         "event_type": row.event_type,
         "status": "continue" if row.end_time is None else "completed",
         "affected_capacity": row.affected_capacity,
@@ -46,4 +62,4 @@ def list_plant_events(
         "end_time": row.end_time,
         "reason": row.reason,
         "description": row.description
-    } for row in results]
\ No newline at end of file
+    } for row, plant_name in results]
\ No newline at end of file
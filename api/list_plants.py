@@ -1,11 +1,14 @@
-from fastapi import APIRouter,Depends
-from sqlalchemy.orm import Session
-from database import get_db
+from fastapi import APIRouter,Depends,Request,Response,Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 import models
 
 from typing import Optional
 
-from .login import get_current_user
+from .login import Principal, get_current_user
+from .read_session import get_read_db
+from .conditional import data_validators
+from .pagination import Page, MAX_PAGE_SIZE
 
 router=APIRouter(
     prefix="/plants",
@@ -13,25 +16,35 @@ router=APIRouter(
 )
 
 @router.get("/",status_code=200,summary="List all plants")
-def list_plants(
+async def list_plants(
+    request: Request,
+    response: Response,
     organization_id: Optional[int] = None, # this is for super_admin, if super_admin wants to list plants by org, then it will works
-    db:Session=Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    cursor: Optional[str] = None, # X-Next-Cursor of the previous page
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
     ):
 
+    # conditional request: unchanged plant list -> 304
+    validators = await data_validators(request, db, ["power_plants"], current_user)
+    if validators.matches(request):
+        return validators.not_modified()
+    response.headers.update(validators.headers)
+
+    query = select(models.PowerPlant)
 
     # ---SUPER ADMIN---
     if current_user.role == "super_admin":
 
-        #listing for org id
+        #listing for org id, no org id then list all of them 
         if organization_id:
-            return db.query(models.PowerPlant).filter(models.PowerPlant.organization_id == organization_id).all()
-        #no org id then list all of them 
-        return db.query(models.PowerPlant).all()
+            query = query.filter(models.PowerPlant.organization_id == organization_id)
 
     # ---Admin / Analyst ---
     else:
         #The organization ID can be entered, but only the switchboards belonging to that organization are listed.
-        return db.query(models.PowerPlant).filter(
-            models.PowerPlant.organization_id == current_user.organization_id
-        ).all()
+        query = query.filter(models.PowerPlant.organization_id == current_user.organization_id)
+
+    page = Page([models.PowerPlant.id], cursor, limit)
+    return page.rows((await db.execute(page.apply(query))).scalars().all(), response)
\ No newline at end of file
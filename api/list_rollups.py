@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import Optional
+from datetime import datetime, timedelta
+from enum import Enum
+
+import models
+from .login import Principal, get_current_user
+from .read_session import get_read_db
+from .formats import ResponseFormat, negotiate_format, render_rows
+from .conditional import data_validators, published_hour
+from .dashboard_summary import CONSUMPTION_LAG, SMP_LAG
+
+#Daily / weekly summaries, read from the rollup tables (rollups.py) instead of the raw hours.
+
+router = APIRouter(
+    tags=["Transparency Platform"],
+)
+
+
+class RollupPeriod(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+
+
+PERIOD_LENGTH = {
+    RollupPeriod.DAY: timedelta(days=1),
+    RollupPeriod.WEEK: timedelta(days=7),
+}
+
+MARKET_FIELDS = ["period_start", "hours",
+                 "price_ptf_min", "price_ptf_max", "price_ptf_avg", "price_ptf_sum",
+                 "price_smf_min", "price_smf_max", "price_smf_avg", "price_smf_sum"]
+
+CONSUMPTION_FIELDS = ["period_start", "hours",
+                      "actual_consumption_min", "actual_consumption_max", "actual_consumption_avg", "actual_consumption_sum",
+                      "demand_forecast_min", "demand_forecast_max", "demand_forecast_avg", "demand_forecast_sum"]
+
+
+def closed_periods_query(model, fields, period: RollupPeriod, start_date: datetime, end_date: datetime, lag: timedelta):
+    # only periods that are complete and already published (same lag as the hourly endpoints)
+    last_start = datetime.now() - lag - PERIOD_LENGTH[period]
+    if end_date > last_start:
+        end_date = last_start
+
+    return select(*[getattr(model, field) for field in fields]).filter(
+        model.period == period.value,
+        model.period_start > start_date - PERIOD_LENGTH[period],
+        model.period_start <= end_date
+    ).order_by(model.period_start.asc())
+
+
+@router.post("/market/rollups",status_code=200,summary="Daily / weekly PTF and SMF min, max, avg, sum")
+async def list_market_rollups(
+    start_date: datetime,
+    end_date: datetime,
+    request: Request,
+    period: RollupPeriod = RollupPeriod.DAY,
+    format: Optional[ResponseFormat] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    fmt = negotiate_format(request, format)
+    validators = await data_validators(request, db, ["market_price_rollups"], current_user, published_hour(datetime.now() - SMP_LAG))
+    if validators.matches(request):
+        return validators.not_modified()
+
+    query = closed_periods_query(models.MarketPriceRollup, MARKET_FIELDS, period,
+                                 start_date.replace(tzinfo=None), end_date.replace(tzinfo=None), SMP_LAG)
+    results = (await db.execute(query)).all()
+    return render_rows(request, fmt, results, MARKET_FIELDS, headers=validators.headers)
+
+
+@router.post("/consumption/rollups",status_code=200,summary="Daily / weekly consumption and forecast min, max, avg, sum")
+async def list_consumption_rollups(
+    start_date: datetime,
+    end_date: datetime,
+    request: Request,
+    period: RollupPeriod = RollupPeriod.DAY,
+    format: Optional[ResponseFormat] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    fmt = negotiate_format(request, format)
+    validators = await data_validators(request, db, ["consumption_rollups"], current_user, published_hour(datetime.now() - CONSUMPTION_LAG))
+    if validators.matches(request):
+        return validators.not_modified()
+
+    query = closed_periods_query(models.ConsumptionRollup, CONSUMPTION_FIELDS, period,
+                                 start_date.replace(tzinfo=None), end_date.replace(tzinfo=None), CONSUMPTION_LAG)
+    results = (await db.execute(query)).all()
+    return render_rows(request, fmt, results, CONSUMPTION_FIELDS, headers=validators.headers)
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends,HTTPException,status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends,HTTPException,status,Request, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import Optional
 from datetime import datetime, timedelta
-from database import get_db
 import models
 
-from .login import get_current_user
+from .login import Principal, get_current_user
+from .read_session import get_read_db
+from .formats import ResponseFormat, negotiate_format, render_rows, should_stream, stream_rows
+from .downsampling import downsample, Resolution, MAX_CHART_POINTS
+from .archive_read import read_through
+from .conditional import data_validators, published_hour
 
 router=APIRouter(
     prefix="/consumption",
@@ -13,13 +19,21 @@ router=APIRouter(
 
 
 
+FIELDS = ["timestamp", "actual_consumption"]
+
 @router.post("/real-time",status_code=200,summary="List consumption data up to the last two hours.") 
-def list_realtime_consumption(
+async def list_realtime_consumption(
     start_date: datetime, 
     end_date: datetime,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    request: Request,
+    format: Optional[ResponseFormat] = None,
+    stream: bool = False,
+    max_points: Optional[int] = Query(None, ge=2, le=MAX_CHART_POINTS), # chart width, hours are bucketed to fit
+    resolution: Optional[Resolution] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
+    fmt = negotiate_format(request, format)
     
     # 👇 Timezone temizliği
     if start_date.tzinfo is not None:
@@ -31,19 +45,38 @@ def list_realtime_consumption(
 
     time_limit = datetime.now() - timedelta(hours=2)
 
+    # conditional request: one lookup in data_versions, the list query is skipped for a current copy
+    validators = await data_validators(request, db, ["national_consumption"], current_user, published_hour(time_limit))
+    if validators.matches(request):
+        return validators.not_modified()
+
     # time control 
     if end_date > time_limit:
         end_date = time_limit
     if start_date > time_limit:
-        return []
+        return render_rows(request, fmt, [], FIELDS, headers=validators.headers)
 
 
-    results= db.query(
+    query = select(
         models.NationalConsumption.timestamp, 
         models.NationalConsumption.actual_consumption
     ).filter(
         models.NationalConsumption.timestamp >= start_date,
         models.NationalConsumption.timestamp <= end_date
-    ).order_by(models.NationalConsumption.timestamp.asc()).all()
+    ).order_by(models.NationalConsumption.timestamp.asc())
+
+    # days older than the hot table are read from the Parquet archive (not streamed)
+    archived = await read_through(db, "national_consumption", query, FIELDS, ["actual_consumption"], start_date, end_date, max_points, resolution)
+    if archived is not None:
+        return render_rows(request, fmt, *archived, headers=validators.headers)
+
+    # long ranges for charts: avg / min / max per bucket, computed in the database
+    query, fields = downsample(query, FIELDS, ["actual_consumption"], start_date, end_date, max_points, resolution)
+
+    # streaming: server-side cursor, flat memory for any date range
+    if should_stream(fmt, stream):
+        return stream_rows(fmt, query, fields, headers=validators.headers, bind=db.bind)
+
+    results = (await db.execute(query)).all()
 
-    return [{"timestamp": row.timestamp, "actual_consumption": row.actual_consumption} for row in results]
\ No newline at end of file
+    return render_rows(request, fmt, results, fields, headers=validators.headers)
\ No newline at end of file
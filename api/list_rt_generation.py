@@ -1,11 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from datetime import datetime,timedelta
 from typing import Optional
+import asyncio
 
-from database import get_db
+import archive
 import models
-from .login import get_current_user
+from .login import Principal, get_current_user
+from .read_session import get_read_db
+from .formats import ResponseFormat, negotiate_format, render_rows, should_stream, stream_rows
+from .downsampling import downsample, Resolution, MAX_CHART_POINTS
+from .archive_read import read_through, lookup_columns
+from .conditional import data_validators
 
 router = APIRouter(
     prefix="/generation",
@@ -14,31 +21,19 @@ router = APIRouter(
 
 
 
-@router.post("/",status_code=200,summary="List real-time generation data")
-def list_realtime_generation(
-    start_date: datetime,
-    end_date: datetime,
-    power_plant_id: Optional[int] = None,
-    organization_id: Optional[int] = None,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
-):
-    
+# --- shared rules (also used by the aggregation endpoints) ---
+
+# generation data is published at the end of the day, only up to yesterday can be listed
+def generation_time_limit():
     now = datetime.now()
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    time_limit = today_start - timedelta(seconds=1)
+    return today_start - timedelta(seconds=1)
 
-    # time control 
-    if end_date > time_limit:
-        end_date = time_limit
-    if start_date > time_limit:
-        return []
-    
-    # --- 1. security-----
-    
+
+async def check_generation_access(db: AsyncSession, current_user: Principal, power_plant_id: Optional[int], organization_id: Optional[int]):
     # for a specific power plant, plant control
     if power_plant_id:
-        target_plant = db.query(models.PowerPlant).filter(models.PowerPlant.id == power_plant_id).first()
+        target_plant = await db.get(models.PowerPlant, power_plant_id)
         
         # no power plant
         if not target_plant:
@@ -47,7 +42,7 @@ def list_realtime_generation(
         # Unless it's a Super Admin AND the power plant doesn't belong to the user's company.
         if current_user.role != "super_admin" and target_plant.organization_id != current_user.organization_id:
             raise HTTPException(
-                status_code=status.HTTP_404_FORBIDDEN,
+                status_code=status.HTTP_404_NOT_FOUND,
                 detail="Not found"
             )
             
@@ -55,21 +50,71 @@ def list_realtime_generation(
     if current_user.role != "super_admin" and organization_id:
         if organization_id != current_user.organization_id:
              raise HTTPException(
-                status_code=status.HTTP_404_FORBIDDEN,
+                status_code=status.HTTP_404_NOT_FOUND,
                 detail="not found"
             )
 
 
+def apply_generation_scope(query, current_user: Principal, power_plant_id: Optional[int], organization_id: Optional[int]):
+    # the query has to be joined with PowerPlant
+    if current_user.role == "super_admin":
+        if organization_id:
+            query = query.filter(models.PowerPlant.organization_id == organization_id)
+    else:
+        # user within their own company
+        query = query.filter(models.PowerPlant.organization_id == current_user.organization_id)
+
+    if power_plant_id:
+        query = query.filter(models.GenerationData.power_plant_id == power_plant_id)
+    return query
+
+
+FIELDS = ["timestamp", "plant_name", "eic", "fuel_type", "actual_generation", "planned_generation", "settlement_generation"]
+VALUE_FIELDS = ["actual_generation", "planned_generation", "settlement_generation"]
+# plant columns are repeated on every row, column formats send them once
+PLANT_DICTIONARY = ("plant", "plants", ["plant_name", "eic", "fuel_type"])
+
+
+@router.post("/",status_code=200,summary="List real-time generation data")
+async def list_realtime_generation(
+    start_date: datetime,
+    end_date: datetime,
+    request: Request,
+    power_plant_id: Optional[int] = None,
+    organization_id: Optional[int] = None,
+    format: Optional[ResponseFormat] = None,
+    stream: bool = False,
+    max_points: Optional[int] = Query(None, ge=2, le=MAX_CHART_POINTS), # chart width, hours are bucketed to fit
+    resolution: Optional[Resolution] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    fmt = negotiate_format(request, format)
+    time_limit = generation_time_limit()
+
+    # --- 1. security-----
+    await check_generation_access(db, current_user, power_plant_id, organization_id)
+
+    # conditional request: one lookup in data_versions, the list query is skipped for a current copy
+    validators = await data_validators(request, db, ["generation_data", "power_plants"], current_user, time_limit)
+    if validators.matches(request):
+        return validators.not_modified()
+
+    # time control 
+    if end_date > time_limit:
+        end_date = time_limit
+    if start_date > time_limit:
+        return render_rows(request, fmt, [], FIELDS, PLANT_DICTIONARY, headers=validators.headers)
+
     # --- 2. query
-    query = db.query(
+    query = select(
         models.GenerationData.timestamp,
-        models.GenerationData.actual_generation,
-        models.GenerationData.planned_generation,
-        models.GenerationData.settlement_generation,
         models.PowerPlant.name.label("plant_name"),
         models.PowerPlant.eic,
         models.PowerPlant.fuel_type,
-        models.PowerPlant.organization_id
+        models.GenerationData.actual_generation,
+        models.GenerationData.planned_generation,
+        models.GenerationData.settlement_generation
     ).join(models.PowerPlant, models.GenerationData.power_plant_id == models.PowerPlant.id)
 
     query = query.filter(
@@ -78,26 +123,36 @@ def list_realtime_generation(
     )
 
     # --- 3.filter
-    if current_user.role == "super_admin":
-        if organization_id:
-            query = query.filter(models.PowerPlant.organization_id == organization_id)
-        if power_plant_id:
-            query = query.filter(models.GenerationData.power_plant_id == power_plant_id)
-    else:
-        # user within their own company
-        query = query.filter(models.PowerPlant.organization_id == current_user.organization_id)
-        # sql control
+    query = apply_generation_scope(query, current_user, power_plant_id, organization_id)
+
+    query = query.order_by(models.GenerationData.timestamp.asc())
+
+    # days older than the hot table are read from the Parquet archive (not streamed)
+    async def read_archived(archive_start, archive_end):
+        # the archive has plant ids only, names / eic / fuel type come from the plants in scope
+        plants = select(models.PowerPlant.id, models.PowerPlant.name, models.PowerPlant.eic, models.PowerPlant.fuel_type)
+        plants = apply_generation_scope(plants, current_user, None, organization_id)
         if power_plant_id:
-            query = query.filter(models.GenerationData.power_plant_id == power_plant_id)
-
-    results = query.order_by(models.GenerationData.timestamp.asc()).all()
-
-    return [{
-        "timestamp": row.timestamp,
-        "plant_name": row.plant_name,
-        "eic": row.eic,
-        "fuel_type": row.fuel_type,
-        "actual_generation": row.actual_generation,
-        "planned_generation": row.planned_generation,
-        "settlement_generation":row.settlement_generation
-    } for row in results]
\ No newline at end of file
+            plants = plants.filter(models.PowerPlant.id == power_plant_id)
+        plants = (await db.execute(plants)).all()
+        data = await asyncio.to_thread(archive.read_archive, "generation_data", archive_start, archive_end,
+                                       ["timestamp", "power_plant_id", *VALUE_FIELDS], [plant.id for plant in plants])
+        if data is None:
+            return None
+        return lookup_columns(data, "power_plant_id", plants, PLANT_DICTIONARY[2]).select(FIELDS)
+
+    archived = await read_through(db, "generation_data", query, FIELDS, VALUE_FIELDS, start_date, end_date,
+                                  max_points, resolution, read_archived)
+    if archived is not None:
+        return render_rows(request, fmt, *archived, PLANT_DICTIONARY, headers=validators.headers)
+
+    # long ranges for charts: avg / min / max per bucket, computed in the database
+    query, fields = downsample(query, FIELDS, VALUE_FIELDS, start_date, end_date, max_points, resolution)
+
+    # streaming: server-side cursor, flat memory for any date range
+    if should_stream(fmt, stream):
+        return stream_rows(fmt, query, fields, PLANT_DICTIONARY, headers=validators.headers, bind=db.bind)
+
+    results = (await db.execute(query)).all()
+
+    return render_rows(request, fmt, results, fields, PLANT_DICTIONARY, headers=validators.headers)
\ No newline at end of file
@@ -0,0 +1,162 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, literal, case, or_
+from datetime import datetime, timedelta
+from typing import Optional, List
+from enum import Enum
+
+import models
+from .login import Principal, get_current_user
+from .read_session import get_read_db
+from .formats import ResponseFormat, negotiate_format, render_rows, should_stream, stream_rows
+from .downsampling import downsample, Resolution, MAX_CHART_POINTS
+from .conditional import data_validators, published_hour
+from .dashboard_summary import CONSUMPTION_LAG, SMP_LAG
+from .list_rt_generation import generation_time_limit, check_generation_access, apply_generation_scope
+
+router = APIRouter(
+    prefix="/series",
+    tags=["Transparency Platform"],
+)
+
+# one year of hours at most per request
+MAX_HOURS = 24 * 366
+
+
+class SeriesName(str, Enum):
+    PRICE_PTF = "price_ptf"
+    PRICE_SMF = "price_smf"
+    ACTUAL_CONSUMPTION = "actual_consumption"
+    DEMAND_FORECAST = "demand_forecast"
+    FLEET_GENERATION = "fleet_generation"
+
+
+MARKET_SERIES = (SeriesName.PRICE_PTF, SeriesName.PRICE_SMF)
+CONSUMPTION_SERIES = (SeriesName.ACTUAL_CONSUMPTION, SeriesName.DEMAND_FORECAST)
+
+
+def publication_limits(now: datetime) -> dict:
+    # last visible hour of every series, None: published in advance (day-ahead price / forecast)
+    return {
+        SeriesName.PRICE_PTF: None,
+        SeriesName.PRICE_SMF: now - SMP_LAG,
+        SeriesName.ACTUAL_CONSUMPTION: now - CONSUMPTION_LAG,
+        SeriesName.DEMAND_FORECAST: None,
+        SeriesName.FLEET_GENERATION: generation_time_limit(),
+    }
+
+
+@router.post("/",status_code=200,summary="Several hourly series aligned on the timestamp")
+async def list_series(
+    start_date: datetime,
+    end_date: datetime,
+    request: Request,
+    series: List[SeriesName] = Query(...), # ?series=price_ptf&series=price_smf
+    power_plant_id: Optional[int] = None, # fleet_generation scope
+    organization_id: Optional[int] = None,
+    format: Optional[ResponseFormat] = None,
+    stream: bool = False,
+    max_points: Optional[int] = Query(None, ge=2, le=MAX_CHART_POINTS),
+    resolution: Optional[Resolution] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    fmt = negotiate_format(request, format)
+    start_date = start_date.replace(tzinfo=None, minute=0, second=0, microsecond=0)
+    end_date = end_date.replace(tzinfo=None)
+    series = list(dict.fromkeys(series))
+    fields = ["timestamp"] + [name.value for name in series]
+
+    if end_date - start_date > timedelta(hours=MAX_HOURS):
+        raise HTTPException(status_code=400, detail=f"At most {MAX_HOURS} hours can be requested at once")
+
+    # --- 1. security (fleet generation is limited to the user's organization)
+    if SeriesName.FLEET_GENERATION in series:
+        await check_generation_access(db, current_user, power_plant_id, organization_id)
+
+    limits = publication_limits(datetime.now())
+    tables = set()
+    if any(name in MARKET_SERIES for name in series):
+        tables.add("market_prices")
+    if any(name in CONSUMPTION_SERIES for name in series):
+        tables.add("national_consumption")
+    if SeriesName.FLEET_GENERATION in series:
+        tables.update(["generation_data", "power_plants"])
+
+    validators = await data_validators(request, db, sorted(tables), current_user,
+                                       *[published_hour(limits[name]) for name in series if limits[name]])
+    if validators.matches(request):
+        return validators.not_modified()
+
+    # nothing after the latest publication limit when every series has one
+    if all(limits[name] for name in series):
+        end_date = min(end_date, max(limits[name] for name in series))
+    if start_date > end_date:
+        return render_rows(request, fmt, [], fields, headers=validators.headers)
+
+    # --- 2. one query: hour spine LEFT JOIN every source table (each cut to the range)
+    hours = select(
+        func.generate_series(start_date, end_date, literal(timedelta(hours=1))).label("timestamp")
+    ).subquery("hours")
+    timestamp = hours.c.timestamp
+    source = hours
+    columns = {}
+
+    if tables & {"market_prices"}:
+        market = select(
+            models.MarketPrice.timestamp,
+            models.MarketPrice.price_ptf,
+            models.MarketPrice.price_smf
+        ).filter(
+            models.MarketPrice.timestamp >= start_date,
+            models.MarketPrice.timestamp <= end_date
+        ).subquery("market")
+        source = source.outerjoin(market, market.c.timestamp == timestamp)
+        columns.update({name: market.c[name.value] for name in MARKET_SERIES})
+
+    if tables & {"national_consumption"}:
+        consumption = select(
+            models.NationalConsumption.timestamp,
+            models.NationalConsumption.actual_consumption,
+            models.NationalConsumption.demand_forecast
+        ).filter(
+            models.NationalConsumption.timestamp >= start_date,
+            models.NationalConsumption.timestamp <= end_date
+        ).subquery("consumption")
+        source = source.outerjoin(consumption, consumption.c.timestamp == timestamp)
+        columns.update({name: consumption.c[name.value] for name in CONSUMPTION_SERIES})
+
+    if SeriesName.FLEET_GENERATION in series:
+        generation = select(
+            models.GenerationData.timestamp,
+            func.sum(models.GenerationData.actual_generation).label("fleet_generation")
+        ).join(models.PowerPlant, models.GenerationData.power_plant_id == models.PowerPlant.id).filter(
+            models.GenerationData.timestamp >= start_date,
+            models.GenerationData.timestamp <= end_date
+        )
+        generation = apply_generation_scope(generation, current_user, power_plant_id, organization_id)
+        generation = generation.group_by(models.GenerationData.timestamp).subquery("generation")
+        source = source.outerjoin(generation, generation.c.timestamp == timestamp)
+        columns[SeriesName.FLEET_GENERATION] = generation.c.fleet_generation
+
+    # values after a series' publication limit are hidden (NULL), not cut from the other series
+    values = []
+    for name in series:
+        value = columns[name]
+        if limits[name]:
+            value = case((timestamp <= limits[name], value))
+        values.append(value.label(name.value))
+
+    # hours without any published value are skipped
+    query = select(timestamp, *values).select_from(source).filter(
+        or_(*[value.isnot(None) for value in values])
+    ).order_by(timestamp)
+
+    query, fields = downsample(query, fields, fields[1:], start_date, end_date, max_points, resolution)
+
+    if should_stream(fmt, stream):
+        return stream_rows(fmt, query, fields, headers=validators.headers, bind=db.bind)
+
+    results = (await db.execute(query)).all()
+
+    return render_rows(request, fmt, results, fields, headers=validators.headers)
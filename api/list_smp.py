@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends,HTTPException,status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends,HTTPException,status,Request, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import Optional
 from datetime import datetime,timedelta
 
-from database import get_db
 import models
-from .login import get_current_user
+from .login import Principal, get_current_user
+from .read_session import get_read_db
+from .formats import ResponseFormat, negotiate_format, render_rows, should_stream, stream_rows
+from .downsampling import downsample, Resolution, MAX_CHART_POINTS
+from .archive_read import read_through
+from .conditional import data_validators, published_hour
 
 router = APIRouter(
     prefix="/market",
@@ -13,13 +19,21 @@ router = APIRouter(
 
 
 
+FIELDS = ["timestamp", "price_smf"]
+
 @router.post("/smp",status_code=200,summary="List system marginal price")
-def list_smp(
+async def list_smp(
     start_date: datetime,
     end_date: datetime,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    request: Request,
+    format: Optional[ResponseFormat] = None,
+    stream: bool = False,
+    max_points: Optional[int] = Query(None, ge=2, le=MAX_CHART_POINTS), # chart width, hours are bucketed to fit
+    resolution: Optional[Resolution] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
+    fmt = negotiate_format(request, format)
     # 1. Timezone Temizliği (Hata almamak için)
     if start_date.tzinfo is not None:
         start_date = start_date.replace(tzinfo=None)
@@ -30,18 +44,37 @@ def list_smp(
     
     time_limit = datetime.now() - timedelta(hours=4)
 
+    # conditional request: one lookup in data_versions, the list query is skipped for a current copy
+    validators = await data_validators(request, db, ["market_prices"], current_user, published_hour(time_limit))
+    if validators.matches(request):
+        return validators.not_modified()
+
     if end_date > time_limit:
         end_date = time_limit
 
     if start_date > time_limit:
-        return []
+        return render_rows(request, fmt, [], FIELDS, headers=validators.headers)
     
-    results = db.query(
+    query = select(
         models.MarketPrice.timestamp,
         models.MarketPrice.price_smf
     ).filter(
         models.MarketPrice.timestamp >= start_date,
         models.MarketPrice.timestamp <= end_date
-    ).order_by(models.MarketPrice.timestamp.asc()).all()
+    ).order_by(models.MarketPrice.timestamp.asc())
+
+    # days older than the hot table are read from the Parquet archive (not streamed)
+    archived = await read_through(db, "market_prices", query, FIELDS, ["price_smf"], start_date, end_date, max_points, resolution)
+    if archived is not None:
+        return render_rows(request, fmt, *archived, headers=validators.headers)
+
+    # long ranges for charts: avg / min / max per bucket, computed in the database
+    query, fields = downsample(query, FIELDS, ["price_smf"], start_date, end_date, max_points, resolution)
+
+    # streaming: server-side cursor, flat memory for any date range
+    if should_stream(fmt, stream):
+        return stream_rows(fmt, query, fields, headers=validators.headers, bind=db.bind)
+
+    results = (await db.execute(query)).all()
 
-    return [{"timestamp": row.timestamp, "price_smf": row.price_smf} for row in results]
\ No newline at end of file
+    return render_rows(request, fmt, results, fields, headers=validators.headers)
\ No newline at end of file
@@ -1,17 +1,38 @@
-from fastapi import APIRouter,Depends,HTTPException,status
+from fastapi import APIRouter,Depends,HTTPException,status,Query,Response
 from sqlalchemy.orm import Session
+from typing import Optional
 from database import get_db
 import models
 
-from .login import get_current_user
+from .login import Principal, get_current_user
+from .pagination import Page, MAX_PAGE_SIZE
 
 router=APIRouter(
     prefix="/users",
     tags=["Asset Management"]
 )
 
+# the password hash never leaves the server
+def public_user(user: models.User) -> dict:
+    return {
+        "id": user.id,
+        "username": user.username,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "email": user.email,
+        "role": user.role,
+        "organization_id": user.organization_id,
+    }
+
+
 @router.get("/",status_code=200,summary="List all users")
-def list_users(db:Session=Depends(get_db),current_user: models.User = Depends(get_current_user)):
+def list_users(
+    response: Response,
+    cursor: Optional[str] = None, # X-Next-Cursor of the previous page
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db:Session=Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
 
     if current_user.role != "super_admin":
         raise HTTPException(
@@ -19,4 +40,5 @@ def list_users(db:Session=Depends(get_db),current_user: models.User = Depends(ge
             detail="no transaction authorization"
         )
 
-    return db.query(models.User).all()
\ No newline at end of file
+    page = Page([models.User.id], cursor, limit)
+    return [public_user(user) for user in page.rows(page.apply(db.query(models.User)).all(), response)]
\ No newline at end of file
@@ -1,15 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from database import get_async_db
 import models
+from instrumentation import timed
+from passwords import password_hasher, login_limiter, PasswordPoolBusy
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+import threading
+import time
 import os
-from dotenv import load_dotenv
-
-# load .env file for classified information
-load_dotenv()
 
 router = APIRouter(tags=["Authentication"])
 
@@ -20,6 +24,88 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# verified principals are cached for a short time, 0 disables the cache
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 60))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", 1024))
+
+
+# --- principal cache ---
+# endpoints only need who the user is, not the ORM object
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    username: str
+    role: str
+    organization_id: Optional[int]
+
+
+class PrincipalCache:
+    """Bounded LRU cache of verified tokens.
+
+    An entry lives PRINCIPAL_CACHE_TTL_SECONDS at most and never longer than the token itself.
+    A hit skips both the JWT verification and the user lookup.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # token -> (principal, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, token: str) -> Optional[Principal]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token: str, principal: Principal, token_expires_at: Optional[float] = None):
+        ttl = self.ttl_seconds
+        if token_expires_at is not None:
+            ttl = min(ttl, token_expires_at - time.time())
+        if ttl <= 0 or self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[token] = (principal, time.monotonic() + ttl)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_user(self, username: str):
+        # called whenever a user is created / updated / deleted
+        with self._lock:
+            for token in [t for t, (p, _) in self._entries.items() if p.username == username]:
+                del self._entries[token]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_MAX_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
+
 # --- create token ---
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -29,41 +115,84 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 # --- (DEPENDENCY) ---
-# this function works each request and determines current user
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="You need to log in (Token is invalid)",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+# this function works each request and determines current user (async, no thread pool hop)
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    # auth covers the whole dependency (the user lookup is also counted in db)
+    with timed("auth"):
+        # already verified token, no JWT decode and no DB round trip
+        principal = principal_cache.get(token)
+        if principal is not None:
+            return principal
+
+        credentials_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="You need to log in (Token is invalid)",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        try:
+            with timed("jwt"):
+                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            username: str = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-        
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if user is None:
-        raise credentials_exception
-        
-    return user
+
+        user = (await db.execute(
+            select(models.User).filter(models.User.username == username)
+        )).scalars().first()
+        if user is None:
+            raise credentials_exception
+
+        principal = Principal(
+            id=user.id,
+            username=user.username,
+            role=user.role,
+            organization_id=user.organization_id
+        )
+        principal_cache.put(token, principal, payload.get("exp"))
+        return principal
 
 # --- LOGIN ENDPOINT ---
 @router.post("/token",status_code=200, summary="Giriş Yap")
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    # locked usernames are refused before any hashing work
+    retry_after = login_limiter.retry_after(form_data.username)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts, try again later.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
     # find user
-    user = db.query(models.User).filter(models.User.username == form_data.username).first()
-    
-    # check password (PLAIN TEXT - Hash has been cancelled)
-    if not user or user.password_hash != form_data.password:
+    user = (await db.execute(
+        select(models.User).filter(models.User.username == form_data.username)
+    )).scalars().first()
+
+    # check password (bcrypt in the password pool, unknown users cost the same as a wrong password)
+    try:
+        verified, new_hash = await password_hasher.verify(form_data.password, user.password_hash if user else None)
+    except PasswordPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Login is busy, try again.",
+            headers={"Retry-After": "1"},
+        )
+    if not user or not verified:
+        login_limiter.failed(form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Username or password is incorrect.",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+    login_limiter.reset(form_data.username)
+
+    # plain-text / low-cost hashes are replaced transparently
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+
     #give token (We're also embedding the role and org_id inside because they might be needed on the frontend.)
     access_token = create_access_token(
         data={
@@ -76,4 +205,14 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
             "token_type": "bearer",
             "role": user.role,           
             "username": user.username,   
-            "org_id": user.organization_id  }
\ No newline at end of file
+            "org_id": user.organization_id  }
+
+
+@router.get("/token/cache",status_code=200,summary="Principal cache statistics")
+def principal_cache_stats(current_user: Principal = Depends(get_current_user)):
+    if current_user.role != "super_admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="no transaction authorization"
+        )
+    return principal_cache.stats()
@@ -0,0 +1,74 @@
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_, literal
+from datetime import datetime
+from typing import Optional
+import base64
+import json
+import os
+
+#Keyset (cursor) pagination for the asset lists.
+#The cursor is the ordering key of the last row of the page, so every page is one index range scan
+#no matter how deep it is (no OFFSET). The next cursor is sent in the X-Next-Cursor header,
+#the response body keeps its old list shape.
+
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 500))
+
+
+def encode_cursor(values) -> str:
+    payload = [{"t": value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_value(value, column):
+    # a cursor value must have the column's type, the database would reject it only after the query started
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value["t"])
+    if python_type is float and type(value) is int:
+        return float(value)
+    if type(value) is not python_type:
+        raise TypeError(f"{column.key}: {python_type.__name__} expected")
+    return value
+
+
+def decode_cursor(cursor: str, columns: list) -> list:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise ValueError("wrong shape")
+        return [decode_value(value, column) for value, column in zip(payload, columns)]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+
+class Page:
+    """One page ordered by columns (all ascending or all descending, the last one must be unique).
+
+    Without limit / cursor the old unpaginated answer is kept as long as the result fits in
+    MAX_PAGE_SIZE rows, larger results are cut there and continue with X-Next-Cursor.
+    """
+
+    def __init__(self, columns: list, cursor: Optional[str] = None, limit: Optional[int] = None, descending: bool = False):
+        self.columns = columns
+        self.descending = descending
+        self.size = min(limit or MAX_PAGE_SIZE, MAX_PAGE_SIZE)
+        self.after = decode_cursor(cursor, columns) if cursor else None
+
+    def apply(self, query):
+        if self.after is not None:
+            key = tuple_(*self.columns)
+            after = tuple_(*[literal(value, column.type) for value, column in zip(self.after, self.columns)])
+            query = query.filter(key < after if self.descending else key > after)
+
+        order = [column.desc() if self.descending else column.asc() for column in self.columns]
+        # one extra row tells whether there is a next page
+        return query.order_by(*order).limit(self.size + 1)
+
+    def rows(self, rows, response: Response, key=lambda row: row):
+        # key: row -> object that carries the ordering columns
+        rows = list(rows)
+        if len(rows) > self.size:
+            rows = rows[:self.size]
+            last = key(rows[-1])
+            response.headers["X-Next-Cursor"] = encode_cursor([getattr(last, column.key) for column in self.columns])
+        return rows
@@ -0,0 +1,120 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, or_
+from datetime import datetime, timedelta
+from typing import Optional
+from enum import Enum
+import numpy as np
+
+import models
+from availability import DEFAULT_CAPACITY, hour_range, event_arrays, group_availability
+from .login import Principal, get_current_user
+from .read_session import get_read_db
+from .conditional import data_validators
+from .list_rt_generation import check_generation_access
+
+router = APIRouter(
+    prefix="/plant-events",
+    tags=["Power Plant Status"],
+)
+
+# one year of hours at most per request
+MAX_HOURS = 24 * 366
+
+
+class AvailabilityGroup(str, Enum):
+    PLANT = "plant"
+    ORGANIZATION = "organization"
+
+
+@router.post("/availability",status_code=200,summary="Hourly available capacity per plant or organization")
+async def plant_availability(
+    start_date: datetime,
+    end_date: datetime,
+    request: Request,
+    response: Response,
+    group_by: AvailabilityGroup = AvailabilityGroup.PLANT,
+    power_plant_id: Optional[int] = None,
+    organization_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    start_date = start_date.replace(tzinfo=None)
+    end_date = end_date.replace(tzinfo=None)
+
+    hours = hour_range(start_date, end_date)
+    if len(hours) == 0:
+        return {"timestamps": [], "series": []}
+    if len(hours) > MAX_HOURS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_HOURS} hours can be requested at once")
+
+    # --- 1. security-----
+    await check_generation_access(db, current_user, power_plant_id, organization_id)
+
+    validators = await data_validators(request, db, ["plant_events", "power_plants"], current_user)
+    if validators.matches(request):
+        return validators.not_modified()
+    response.headers.update(validators.headers)
+
+    # --- 2. plants in scope
+    plant_query = select(
+        models.PowerPlant.id,
+        models.PowerPlant.name,
+        models.PowerPlant.installed_capacity,
+        models.PowerPlant.organization_id,
+        models.Organization.name.label("organization_name")
+    ).join(models.Organization, models.PowerPlant.organization_id == models.Organization.id, isouter=True)
+
+    if current_user.role != "super_admin":
+        plant_query = plant_query.filter(models.PowerPlant.organization_id == current_user.organization_id)
+    elif organization_id:
+        plant_query = plant_query.filter(models.PowerPlant.organization_id == organization_id)
+    if power_plant_id:
+        plant_query = plant_query.filter(models.PowerPlant.id == power_plant_id)
+
+    plants = (await db.execute(plant_query.order_by(models.PowerPlant.id))).all()
+    index = {plant.id: i for i, plant in enumerate(plants)}
+
+    # --- 3. every event overlapping the window, one query
+    window_end = hours[-1].astype(datetime) + timedelta(hours=1)
+    event_rows = (await db.execute(select(
+        models.PlantEvent.power_plant_id,
+        models.PlantEvent.start_time,
+        models.PlantEvent.end_time,
+        models.PlantEvent.affected_capacity
+    ).filter(
+        models.PlantEvent.power_plant_id.in_(list(index)),
+        models.PlantEvent.start_time < window_end,
+        or_(models.PlantEvent.end_time >= hours[0].astype(datetime), models.PlantEvent.end_time == None)
+    ))).all()
+
+    # --- 4. sweep
+    capacity = np.array([DEFAULT_CAPACITY if p.installed_capacity is None else p.installed_capacity for p in plants], dtype=float)
+    if group_by == AvailabilityGroup.PLANT:
+        groups = [{
+            "power_plant_id": p.id,
+            "plant_name": p.name,
+            "organization_id": p.organization_id,
+        } for p in plants]
+        plant_group = np.arange(len(plants))
+    else:
+        organization_index = {}
+        groups = []
+        for p in plants:
+            if p.organization_id not in organization_index:
+                organization_index[p.organization_id] = len(groups)
+                groups.append({"organization_id": p.organization_id, "organization_name": p.organization_name})
+        plant_group = np.array([organization_index[p.organization_id] for p in plants], dtype=np.int64)
+
+    available = group_availability(capacity, plant_group, len(groups), event_arrays(event_rows, index),
+                                   hours[0], len(hours))
+    installed = np.bincount(plant_group, weights=capacity, minlength=len(groups)) if len(plants) else np.zeros(0)
+
+    return {
+        "timestamps": hours.astype("datetime64[s]").astype(str).tolist(),
+        "series": [{
+            **group,
+            "installed_capacity": float(installed[i]),
+            "available_capacity": available[i].tolist(),
+        } for i, group in enumerate(groups)],
+    }
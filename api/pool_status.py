@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+import database
+from .login import Principal, get_current_user
+
+router = APIRouter(
+    prefix="/system",
+    tags=["System"],
+)
+
+
+@router.get("/pool",status_code=200,summary="Database connection pool status")
+def connection_pool_status(current_user: Principal = Depends(get_current_user)):
+
+    if current_user.role != "super_admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="no transaction authorization"
+        )
+
+    return database.pool_status()
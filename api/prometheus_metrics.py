@@ -0,0 +1,142 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+import hmac
+import os
+
+import database
+from instrumentation import route_metrics, statement_latency
+from notifications import notification_hub
+from .login import get_current_user, principal_cache
+
+router = APIRouter(
+    tags=["System"],
+)
+
+# when set, scrapers send "Authorization: Bearer <METRICS_TOKEN>",
+# otherwise /metrics needs the token of a super_admin (it is never open)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+PREFIX = "energysys"
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def labels(**values) -> str:
+    text = ",".join(f'{key}="{escape(value)}"' for key, value in values.items())
+    return "{" + text + "}" if text else ""
+
+
+def histogram_lines(name: str, snapshot: dict, **label_values) -> list:
+    lines = [f"{name}_bucket{labels(**label_values, le=le)} {count}" for le, count in snapshot["buckets"].items()]
+    lines.append(f"{name}_sum{labels(**label_values)} {snapshot['sum']}")
+    lines.append(f"{name}_count{labels(**label_values)} {snapshot['count']}")
+    return lines
+
+
+def metric(lines: list, name: str, kind: str, help_text: str):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+async def metrics_access(request: Request):
+    authorization = request.headers.get("authorization", "")
+    if METRICS_TOKEN:
+        if not hmac.compare_digest(authorization.encode(), f"Bearer {METRICS_TOKEN}".encode()):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="no transaction authorization"
+            )
+        return
+
+    token = authorization[7:] if authorization.lower().startswith("bearer ") else None
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="You need to log in (Token is invalid)",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    async with database.AsyncSessionLocal() as db:
+        current_user = await get_current_user(token, db)
+    if current_user.role != "super_admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="no transaction authorization"
+        )
+
+
+@router.get("/metrics",status_code=200,summary="Prometheus metrics",include_in_schema=False,
+            dependencies=[Depends(metrics_access)])
+def prometheus_metrics(request: Request):
+
+    lines = []
+    latency, phases, statements = route_metrics.snapshot()
+
+    # --- 1. requests per route template
+    name = f"{PREFIX}_http_request_duration_seconds"
+    metric(lines, name, "histogram", "Request latency per route.")
+    for (method, route, code), histogram in sorted(latency.items()):
+        lines += histogram_lines(name, histogram.snapshot(), method=method, route=route, status=code)
+
+    name = f"{PREFIX}_http_request_phase_seconds_total"
+    metric(lines, name, "counter", "Time spent per request phase (db, auth, jwt, serialize) per route.")
+    for (method, route, phase), seconds in sorted(phases.items()):
+        lines.append(f"{name}{labels(method=method, route=route, phase=phase)} {seconds}")
+
+    name = f"{PREFIX}_http_request_db_statements_total"
+    metric(lines, name, "counter", "SQL statements executed by the requests of a route.")
+    for (method, route), count in sorted(statements.items()):
+        lines.append(f"{name}{labels(method=method, route=route)} {count}")
+
+    # --- 2. every SQL statement (background jobs included)
+    name = f"{PREFIX}_db_statement_duration_seconds"
+    metric(lines, name, "histogram", "SQL statement latency.")
+    lines += histogram_lines(name, statement_latency.snapshot())
+
+    # --- 3. connection pools
+    pools = database.pool_status()
+    for key, kind, help_text in (
+        ("checked_out", "gauge", "Connections in use."),
+        ("checked_in", "gauge", "Idle connections in the pool."),
+        ("overflow_in_use", "gauge", "Overflow connections in use."),
+        ("checkouts", "counter", "Connection checkouts."),
+        ("waits", "counter", "Checkouts that had to wait for a free connection."),
+        ("wait_seconds_total", "counter", "Time spent waiting for a connection."),
+        ("invalidations", "counter", "Invalidated connections."),
+    ):
+        name = f"{PREFIX}_db_pool_{key}" + ("_total" if kind == "counter" and not key.endswith("_total") else "")
+        metric(lines, name, kind, help_text)
+        for pool, values in pools.items():
+            lines.append(f"{name}{labels(pool=pool)} {values[key]}")
+
+    name = f"{PREFIX}_db_pool_checkout_seconds"
+    metric(lines, name, "histogram", "Connection checkout latency.")
+    for pool, values in pools.items():
+        lines += histogram_lines(name, values["checkout_latency_seconds"], pool=pool)
+
+    if database.replica_async_engine is not None:
+        for key, help_text in (("failures", "Failed replica connections."),
+                               ("fallbacks", "Reads served by the primary because the replica was down.")):
+            name = f"{PREFIX}_db_replica_{key}_total"
+            metric(lines, name, "counter", help_text)
+            lines.append(f"{name} {getattr(database.replica_health, key)}")
+
+    # --- 4. live updates
+    name = f"{PREFIX}_stream_subscribers"
+    metric(lines, name, "gauge", "Open /stream/events connections.")
+    lines.append(f"{name} {len(notification_hub.subscribers)}")
+    for key, help_text in (("received", "Database notifications received."),
+                           ("delivered", "Notifications queued to stream clients."),
+                           ("dropped", "Notifications replaced by a resync for a slow client."),
+                           ("reconnects", "Reconnects of the LISTEN connection.")):
+        name = f"{PREFIX}_stream_notifications_{key}_total"
+        metric(lines, name, "counter", help_text)
+        lines.append(f"{name} {getattr(notification_hub, key)}")
+
+    # --- 5. principal cache
+    for key in ("hits", "misses", "evictions"):
+        name = f"{PREFIX}_principal_cache_{key}_total"
+        metric(lines, name, "counter", f"Principal cache {key}.")
+        lines.append(f"{name} {getattr(principal_cache, key)}")
+
+    return Response(content="\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
@@ -0,0 +1,54 @@
+from fastapi import Depends, Request
+import os
+import time
+import threading
+
+import database
+from .login import Principal, get_current_user
+
+#Session of the read-only endpoints (lists, analytics): the replica when REPLICA_DATABASE_URL is set.
+#A replica lags behind the primary, so a user who has just written (plant events) reads from the
+#primary for READ_YOUR_WRITES_SECONDS; a client can also ask for the primary on one request with
+#the header "X-Read-Consistency: primary" (needed with several workers, the window is per process).
+
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", 10))
+READ_CONSISTENCY_HEADER = "x-read-consistency"
+
+
+class RecentWrites:
+    """user id -> monotonic deadline of the primary reads."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self._until = {}
+        self._lock = threading.Lock()
+
+    def mark(self, user_id: int):
+        now = time.monotonic()
+        with self._lock:
+            # expired users are dropped on write, the dict stays as small as the active writers
+            self._until = {key: until for key, until in self._until.items() if until > now}
+            self._until[user_id] = now + self.seconds
+
+    def active(self, user_id: int) -> bool:
+        return self._until.get(user_id, 0.0) > time.monotonic()
+
+
+recent_writes = RecentWrites(READ_YOUR_WRITES_SECONDS)
+
+
+def reads_primary(request: Request, user) -> bool:
+    if request.headers.get(READ_CONSISTENCY_HEADER, "").lower() == "primary":
+        return True
+    return recent_writes.active(user.id)
+
+
+async def get_read_db(request: Request, current_user: Principal = Depends(get_current_user)):
+    # the user is looked up on the primary (get_current_user), only the endpoint's own queries move
+    db = None
+    if database.ReplicaSessionLocal is not None and not reads_primary(request, current_user):
+        db = await database.open_replica_session()
+    if db is None:
+        db = database.AsyncSessionLocal()
+    async with db:
+        yield db
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_async_db
+import models
+from recompute import recompute_worker
+from .login import Principal, get_current_user
+
+router = APIRouter(
+    prefix="/plant-events",
+    tags=["Power Plant Status"],
+)
+
+
+@router.get("/recompute/{job_id}",status_code=200,summary="Status of the generation recompute after an event change")
+async def recompute_status(
+    job_id: int,
+    wait: float = Query(0, ge=0, le=30), # seconds to wait for the job to finish (long polling)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    job = recompute_worker.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    # ownership control
+    if current_user.role != "super_admin":
+        plant = await db.get(models.PowerPlant, job.power_plant_id)
+        if plant is None or plant.organization_id != current_user.organization_id:
+            raise HTTPException(status_code=404, detail="Not found")
+
+    if wait and not job.done.is_set():
+        # the connection goes back to the pool before the long poll, not idle in transaction
+        await db.close()
+        await job.wait(wait)
+
+    return job.to_dict()
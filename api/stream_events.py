@@ -0,0 +1,115 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
+from jose import jwt
+from typing import Optional
+import asyncio
+import os
+import secrets
+import time
+
+import database
+import models
+from database import get_async_db
+from notifications import notification_hub
+from .login import Principal, get_current_user, oauth2_scheme
+
+router = APIRouter(
+    prefix="/stream",
+    tags=["Live Updates"],
+)
+
+# a comment line keeps proxies from closing an idle stream
+HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", 15))
+# EventSource reconnects after this many milliseconds
+RETRY_MILLISECONDS = 5000
+# a ticket opens one stream within this many seconds
+TICKET_SECONDS = float(os.getenv("STREAM_TICKET_SECONDS", 10))
+
+credentials_exception = HTTPException(status_code=401, detail="You need to log in (Token is invalid)",
+                                      headers={"WWW-Authenticate": "Bearer"})
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+@router.post("/ticket",status_code=201,summary="One-time ticket for the live updates")
+async def create_stream_ticket(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    # EventSource can not send headers and a token in the url ends up in access logs:
+    # the page trades its token for an opaque ticket that works once, for a few seconds
+    now = utcnow()
+    await db.execute(delete(models.StreamTicket).where(models.StreamTicket.expires_at < now))
+    ticket = models.StreamTicket(
+        id=secrets.token_urlsafe(32),
+        user_id=current_user.id,
+        expires_at=now + timedelta(seconds=TICKET_SECONDS),
+        token_expires_at=datetime.fromtimestamp(
+            jwt.get_unverified_claims(token).get("exp") or time.time() + 3600, timezone.utc).replace(tzinfo=None),
+    )
+    db.add(ticket)
+    await db.commit()
+    return {"ticket": ticket.id, "expires_in": TICKET_SECONDS}
+
+
+async def redeem_ticket(db: AsyncSession, ticket: str):
+    """(principal, end of the stream as a unix time) of a ticket, which can not be used again."""
+    row = (await db.execute(
+        delete(models.StreamTicket).where(models.StreamTicket.id == ticket)
+        .returning(models.StreamTicket.user_id, models.StreamTicket.expires_at, models.StreamTicket.token_expires_at)
+    )).first()
+    await db.commit()
+    if row is None or row.expires_at < utcnow():
+        raise credentials_exception
+    user = await db.get(models.User, row.user_id)
+    if user is None:
+        raise credentials_exception
+    principal = Principal(id=user.id, username=user.username, role=user.role, organization_id=user.organization_id)
+    return principal, row.token_expires_at.replace(tzinfo=timezone.utc).timestamp()
+
+
+@router.get("/events",status_code=200,summary="Live updates (Server-Sent Events)")
+async def stream_events(request: Request, ticket: Optional[str] = None):
+    # browsers come with ?ticket= (POST /stream/ticket), other clients can send the Authorization header
+    authorization = request.headers.get("authorization", "")
+    token = authorization[7:] if authorization.lower().startswith("bearer ") else None
+    if not ticket and not token:
+        raise credentials_exception
+
+    # checked first, a refused client keeps its ticket
+    if notification_hub.full():
+        raise HTTPException(status_code=503, detail="Too many live connections, please retry later",
+                            headers={"Retry-After": str(RETRY_MILLISECONDS // 1000)})
+
+    # the session is closed before the stream starts, a viewer holds no pool connection
+    async with database.AsyncSessionLocal() as db:
+        if ticket:
+            current_user, expires_at = await redeem_ticket(db, ticket)
+        else:
+            current_user = await get_current_user(token, db)
+            expires_at = jwt.get_unverified_claims(token).get("exp") or time.time() + 3600
+
+    async def generate():
+        subscription = notification_hub.subscribe(current_user)
+        try:
+            yield f"retry: {RETRY_MILLISECONDS}\n\n".encode()
+            while True:
+                remaining = expires_at - time.time()
+                if remaining <= 0:
+                    yield b"event: token_expired\ndata: {}\n\n"
+                    return
+                try:
+                    yield await asyncio.wait_for(subscription.queue.get(), min(HEARTBEAT_SECONDS, remaining))
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+        finally:
+            notification_hub.unsubscribe(subscription)
+
+    return StreamingResponse(generate(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
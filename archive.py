@@ -0,0 +1,126 @@
+from sqlalchemy import text
+from datetime import date, datetime, timedelta, timezone
+import os
+
+import models
+
+#Cold storage of the hourly tables.
+#Before retention drops a daily partition, its rows are written to a zstd compressed Parquet file
+#<ARCHIVE_DIR>/<table>/day=YYYY-MM-DD/part-0.parquet and recorded in archived_partitions.
+#A day is exported and dropped in one transaction (partitions.maintain_partitions), rows written
+#to it meanwhile wait for the drop; pg_cron's drop_expired_partitions() leaves unarchived days alone.
+#Every archiver run renews the app_settings row "archive_active_until": pg_cron waits for the archive
+#only while it is in the future, so an archive that nobody runs (or ARCHIVE_DIR emptied) stops blocking retention.
+#The list endpoints read the archived days back with pyarrow.dataset (only the files of the requested
+#days are opened, filters and column selection are pushed down to the Parquet reader).
+#pyarrow is imported on first use, the API start up does not pay for it.
+
+# empty: no archive, expired partitions are dropped as before
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+ARCHIVE_COMPRESSION_LEVEL = int(os.getenv("ARCHIVE_COMPRESSION_LEVEL", 9))
+# how long a run keeps pg_cron waiting for the archive, longer than the interval of the archiver job
+ARCHIVE_GUARD_HOURS = float(os.getenv("ARCHIVE_GUARD_HOURS", 48))
+ARCHIVE_FLAG = "archive_active_until"
+
+MODELS = {
+    "generation_data": models.GenerationData,
+    "market_prices": models.MarketPrice,
+    "national_consumption": models.NationalConsumption,
+}
+
+# rows of a day file are ordered like the list endpoints read them
+SORT_KEYS = {
+    "generation_data": ('"timestamp"', "power_plant_id"),
+    "market_prices": ('"timestamp"',),
+    "national_consumption": ('"timestamp"',),
+}
+
+
+def arrow_schema(table: str):
+    import pyarrow as pa
+    types = {"INTEGER": pa.int32(), "FLOAT": pa.float64(), "DATETIME": pa.timestamp("us")}
+    return pa.schema([(column.name, types[str(column.type)]) for column in MODELS[table].__table__.columns])
+
+
+def set_archive_flag(conn, active: bool):
+    """Renews (or clears) the flag that keeps drop_expired_partitions() from dropping unarchived days."""
+    if not active:
+        conn.execute(text("DELETE FROM app_settings WHERE name = :name"), {"name": ARCHIVE_FLAG})
+        return
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    conn.execute(text(
+        "INSERT INTO app_settings (name, value, updated_at) VALUES (:name, :value, :now) "
+        "ON CONFLICT (name) DO UPDATE SET value = EXCLUDED.value, updated_at = EXCLUDED.updated_at"
+    ), {"name": ARCHIVE_FLAG, "value": (now + timedelta(hours=ARCHIVE_GUARD_HOURS)).isoformat(), "now": now})
+
+
+def archive_path(table: str, day: date) -> str:
+    return os.path.join(ARCHIVE_DIR, table, f"day={day.isoformat()}", "part-0.parquet")
+
+
+def write_partition(conn, table: str, partition: str, day: date) -> int:
+    """Writes one daily partition to its Parquet file, returns the number of rows."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(table)
+    names = ", ".join('"' + name + '"' for name in schema.names)
+    rows = conn.execute(text(f'SELECT {names} FROM "{partition}" ORDER BY {", ".join(SORT_KEYS[table])}')).all()
+    columns = list(zip(*rows)) if rows else [[] for _ in schema.names]
+    data = pa.table([pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema)
+
+    path = archive_path(table, day)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # written next to the final file and renamed: readers never see half a file
+    # (names starting with "." are skipped by pyarrow.dataset)
+    temporary = os.path.join(os.path.dirname(path), ".part-0.parquet.tmp")
+    pq.write_table(data, temporary, compression="zstd", compression_level=ARCHIVE_COMPRESSION_LEVEL)
+    os.replace(temporary, path)
+    return len(rows)
+
+
+def archive_partition(conn, table: str, partition: str, day: date) -> int:
+    """Writes one daily partition to Parquet and records it, in the transaction that drops it
+    (partitions.drop_partition, writes to the day are locked out). Returns the number of rows."""
+    rows = write_partition(conn, table, partition, day)
+    conn.execute(text(
+        "INSERT INTO archived_partitions (table_name, day, rows, path, archived_at) "
+        "VALUES (:table, :day, :rows, :path, :archived_at) "
+        "ON CONFLICT (table_name, day) DO UPDATE SET rows = EXCLUDED.rows, path = EXCLUDED.path, "
+        "archived_at = EXCLUDED.archived_at"
+    ), {"table": table, "day": day, "rows": rows, "path": archive_path(table, day),
+        "archived_at": datetime.now(timezone.utc).replace(tzinfo=None)})
+    return rows
+
+
+def read_archive(table: str, start: datetime, end: datetime, columns: list, plant_ids: list = None):
+    """Archived rows of [start, end) as a pyarrow Table ordered by timestamp, None without archive files."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    root = os.path.join(ARCHIVE_DIR, table)
+    if not ARCHIVE_DIR or not os.path.isdir(root):
+        return None
+    dataset = ds.dataset(root, format="parquet", schema=arrow_schema(table).append(pa.field("day", pa.string())),
+                         partitioning=ds.partitioning(pa.schema([("day", pa.string())]), flavor="hive"))
+
+    # the day filter prunes whole files, the timestamp filter the row groups
+    condition = (
+        (ds.field("day") >= start.date().isoformat()) & (ds.field("day") <= end.date().isoformat())
+        & (ds.field("timestamp") >= start) & (ds.field("timestamp") < end)
+    )
+    if plant_ids is not None:
+        condition &= ds.field("power_plant_id").isin(plant_ids)
+    result = dataset.to_table(columns=columns, filter=condition)
+    keys = [key.strip('"') for key in SORT_KEYS[table] if key.strip('"') in result.column_names]
+    return result.sort_by([(key, "ascending") for key in keys])
+
+
+if __name__ == "__main__":
+    from database import engine
+    from partitions import maintain_partitions
+
+    # archives and drops the expired days (same as the API job), for a system cron
+    for table, dropped in maintain_partitions(engine).items():
+        print(f"{table}: {len(dropped)} days archived and dropped ({dropped[0]} .. {dropped[-1]})")
+    print("Archive and partitions are up to date.")
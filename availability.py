@@ -0,0 +1,61 @@
+import numpy as np
+
+#Available capacity of plants / organizations hour by hour, computed from plant_events.
+#Events are turned into +capacity / -capacity marks at their first and last hour and swept
+#with one cumulative sum (difference array), no query per plant or per hour.
+#An event hits hour t when start_time < t + 1h and (end_time >= t or end_time is null),
+#the same rule simulate_hourly_energy_data() uses.
+
+HOUR = np.timedelta64(1, "h")
+# plants without installed_capacity are simulated with 100 MW
+DEFAULT_CAPACITY = 100.0
+
+
+def hour_range(start, end):
+    """Hours from start to end (inclusive), both truncated to the hour."""
+    return np.arange(np.datetime64(start, "h"), np.datetime64(end, "h") + HOUR, HOUR)
+
+
+def event_arrays(rows, index: dict):
+    """(plant_id, start_time, end_time, affected_capacity) rows -> numpy arrays, plant_id mapped with index."""
+    rows = [row for row in rows if row[0] in index and row[1] is not None]
+    return (
+        np.array([index[row[0]] for row in rows], dtype=np.int64),
+        np.array([row[1] for row in rows], dtype="datetime64[us]"),
+        np.array([np.datetime64("NaT") if row[2] is None else row[2] for row in rows], dtype="datetime64[us]"),
+        np.array([row[3] or 0.0 for row in rows], dtype=float),
+    )
+
+
+def affected_capacity(plant_index, starts, ends, capacities, t0, n_hours, n_plants):
+    """(plants x hours) matrix of the capacity taken out by events."""
+    diff = np.zeros((n_plants, n_hours + 1))
+    if len(starts) == 0:
+        return diff[:, :-1]
+
+    first = np.maximum(np.floor((starts - t0) / HOUR), 0).astype(np.int64)
+    last = np.where(np.isnat(ends), n_hours - 1, np.floor((ends - t0) / HOUR))
+    last = np.minimum(last, n_hours - 1).astype(np.int64)
+
+    hit = (first <= last) & (first < n_hours)
+    np.add.at(diff, (plant_index[hit], first[hit]), capacities[hit])
+    np.add.at(diff, (plant_index[hit], last[hit] + 1), -capacities[hit])
+    return np.cumsum(diff, axis=1)[:, :-1]
+
+
+def group_availability(capacity, plant_group, n_groups, events, t0, n_hours):
+    """Available MW per group (plant, organization ...) and hour -> (groups x hours) matrix.
+
+    Only the plants that have events get an hourly row, the others add their installed
+    capacity once. A plant can not lose more than its own capacity.
+    """
+    event_plant, starts, ends, event_capacity = events
+    available = np.repeat(np.bincount(plant_group, weights=capacity, minlength=n_groups)[:, None], n_hours, axis=1)
+    if len(event_plant) == 0:
+        return available
+
+    touched, local_index = np.unique(event_plant, return_inverse=True)
+    affected = affected_capacity(local_index, starts, ends, event_capacity, t0, n_hours, len(touched))
+    lost = np.minimum(affected, capacity[touched][:, None])
+    np.add.at(available, plant_group[touched], -lost)
+    return available
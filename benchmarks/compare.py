@@ -0,0 +1,48 @@
+"""Compares two benchmark result files (benchmarks/run.py).
+
+    python -m benchmarks.compare benchmarks/results/abc123-1000x30.json benchmarks/results/def456-1000x30.json
+
+Cases whose p50 latency got slower than --threshold percent are marked, the exit code is 1 if any.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path) -> dict:
+    with open(path) as f:
+        data = json.load(f)
+    return data, {row["name"]: row for row in data["results"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed p50 slowdown in percent")
+    args = parser.parse_args()
+
+    baseline_meta, baseline = load(args.baseline)
+    candidate_meta, candidate = load(args.candidate)
+    print(f"baseline  {baseline_meta['commit']}  scale {baseline_meta['scale'].get('plants')}x{baseline_meta['scale'].get('days')}")
+    print(f"candidate {candidate_meta['commit']}  scale {candidate_meta['scale'].get('plants')}x{candidate_meta['scale'].get('days')}")
+
+    regressions = 0
+    for name, row in candidate.items():
+        old = baseline.get(name)
+        if old is None:
+            print(f"{name:<40} new")
+            continue
+        before, after = old["latency_ms"]["p50"], row["latency_ms"]["p50"]
+        change = (after - before) / before * 100 if before else 0.0
+        slower = change > args.threshold
+        regressions += slower
+        print(f"{name:<40} p50 {before:>9.2f} -> {after:>9.2f} ms ({change:+6.1f}%)  "
+              f"sql {old['sql_statements']:>3} -> {row['sql_statements']:<3}  "
+              f"peak {old['peak_memory_kb']:>8} -> {row['peak_memory_kb']:<8} KB{'  <-- slower' if slower else ''}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""Data-scale benchmarks of the API endpoints.
+
+Seeds a local Postgres with synthetic data, drives the endpoints of every router in-process through
+the ASGI app (reads and writes; the health probes, the live stream and the recompute long poll aside)
+and writes latency percentiles, rows/s, peak memory and SQL statement counts to a JSON file.
+
+    python -m benchmarks.run --database-url postgresql://postgres@localhost/energysys_bench \
+        --plants 1000 --days 30
+
+The database is dropped and seeded again (use --skip-seed to reuse it), never point it at real data.
+Two result files are compared with benchmarks/compare.py.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import itertools
+import platform
+import secrets
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# names / EICs of the rows created by the write cases, unique across calls and runs on the same database
+RUN_ID = secrets.token_hex(3)
+_created = itertools.count(1)
+
+
+def unique(prefix: str) -> str:
+    return f"{prefix}-{RUN_ID}-{next(_created)}"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="EnergySys API benchmarks")
+    parser.add_argument("--database-url", default=os.getenv("BENCHMARK_DATABASE_URL"),
+                        help="benchmark database (default: BENCHMARK_DATABASE_URL)")
+    parser.add_argument("--plants", type=int, default=10)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--events-per-plant", type=float, default=2.0)
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per endpoint")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--import-rows", type=int, default=300, help="rows per bulk import of organizations / plants")
+    # every imported user costs a bcrypt hash (PASSWORD_HASH_ROUNDS), a few rows already show the bulk path
+    parser.add_argument("--user-import-rows", type=int, default=20, help="rows per bulk import of users")
+    parser.add_argument("--only", action="append", help="run only the cases whose name contains this text")
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<commit>-<plants>x<days>.json)")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url or BENCHMARK_DATABASE_URL is required")
+    return args
+
+
+def configure(args):
+    # must run before the app modules are imported, database.py reads the environment at import
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("DB_SSLMODE", "")
+    # the seeded history must survive the partition maintenance at start up
+    os.environ["DATA_RETENTION_DAYS"] = str(args.days + 2)
+    sys.path.insert(0, ROOT)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def count_rows(response) -> int:
+    content_type = response.headers.get("content-type", "")
+    if not 200 <= response.status_code < 300 or not response.content:
+        return 0
+    if "arrow" in content_type:
+        import pyarrow as pa
+        return pa.ipc.open_stream(io.BytesIO(response.content)).read_all().num_rows
+    if "ndjson" in content_type:
+        return response.content.count(b"\n")
+    if "csv" in content_type:
+        return max(response.content.count(b"\n") - 1, 0)
+    body = response.json()
+    if isinstance(body, list):
+        return len(body)
+    if isinstance(body, dict) and "created" in body and "rows" in body:
+        # bulk import report
+        return body["created"]
+    if isinstance(body, dict) and "series" in body:
+        return sum(len(series.get("available_capacity", [])) for series in body["series"])
+    if isinstance(body, dict) and "columns" in body:
+        return body.get("length", 0)
+    return 1
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    index = min(int(round(q / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def import_records(kind: str, n: int, organization) -> list:
+    """n new rows for the bulk import of organizations, plants or users."""
+    if kind == "organizations":
+        return [{"name": unique("Bench Organization"), "eic": unique("BENCH-O")} for _ in range(n)]
+    if kind == "plants":
+        return [{"name": unique("Bench Plant"), "eic": unique("BENCH-P"), "installed_capacity": 100,
+                 "fuel_type": "wind", "organization_name": organization.name} for _ in range(n)]
+    return [{"username": unique("bench_user"), "password": "benchmark", "first_name": "Bench", "last_name": "User",
+             "email": unique("bench") + "@example.com", "role": "admin", "organization_id": organization.id}
+            for _ in range(n)]
+
+
+def to_csv(records: list) -> bytes:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=list(records[0]))
+    writer.writeheader()
+    writer.writerows(records)
+    return out.getvalue().encode()
+
+
+def import_cases(kind: str, n: int, organization) -> list:
+    # a JSON array and a CSV file upload of the same size, both one transaction on the server
+    path = f"/{kind}/bulk"
+    return [
+        (f"import_{kind} {n} json", "POST", path, None, lambda: import_records(kind, n, organization)),
+        (f"import_{kind} {n} csv", "POST", path, None, lambda: to_csv(import_records(kind, n, organization))),
+    ]
+
+
+def http_cases(scale: dict, plant_id: int, organization, import_rows: int = 300, user_import_rows: int = 20):
+    """(name, method, path, params, json) of every router. Windows follow the seeded range.
+
+    params / json may be functions, called for every request (the write cases need new unique keys);
+    a json of bytes is uploaded as the CSV file of a form.
+    """
+    end = datetime.fromisoformat(scale["end"])
+    yesterday = (end - timedelta(days=1)).replace(hour=0)
+    week = end - timedelta(days=min(scale["days"], 7))
+    full = datetime.fromisoformat(scale["start"])
+
+    def window(start, stop):
+        return {"start_date": start.isoformat(), "end_date": stop.isoformat()}
+
+    return [
+        ("login", "POST", "/token", None, None),
+        ("create_organization", "POST", "/organizations/",
+         lambda: {"name": unique("Bench Organization"), "eic": unique("BENCH-O")}, None),
+        ("create_plant", "POST", "/plants/", lambda: {
+            "name": unique("Bench Plant"), "eic": unique("BENCH-P"), "installed_capacity": 100,
+            "fuel_type": "wind", "organization_name": organization.name}, None),
+        ("create_user", "POST", "/users/", lambda: {
+            "username": unique("bench_user"), "password": "benchmark", "first_name": "Bench", "last_name": "User",
+            "email": unique("bench") + "@example.com", "role": "admin", "organization_id": organization.id}, None),
+        *import_cases("organizations", import_rows, organization),
+        *import_cases("plants", import_rows, organization),
+        *import_cases("users", user_import_rows, organization),
+        ("list_organizations", "GET", "/organizations/", None, None),
+        ("list_users", "GET", "/users/", None, None),
+        ("list_plants", "GET", "/plants/", None, None),
+        ("list_plant_events", "POST", "/plant-events/", None, {}),
+        ("plant_availability 7d organization", "POST", "/plant-events/availability",
+         {**window(week, end), "group_by": "organization"}, None),
+        ("list_rt_generation 1d", "POST", "/generation/", window(yesterday, yesterday + timedelta(hours=23)), None),
+        ("list_rt_generation full plant", "POST", "/generation/",
+         {**window(full, end), "power_plant_id": plant_id}, None),
+        ("list_rt_generation 1d arrow", "POST", "/generation/",
+         {**window(yesterday, yesterday + timedelta(hours=23)), "format": "arrow"}, None),
+        ("list_rt_generation 7d ndjson stream", "POST", "/generation/",
+         {**window(week, end), "format": "ndjson"}, None),
+        ("aggregate_generation full fuel_type/day", "POST", "/generation/aggregate",
+         {**window(full, end), "group_by": "fuel_type", "bucket": "day"}, None),
+        ("list_rt_generation full max_points=200", "POST", "/generation/",
+         {**window(full, end), "max_points": 200}, None),
+        ("list_smp full", "POST", "/market/smp", window(full, end), None),
+        ("settlement full", "POST", "/settlement/", window(full, end), None),
+        ("list_smp full max_points=200", "POST", "/market/smp", {**window(full, end), "max_points": 200}, None),
+        ("list_mpc full", "POST", "/market/ptf", window(full, end), None),
+        ("list_rt_consumption full", "POST", "/consumption/real-time", window(full, end), None),
+        ("list_demand_forecast full", "POST", "/consumption/forecast", window(full, end), None),
+        # the four dashboard series above in one aligned request
+        ("list_series full 4 series", "POST", "/series/",
+         {**window(full, end), "series": ["price_ptf", "price_smf", "actual_consumption", "demand_forecast"]}, None),
+        ("market_rollups day", "POST", "/market/rollups", window(full, end), None),
+        ("consumption_rollups week", "POST", "/consumption/rollups", {**window(full, end), "period": "week"}, None),
+        ("dashboard_summary", "GET", "/dashboard/summary", None, None),
+        ("pool_status", "GET", "/system/pool", None, None),
+        ("create_plant_event + finish", "EVENT", None, {"power_plant_id": plant_id}, None),
+    ]
+
+
+async def run(args):
+    configure(args)
+    import httpx
+    from sqlalchemy import event, text
+
+    import database
+    from benchmarks.seed import seed, PASSWORD
+
+    scale = None
+    if not args.skip_seed:
+        started = time.perf_counter()
+        scale = seed(database.engine, args.plants, args.days, args.events_per_plant)
+        scale["seed_seconds"] = round(time.perf_counter() - started, 2)
+        print(f"seeded {scale}")
+
+    import main
+    from api.login import get_current_user, principal_cache
+
+    with database.engine.connect() as conn:
+        if scale is None:
+            first, last = conn.execute(text("SELECT min(timestamp), max(timestamp) FROM market_prices")).one()
+            scale = {"plants": conn.execute(text("SELECT count(*) FROM power_plants")).scalar(),
+                     "days": (last - first).days, "start": first.isoformat(), "end": last.isoformat()}
+        # a plant without an ongoing event, the event case opens and closes one
+        plant_id = conn.execute(text(
+            "SELECT min(id) FROM power_plants WHERE id NOT IN "
+            "(SELECT power_plant_id FROM plant_events WHERE end_time IS NULL)"
+        )).scalar()
+        # parent of the plants / users created by the write cases
+        organization = conn.execute(text("SELECT id, name FROM organizations ORDER BY id LIMIT 1")).one()
+        server_version = conn.execute(text("SHOW server_version")).scalar()
+
+    # SQL statements of both engines
+    statements = {"count": 0}
+
+    def count_statement(*_):
+        statements["count"] += 1
+
+    event.listen(database.engine, "before_cursor_execute", count_statement)
+    event.listen(database.async_engine.sync_engine, "before_cursor_execute", count_statement)
+
+    results = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+            login = {"username": "bench_super", "password": PASSWORD}
+            token = (await client.post("/token", data=login)).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+
+            async def http_call(method, path, params, body):
+                params = params() if callable(params) else params
+                body = body() if callable(body) else body
+                if method == "EVENT":
+                    created = await client.post("/plant-events/create", headers=headers, json={
+                        **params, "event_type": "Maintenance", "reason": "benchmark", "affected_capacity": 1})
+                    event_id = created.json().get("event_id")
+                    finished = await client.put("/plant-events/finish", headers=headers, json={"event_id": event_id})
+                    return finished, 1
+                if path == "/token":
+                    response = await client.post(path, data=login)
+                elif isinstance(body, bytes):
+                    response = await client.request(method, path, params=params, headers=headers,
+                                                    files={"file": ("import.csv", body, "text/csv")})
+                else:
+                    response = await client.request(method, path, params=params, json=body, headers=headers)
+                return response, count_rows(response)
+
+            cases = [(name, (lambda m=method, p=path, q=params, b=body: http_call(m, p, q, b)))
+                     for name, method, path, params, body in http_cases(scale, plant_id, organization, args.import_rows, args.user_import_rows)]
+
+            # the authentication dependency alone, with and without the principal cache
+            async def current_user(cached: bool):
+                if not cached:
+                    principal_cache.clear()
+                async with database.AsyncSessionLocal() as db:
+                    await get_current_user(token, db)
+                return None, 1
+
+            cases.append(("get_current_user cached", lambda: current_user(True)))
+            cases.append(("get_current_user uncached", lambda: current_user(False)))
+
+            for name, call in cases:
+                if args.only and not any(part in name for part in args.only):
+                    continue
+                results.append(await measure(name, call, args, statements))
+                row = results[-1]
+                print(f"{name:<40} p50 {row['latency_ms']['p50']:>9.2f} ms  p95 {row['latency_ms']['p95']:>9.2f} ms  "
+                      f"rows {row['rows']:>9}  sql {row['sql_statements']:>3}  peak {row['peak_memory_kb']:>9} KB")
+
+    output = args.output or os.path.join(
+        ROOT, "benchmarks", "results", f"{git_commit()}-{scale['plants']}x{scale['days']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "commit": git_commit(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "postgres": server_version,
+            "scale": scale,
+            "repeat": args.repeat,
+            "results": results,
+        }, f, indent=2, default=str)
+    print(f"results written to {output}")
+
+
+async def measure(name, call, args, statements) -> dict:
+    for _ in range(args.warmup):
+        await call()
+
+    # 1. one run under tracemalloc: peak memory and SQL statements
+    statements["count"] = 0
+    tracemalloc.start()
+    response, rows = await call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    sql_statements = statements["count"]
+
+    # 2. timed runs
+    latencies = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - started)
+
+    p50 = percentile(latencies, 50)
+    return {
+        "name": name,
+        "status": response.status_code if response is not None else None,
+        "repeat": args.repeat,
+        "latency_ms": {
+            "p50": p50 * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": max(latencies) * 1000,
+            "mean": statistics.mean(latencies) * 1000,
+        },
+        "rows": rows,
+        "rows_per_second": round(rows / p50) if p50 else None,
+        "peak_memory_kb": peak // 1024,
+        "sql_statements": sql_statements,
+        "bytes": len(response.content) if response is not None else None,
+    }
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
@@ -0,0 +1,75 @@
+from sqlalchemy import text
+from datetime import datetime, timedelta
+import numpy as np
+
+#Synthetic data for the benchmarks: organizations, users, plants, events and the hourly
+#tables (through simulation.simulate_range). The schema is dropped and created again.
+
+FUEL_TYPES = ["Natural Gas", "Wind", "Solar", "Hydro", "Coal", "Geothermal"]
+PLANTS_PER_ORGANIZATION = 100
+PASSWORD = "bench"
+USERS = {"bench_super": "super_admin", "bench_admin": "admin", "bench_analyst": "analyst"}
+
+
+def seed(engine, plants: int, days: int, events_per_plant: float = 2.0, seed: int = 42) -> dict:
+    import models
+    from create_db import create_schema
+    from simulation import simulate_range
+
+    rng = np.random.default_rng(seed)
+    end = datetime.now().replace(minute=0, second=0, microsecond=0)
+    start = (end - timedelta(days=days)).replace(hour=0)
+
+    models.Base.metadata.drop_all(bind=engine)
+    create_schema(engine)
+
+    organizations = max(1, plants // PLANTS_PER_ORGANIZATION)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO organizations (name, eic, created_at) "
+            "SELECT 'Organization ' || g, 'BENCH-O' || g, now() FROM generate_series(1, :n) g"
+        ), {"n": organizations})
+        organization_ids = conn.execute(text("SELECT id FROM organizations ORDER BY id")).scalars().all()
+
+        for username, role in USERS.items():
+            conn.execute(text(
+                "INSERT INTO users (username, password_hash, first_name, last_name, email, role, organization_id) "
+                "VALUES (:username, :password, 'Bench', :role, :username || '@example.com', :role, :organization_id)"
+            ), {"username": username, "password": PASSWORD, "role": role, "organization_id": organization_ids[0]})
+
+        conn.execute(text(
+            "INSERT INTO power_plants (name, eic, installed_capacity, fuel_type, is_yekdem, is_res, current_status, organization_id) "
+            "SELECT 'Plant ' || g, 'BENCH-P' || g, 50 + (g % 20) * 25, (:fuels)[1 + g % :fuel_count], "
+            "g % 3 = 0, g % 4 = 0, 'Active', (:organizations)[1 + (g - 1) / :per_organization] "
+            "FROM generate_series(1, :n) g"
+        ), {"fuels": FUEL_TYPES, "fuel_count": len(FUEL_TYPES), "organizations": organization_ids,
+            "per_organization": PLANTS_PER_ORGANIZATION, "n": plants})
+        plant_rows = conn.execute(text("SELECT id, installed_capacity FROM power_plants ORDER BY id")).all()
+
+        # closed events spread over the window, the last event of some plants is still ongoing
+        n_events = int(plants * events_per_plant)
+        if n_events:
+            event_plant = rng.integers(0, plants, n_events)
+            offsets = rng.random(n_events) * days * 24
+            durations = rng.integers(1, 72, n_events)
+            capacity = np.array([row[1] for row in plant_rows])[event_plant] * rng.uniform(0.1, 1.0, n_events)
+            starts = [start + timedelta(hours=float(h)) for h in offsets]
+            ends = [s + timedelta(hours=int(d)) for s, d in zip(starts, durations)]
+            open_events = rng.random(n_events) < 0.05
+            ends = [None if is_open else e for e, is_open in zip(ends, open_events)]
+            conn.execute(text(
+                "INSERT INTO plant_events (power_plant_id, event_type, reason, start_time, end_time, affected_capacity) "
+                "SELECT * FROM unnest(CAST(:plants AS int[]), CAST(:types AS text[]), CAST(:reasons AS text[]), "
+                "CAST(:starts AS timestamp[]), CAST(:ends AS timestamp[]), CAST(:capacities AS float8[]))"
+            ), {
+                "plants": [plant_rows[i][0] for i in event_plant],
+                "types": ["Failure" if f else "Maintenance" for f in rng.random(n_events) < 0.3],
+                "reasons": ["benchmark"] * n_events,
+                "starts": starts,
+                "ends": ends,
+                "capacities": capacity.tolist(),
+            })
+
+    hours = simulate_range(engine, start, end, seed=seed)
+    return {"plants": plants, "organizations": organizations, "events": n_events, "days": days,
+            "hours": hours, "start": start.isoformat(), "end": end.isoformat()}
@@ -1,8 +1,45 @@
+import logging
+import time
+
 from database import engine, Base
-from models import Organization, User, PowerPlant,GenerationData,PlantEvent,MarketPrice,NationalConsumption
+from models import Organization, User, PowerPlant,GenerationData,PlantEvent,MarketPrice,NationalConsumption,MarketPriceRollup,ConsumptionRollup,DataVersion,ArchivedPartition,AppSetting,StreamTicket
+from partitions import convert_heap_tables, maintain_partitions
+from rollups import install_rollups
+from versions import install_versions
+from notifications import install_notifications
+
+#Schema setup. Run once per deploy (python create_db.py), the API does not touch the schema at start up
+#unless SCHEMA_ON_STARTUP=true.
+
+
+def create_schema(engine) -> dict:
+    """Creates / updates everything the API needs, returns the seconds of every step."""
+    timings = {}
+
+    def step(name, function):
+        started = time.perf_counter()
+        function(engine)
+        timings[name] = round(time.perf_counter() - started, 4)
+
+    #models.py daki tabloları okur, veritabanı yoksa oluşturur.
+    step("create_all", lambda engine: Base.metadata.create_all(bind=engine))
+    #hourly tables created before the daily partitions (plain tables) are converted, their rows copied.
+    step("convert_heap_tables", convert_heap_tables)
+    #hourly tables are partitioned by day, first partitions are created here.
+    step("partitions", maintain_partitions)
+    #daily / weekly rollups of market prices and consumption, maintained by triggers.
+    step("rollups", install_rollups)
+    #change markers for the ETag of the read endpoints.
+    step("versions", install_versions)
+    #pg_notify triggers for the live updates (/stream/events).
+    step("notifications", install_notifications)
+    return timings
 
 
-#models.py daki tabloları okur, veritabanı yoksa oluşturur.
-print("Database tables are being created...")
-Base.metadata.create_all(bind=engine)
-print("Operation Successful! The tables have been created on Supabase.")
\ No newline at end of file
+if __name__ == "__main__":
+    # the steps log what they change (e.g. converted tables), shown on the console here
+    logging.basicConfig(level=logging.INFO)
+    print("Database tables are being created...")
+    timings = create_schema(engine)
+    print("Operation Successful! The tables have been created on Supabase.")
+    print(", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
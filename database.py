@@ -1,23 +1,190 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.exc import DBAPIError
+import asyncio
+import logging
+import time
 import os
 from dotenv import load_dotenv
 
 #database şifresini aldım.
+#.env is loaded only here, before the modules below read their settings
 load_dotenv()
+
+from metrics import PoolStats
+from instrumentation import instrument_engine
+
 SQLALCHEMY_DATABASE_URL=os.getenv("DATABASE_URL")
 
+#connection pool settings (env), defaults are SQLAlchemy's except pre-ping / recycle.
+#pre-ping + recycle: connections that died while the host was sleeping are replaced before use.
+DB_POOL_SIZE=int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW=int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT=float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE=int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING=os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+#"require" for Supabase, empty (or "disable") for a local postgres
+DB_SSLMODE=os.getenv("DB_SSLMODE", "require")
+
+POOL_SETTINGS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
+
+#pool classes that time every checkout (pre-ping included)
+class _CheckoutTimer:
+    _stats = None
+
+    def connect(self):
+        # no idle connection and no overflow left: the caller has to wait
+        waited = self.checkedin() == 0 and self._max_overflow > -1 and self._overflow >= self._max_overflow
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            if self._stats is not None:
+                self._stats.record_checkout(time.perf_counter() - start, waited)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool._stats = self._stats
+        return pool
+
+
+class TimedQueuePool(_CheckoutTimer, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_CheckoutTimer, AsyncAdaptedQueuePool):
+    pass
+
+
+pool_stats = {}
+
+def attach_pool_stats(sync_engine, name):
+    stats = PoolStats(name)
+    sync_engine.pool._stats = stats
+    event.listen(sync_engine, "invalidate", lambda *args: stats.record_invalidation())
+    pool_stats[name] = (sync_engine, stats)
+    return stats
+
+
 #engine çalıştırıyorum. Veritabanına ulaşabilmek için
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args={"sslmode": "require"}
+    poolclass=TimedQueuePool,
+    connect_args={"sslmode": DB_SSLMODE} if DB_SSLMODE else {},
+    **POOL_SETTINGS
 )
+attach_pool_stats(engine, "primary")
+instrument_engine(engine)
 
 
 #database işlemlerini gerçekleştirebilmek için session alıyorum.
 SessionLocal=sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+#async engine (asyncpg) for the read endpoints. Same database, different driver.
+def to_async_url(url):
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+ASYNC_DATABASE_URL=os.getenv("ASYNC_DATABASE_URL") or to_async_url(SQLALCHEMY_DATABASE_URL)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=TimedAsyncQueuePool,
+    connect_args={"ssl": DB_SSLMODE} if DB_SSLMODE else {},
+    **POOL_SETTINGS
+)
+attach_pool_stats(async_engine.sync_engine, "primary_async")
+instrument_engine(async_engine.sync_engine)
+
+#expire_on_commit=False: objects are read after the session is closed (no lazy IO in async)
+AsyncSessionLocal=async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+#optional read replica (streaming replica of the primary) for the read-only endpoints.
+#Only the async engine: the list / analytics endpoints are async, writes and background jobs stay on the primary.
+REPLICA_DATABASE_URL=os.getenv("REPLICA_DATABASE_URL")
+ASYNC_REPLICA_DATABASE_URL=os.getenv("ASYNC_REPLICA_DATABASE_URL") or (
+    to_async_url(REPLICA_DATABASE_URL) if REPLICA_DATABASE_URL else None)
+#an unreachable replica fails fast and is skipped for REPLICA_RETRY_SECONDS, reads go to the primary meanwhile
+REPLICA_CONNECT_TIMEOUT=float(os.getenv("REPLICA_CONNECT_TIMEOUT", 2))
+REPLICA_RETRY_SECONDS=float(os.getenv("REPLICA_RETRY_SECONDS", 30))
+
+logger = logging.getLogger("energysys.replica")
+
+replica_async_engine = None
+ReplicaSessionLocal = None
+if ASYNC_REPLICA_DATABASE_URL:
+    replica_async_engine = create_async_engine(
+        ASYNC_REPLICA_DATABASE_URL,
+        poolclass=TimedAsyncQueuePool,
+        connect_args={"timeout": REPLICA_CONNECT_TIMEOUT, **({"ssl": DB_SSLMODE} if DB_SSLMODE else {})},
+        **POOL_SETTINGS
+    )
+    attach_pool_stats(replica_async_engine.sync_engine, "replica_async")
+    instrument_engine(replica_async_engine.sync_engine)
+    ReplicaSessionLocal=async_sessionmaker(bind=replica_async_engine, autoflush=False, expire_on_commit=False)
+
+
+class ReplicaHealth:
+    def __init__(self):
+        self.down_until = 0.0
+        self.failures = 0
+        self.fallbacks = 0  # reads served by the primary because the replica was down
+        self.last_error = None
+
+    def available(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def failed(self, error: Exception):
+        if self.available():
+            logger.warning("replica unavailable, reading from the primary for %ss: %s", REPLICA_RETRY_SECONDS, error)
+        self.down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+        self.failures += 1
+        self.last_error = str(error)
+
+    def to_dict(self) -> dict:
+        return {
+            "configured": replica_async_engine is not None,
+            "available": replica_async_engine is not None and self.available(),
+            "failures": self.failures,
+            "fallbacks": self.fallbacks,
+            "last_error": self.last_error,
+        }
+
+
+replica_health = ReplicaHealth()
+
+
+async def open_replica_session():
+    """Replica session with its connection already checked out, None when the replica is not usable."""
+    if ReplicaSessionLocal is None:
+        return None
+    if not replica_health.available():
+        replica_health.fallbacks += 1
+        return None
+    session = ReplicaSessionLocal()
+    try:
+        await session.connection()
+    except (DBAPIError, OSError, asyncio.TimeoutError) as e:
+        await session.close()
+        replica_health.failed(e)
+        replica_health.fallbacks += 1
+        return None
+    return session
+
+
 #base sınıfı üretiyorum.
 Base=declarative_base()
 
@@ -28,4 +195,34 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+#async dependency, concurrency is limited by the connection pool instead of the thread pool
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+#pool introspection (checked out / idle / overflow + checkout statistics)
+def pool_status():
+    status = {}
+    for name, (sync_engine, stats) in pool_stats.items():
+        pool = sync_engine.pool
+        status[name] = {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow_in_use": max(pool.overflow(), 0),
+            "max_overflow": DB_MAX_OVERFLOW,
+            "timeout": DB_POOL_TIMEOUT,
+            "recycle": DB_POOL_RECYCLE,
+            "pre_ping": DB_POOL_PRE_PING,
+            "checkouts": stats.checkouts,
+            "waits": stats.waits,
+            "wait_seconds_total": stats.wait_seconds_total,
+            "wait_seconds_max": stats.wait_seconds_max,
+            "invalidations": stats.invalidations,
+            "checkout_latency_seconds": stats.checkout_latency.snapshot(),
+        }
+    return status
@@ -0,0 +1,50 @@
+import axios from 'axios';
+
+// Conditional requests for the read endpoints.
+// The last ETag of a request is sent back as If-None-Match and a 304 answer is served
+// from the copy kept here (the list endpoints are POST, the browser cache does not help).
+const MAX_ENTRIES = 50;
+const cache = new Map();
+
+const cacheKey = (config) => [
+  config.method,
+  config.url,
+  JSON.stringify(config.params || {}),
+  typeof config.data === 'string' ? config.data : JSON.stringify(config.data || {}),
+  config.headers?.Authorization || '',
+].join('|');
+
+axios.interceptors.request.use((config) => {
+  const key = cacheKey(config);
+  config.etagKey = key;
+  const cached = cache.get(key);
+  if (cached) {
+    config.headers['If-None-Match'] = cached.etag;
+  }
+  return config;
+});
+
+axios.interceptors.response.use(
+  (response) => {
+    const etag = response.headers?.etag;
+    if (etag && response.config.etagKey) {
+      cache.delete(response.config.etagKey);
+      cache.set(response.config.etagKey, { etag, data: response.data, headers: response.headers });
+      // oldest entry goes first
+      if (cache.size > MAX_ENTRIES) {
+        cache.delete(cache.keys().next().value);
+      }
+    }
+    return response;
+  },
+  (error) => {
+    const response = error.response;
+    if (response?.status === 304) {
+      const cached = cache.get(response.config.etagKey);
+      if (cached) {
+        return { ...response, status: 200, data: cached.data, headers: cached.headers };
+      }
+    }
+    return Promise.reject(error);
+  }
+);
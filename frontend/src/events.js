@@ -0,0 +1,83 @@
+import axios from 'axios';
+
+// Live updates from /stream/events (Server-Sent Events).
+// The server sends small notices (new hours, plant status / events of the user's organization);
+// the page refetches what it shows, the ETag cache keeps unchanged data cheap.
+// EventSource can not send the token as a header: every connection starts with a one-time
+// ticket from POST /stream/ticket, so the token never appears in a url.
+const API_URL = 'https://energysystem.onrender.com';
+// notices arriving together (one simulated hour touches three tables) cause one refresh
+const DEBOUNCE_MS = 1000;
+// wait before a lost stream is opened again with a new ticket
+const RETRY_MS = 5000;
+
+export const subscribeLiveUpdates = (onChange, types = ['hours', 'plant_status', 'plant_event', 'resync']) => {
+  if (!localStorage.getItem('token') || typeof EventSource === 'undefined') {
+    return () => {};
+  }
+
+  let source = null;
+  let timer = null;
+  let retry = null;
+  let closed = false;
+  let missed = false;
+  const notify = () => {
+    clearTimeout(timer);
+    timer = setTimeout(onChange, DEBOUNCE_MS);
+  };
+  const reopen = () => {
+    missed = true;
+    retry = setTimeout(open, RETRY_MS);
+  };
+
+  const open = async () => {
+    const token = localStorage.getItem('token');
+    if (closed || !token) {
+      return;
+    }
+    let ticket;
+    try {
+      const response = await axios.post(`${API_URL}/stream/ticket`, null, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      ticket = response.data.ticket;
+    } catch (error) {
+      // 401: the token expired, a new login opens a new stream
+      if (error.response?.status !== 401) {
+        reopen();
+      }
+      return;
+    }
+    if (closed) {
+      return;
+    }
+
+    source = new EventSource(`${API_URL}/stream/events?ticket=${encodeURIComponent(ticket)}`);
+    types.forEach((type) => source.addEventListener(type, notify));
+    // notices sent while the stream was down are lost, the page refreshes once
+    source.onopen = () => {
+      if (missed) {
+        missed = false;
+        notify();
+      }
+    };
+    // a ticket works once: the stream is reopened with a new one instead of EventSource's own retry
+    source.onerror = () => {
+      source.close();
+      reopen();
+    };
+    // the stream ends with the token, a new login opens a new one
+    source.addEventListener('token_expired', () => source.close());
+  };
+
+  open();
+
+  return () => {
+    closed = true;
+    clearTimeout(timer);
+    clearTimeout(retry);
+    if (source) {
+      source.close();
+    }
+  };
+};
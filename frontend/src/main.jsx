@@ -2,6 +2,7 @@ import 'bootstrap/dist/css/bootstrap.min.css'
 import { StrictMode } from 'react'
 import { createRoot } from 'react-dom/client'
 import './index.css'
+import './etag.js'
 import App from './App.jsx'
 
 createRoot(document.getElementById('root')).render(
@@ -49,37 +49,30 @@ const ConsumptionData = () => {
         end_date: new Date(endDate).toISOString()
       };
 
-      // two services in parallel request
-      const [resForecast, resRealTime] = await Promise.all([
-        // forecast
-        axios.post('https://energysystem.onrender.com/consumption/forecast', null, { headers, params }),
-        // actual-two hours back
-        axios.post('https://energysystem.onrender.com/consumption/real-time', null, { headers, params })
-      ]);
-
-      const forecastList = resForecast.data;
-      const realTimeList = resRealTime.data;
+      // forecast and actual consumption aligned on the hour in one request (actual is null for the last two hours)
+      const res = await axios.post('https://energysystem.onrender.com/series/', null, {
+        headers,
+        params: { ...params, series: ['demand_forecast', 'actual_consumption'] },
+        paramsSerializer: { indexes: null }
+      });
 
-      // merge
       // forecast list base (because always full)
-      const mergedData = forecastList.map((forecastItem) => {
-        // actual data matching forecast time.
-        const matchingReal = realTimeList.find(item => item.timestamp === forecastItem.timestamp);
-        
-        const forecastVal = forecastItem.demand_forecast;
+      const mergedData = res.data
+        .filter((item) => item.demand_forecast !== null)
+        .map((item) => {
+          const forecastVal = item.demand_forecast;
+          const actualVal = item.actual_consumption;
 
-        const actualVal = matchingReal ? matchingReal.actual_consumption : null;
+          // difference calculation
+          const diff = (actualVal !== null) ? (actualVal - forecastVal) : null;
 
-        // difference calculation
-        const diff = (actualVal !== null) ? (actualVal - forecastVal) : null;
-
-        return {
-          timestamp: forecastItem.timestamp,
-          forecast: forecastVal,
-          actual: actualVal,
-          diff: diff
-        };
-      });
+          return {
+            timestamp: item.timestamp,
+            forecast: forecastVal,
+            actual: actualVal,
+            diff: diff
+          };
+        });
 
       setData(mergedData);
 
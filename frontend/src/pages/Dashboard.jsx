@@ -5,6 +5,7 @@ import { FaBolt, FaChartLine, FaExclamationTriangle, FaCloudSun, FaArrowUp, FaAr
 import { AreaChart, Area, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, PieChart, Pie, Cell, Legend } from 'recharts';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
+import { subscribeLiveUpdates } from '../events';
 
 const Dashboard = () => {
   const navigate = useNavigate();
@@ -30,48 +31,28 @@ const Dashboard = () => {
 
   useEffect(() => {
     fetchDashboardData();
+    // new hours / plant status changes refresh the cards without the spinner
+    return subscribeLiveUpdates(() => fetchDashboardData(true));
   }, []);
 
-  const formatDateForBackend = (dateObj) => {
-    const tzOffset = dateObj.getTimezoneOffset() * 60000; 
-    const localISOTime = (new Date(dateObj - tzOffset)).toISOString().slice(0, -1);
-    return localISOTime; 
-  };
+  const formatTime = (timestamp) => timestamp
+    ? new Date(timestamp).toLocaleTimeString('tr-TR', {hour:'2-digit', minute:'2-digit'})
+    : '-';
 
-  const fetchDashboardData = async () => {
-    setLoading(true);
+  const fetchDashboardData = async (background = false) => {
+    if (!background) setLoading(true);
     const role = localStorage.getItem('role') || 'analyst';
     setUserRole(role);
     const token = localStorage.getItem('token');
     const headers = { Authorization: `Bearer ${token}` };
 
-    // time calculation
-    const now = new Date();
-    
-    // for graph and consumption
-    const chartStartDate = new Date(now.getTime() - (24 * 60 * 60 * 1000));
-    const consumptionStartDate = new Date(now.getTime() - (24 * 60 * 60 * 1000)); 
-    
-    // yesterday- generation and prices 100%data 
-    const yesterdayStart = new Date();
-    yesterdayStart.setDate(yesterdayStart.getDate() - 1);
-    yesterdayStart.setHours(0, 0, 0, 0);
-    
-    const yesterdayEnd = new Date();
-    yesterdayEnd.setDate(yesterdayEnd.getDate() - 1);
-    yesterdayEnd.setHours(23, 59, 59, 999);
-
     try {
-      // power plants
-      const resPlants = await axios.get('https://energysystem.onrender.com/plants/', { headers });
-      const plants = resPlants.data || [];
+      // every card and chart comes from one request
+      const res = await axios.get('https://energysystem.onrender.com/dashboard/summary', { headers });
+      const summary = res.data;
 
-      const stats = {
-        total: plants.length,
-        active: plants.filter(p => p.current_status === 'Active').length,
-        failure: plants.filter(p => p.current_status === 'Failure').length,
-        maintenance: plants.filter(p => p.current_status === 'Maintenance').length
-      };
+      // power plants
+      const stats = summary.plants;
       setPlantStats(stats);
       
       setPieData([
@@ -80,113 +61,30 @@ const Dashboard = () => {
         { name: 'Bakım', value: stats.maintenance, color: PIE_COLORS.Maintenance }
       ].filter(d => d.value > 0));
 
-      // consumption 
-      const resCons = await axios.post('https://energysystem.onrender.com/consumption/real-time', null, { 
-        headers,
-        params: {
-          start_date: formatDateForBackend(consumptionStartDate),
-          end_date: formatDateForBackend(now)
-        }
-      });
-      
-      const resForecast = await axios.post('https://energysystem.onrender.com/consumption/forecast', null, {
-        headers,
-        params: {
-          start_date: formatDateForBackend(consumptionStartDate),
-          end_date: formatDateForBackend(now)
-        }
-      });
-
-      const lastCons = resCons.data.length > 0 ? resCons.data[resCons.data.length - 1] : { actual_consumption: 0, timestamp: '-' };
-      const lastForecast = resForecast.data.length > 0 ? resForecast.data[resForecast.data.length - 1] : { demand_forecast: 0, timestamp: '-' };
-
-      // market graph
-      const resSmp = await axios.post('https://energysystem.onrender.com/market/smp', null, {
-        headers,
-        params: {
-          start_date: formatDateForBackend(chartStartDate),
-          end_date: formatDateForBackend(now)
-        }
-      });
-
-      const resMpc = await axios.post('https://energysystem.onrender.com/market/ptf', null, {
-        headers,
-        params: {
-          start_date: formatDateForBackend(chartStartDate),
-          end_date: formatDateForBackend(now)
-        }
-      });
-
-      const mergedChartData = resSmp.data.map(sItem => {
-        const mItem = resMpc.data.find(m => m.timestamp === sItem.timestamp);
-        return {
-          time: new Date(sItem.timestamp).getHours() + ":00",
-          smp: sItem.price_smf,
-          ptf: mItem ? mItem.price_ptf : 0
-        };
-      }).slice(-10);
-      setMarketChartData(mergedChartData);
+      // market graph (PTF and SMP already merged on the server)
+      setMarketChartData(summary.market_chart.map(item => ({
+        time: new Date(item.timestamp).getHours() + ":00",
+        smp: item.price_smf,
+        ptf: item.price_ptf
+      })));
 
       // market prices-yesterday
-      const resSmpDaily = await axios.post('https://energysystem.onrender.com/market/smp', null, {
-        headers,
-        params: {
-          start_date: formatDateForBackend(yesterdayStart),
-          end_date: formatDateForBackend(yesterdayEnd)
-        }
-      });
-      
-      const resMpcDaily = await axios.post('https://energysystem.onrender.com/market/ptf', null, {
-        headers,
-        params: {
-          start_date: formatDateForBackend(yesterdayStart),
-          end_date: formatDateForBackend(yesterdayEnd)
-        }
-      });
-
-      const smpVals = resSmpDaily.data.map(d => d.price_smf);
-      const mpcVals = resMpcDaily.data.map(d => d.price_ptf);
-
       const priceStats = {
-        maxSmp: smpVals.length ? Math.max(...smpVals) : 0,
-        minSmp: smpVals.length ? Math.min(...smpVals) : 0,
-        maxPtf: mpcVals.length ? Math.max(...mpcVals) : 0,
-        minPtf: mpcVals.length ? Math.min(...mpcVals) : 0,
+        maxSmp: summary.prices.max_smf,
+        minSmp: summary.prices.min_smf,
+        maxPtf: summary.prices.max_ptf,
+        minPtf: summary.prices.min_ptf,
       };
 
-      // generation-yesterday
-      const resGen = await axios.post('https://energysystem.onrender.com/generation/', null, {
-        headers,
-        params: {
-          start_date: formatDateForBackend(yesterdayStart),
-          end_date: formatDateForBackend(yesterdayEnd)
-        }
-      });
-
-      let genData = resGen.data;
-      const uniquePlants = {};
-      genData.forEach(item => {
-        if (!uniquePlants[item.plant_name]) {
-          uniquePlants[item.plant_name] = 0;
-        }
-        uniquePlants[item.plant_name] += item.actual_generation;
-      });
-      
-      const plantPerformance = Object.keys(uniquePlants).map(key => ({
-        name: key,
-        val: uniquePlants[key]
+      // generation-yesterday (top 3, already sorted by role on the server)
+      const topList = summary.top_plants.map(item => ({
+        name: item.plant_name,
+        val: item.actual_generation
       }));
 
-      let topList = [];
-      if (role === 'super_admin') {
-        topList = plantPerformance.sort((a, b) => a.val - b.val).slice(0, 3);
-      } else {
-        topList = plantPerformance.sort((a, b) => b.val - a.val).slice(0, 3);
-      }
-
       setCardData({
-        consumption: { val: lastCons.actual_consumption, time: lastCons.timestamp !== '-' ? new Date(lastCons.timestamp).toLocaleTimeString('tr-TR', {hour:'2-digit', minute:'2-digit'}) : '-' },
-        forecast: { val: lastForecast.demand_forecast, time: lastForecast.timestamp !== '-' ? new Date(lastForecast.timestamp).toLocaleTimeString('tr-TR', {hour:'2-digit', minute:'2-digit'}) : '-' },
+        consumption: { val: summary.consumption ? summary.consumption.actual_consumption : 0, time: formatTime(summary.consumption && summary.consumption.timestamp) },
+        forecast: { val: summary.forecast ? summary.forecast.demand_forecast : 0, time: formatTime(summary.forecast && summary.forecast.timestamp) },
         prices: priceStats,
         generationList: topList
       });
@@ -50,33 +50,29 @@ const MarketData = () => {
         end_date: new Date(endDate).toISOString()
       };
 
-      // PTF ve SMP services request
-      const [resPTF, resSMF] = await Promise.all([
-        axios.post('https://energysystem.onrender.com/market/ptf', null, { headers, params }),
-        axios.post('https://energysystem.onrender.com/market/smp', null, { headers, params })
-      ]);
-
-      const ptfList = resPTF.data;
-      const smfList = resSMF.data;
+      // PTF and SMP come aligned on the hour from one request (SMP is null until it is published)
+      const res = await axios.post('https://energysystem.onrender.com/series/', null, {
+        headers,
+        params: { ...params, series: ['price_ptf', 'price_smf'] },
+        paramsSerializer: { indexes: null }
+      });
 
-      // merge 
-      const mergedData = ptfList.map((ptfItem) => {
-        const matchingSmf = smfList.find(smf => smf.timestamp === ptfItem.timestamp);
-        const ptfVal = ptfItem.price_ptf;
-        
-        // null no SMP data
-        const smfVal = matchingSmf ? matchingSmf.price_smf : null;
+      const mergedData = res.data
+        .filter((item) => item.price_ptf !== null)
+        .map((item) => {
+          const ptfVal = item.price_ptf;
+          const smfVal = item.price_smf;
 
-        // diff calculation
-        const spread = (smfVal !== null) ? (smfVal - ptfVal) : null;
+          // diff calculation
+          const spread = (smfVal !== null) ? (smfVal - ptfVal) : null;
 
-        return {
-          timestamp: ptfItem.timestamp,
-          ptf: ptfVal,
-          smf: smfVal,
-          spread: spread
-        };
-      });
+          return {
+            timestamp: item.timestamp,
+            ptf: ptfVal,
+            smf: smfVal,
+            spread: spread
+          };
+        });
 
       setData(mergedData);
 
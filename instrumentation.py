@@ -0,0 +1,173 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+import logging
+import os
+import threading
+import time
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+
+from metrics import Histogram
+
+#Request and SQL instrumentation.
+#Every request gets a RequestTimings in a context variable; the SQLAlchemy hooks, the authentication
+#dependency and the response renderers add their share to it. The totals go out in the Server-Timing
+#header and into the per-route histograms served by /metrics.
+
+# statements slower than this are logged with their parameters, 0 (default) disables the log
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 0))
+# longest parameter text written to the slow query log
+SLOW_QUERY_MAX_PARAMS = 2000
+
+slow_query_log = logging.getLogger("energysys.slow_query")
+
+# phases reported next to db (jwt is the token decode inside auth)
+PHASES = ("auth", "jwt", "serialize")
+
+
+class RequestTimings:
+    """Seconds spent per phase of one request (db, auth, jwt, serialize) and the statement count."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.statements = 0
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        # durations in milliseconds, the statement count goes to the description of db
+        total = time.perf_counter() - self.started
+        parts = [f'db;dur={self.phases.get("db", 0.0) * 1000:.2f};desc="{self.statements} statements"']
+        for phase in PHASES:
+            if phase in self.phases:
+                parts.append(f"{phase};dur={self.phases[phase] * 1000:.2f}")
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("current_timings", default=None)
+
+
+@contextmanager
+def timed(phase: str):
+    """Adds the duration of the block to the given phase of the current request (no-op outside one)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = current_timings.get()
+        if timings is not None:
+            timings.add(phase, time.perf_counter() - started)
+
+
+class RouteMetrics:
+    """Latency histograms per (method, route template, status) and phase totals per route."""
+
+    def __init__(self):
+        self.latency = {}  # (method, route, status) -> Histogram
+        self.phases = {}  # (method, route, phase) -> seconds
+        self.statements = {}  # (method, route) -> count
+        self._lock = threading.Lock()
+
+    def record(self, method: str, route: str, status: int, seconds: float, timings: RequestTimings):
+        with self._lock:
+            histogram = self.latency.get((method, route, status))
+            if histogram is None:
+                histogram = self.latency[(method, route, status)] = Histogram()
+            for phase, value in timings.phases.items():
+                self.phases[(method, route, phase)] = self.phases.get((method, route, phase), 0.0) + value
+            self.statements[(method, route)] = self.statements.get((method, route), 0) + timings.statements
+        histogram.observe(seconds)
+
+    def snapshot(self):
+        # copies, requests keep recording while /metrics renders
+        with self._lock:
+            return dict(self.latency), dict(self.phases), dict(self.statements)
+
+
+route_metrics = RouteMetrics()
+# every statement of both engines, requests or not
+statement_latency = Histogram()
+
+
+class TimingMiddleware:
+    """ASGI middleware: opens the request timings, adds Server-Timing and records the route latency.
+
+    Plain ASGI (not BaseHTTPMiddleware) so streamed responses are not buffered.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing().encode()))
+                headers.append((b"timing-allow-origin", b"*"))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timings.reset(token)
+            # the route template keeps the label set small (/plants/{id}, not every id)
+            route = scope.get("route")
+            route_metrics.record(scope["method"], getattr(route, "path", "unmatched"), status,
+                                 time.perf_counter() - timings.started, timings)
+
+
+class TimedJSONResponse(JSONResponse):
+    """Default response class, the JSON encoding of plain return values counts as serialize."""
+
+    def render(self, content) -> bytes:
+        with timed("serialize"):
+            return super().render(content)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["query_started"].pop()
+    statement_latency.observe(seconds)
+
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add("db", seconds)
+        timings.statements += 1
+
+    if SLOW_QUERY_MS and seconds * 1000 >= SLOW_QUERY_MS:
+        slow_query_log.warning("slow query (%.1f ms): %s | parameters: %s",
+                               seconds * 1000, statement, repr(parameters)[:SLOW_QUERY_MAX_PARAMS])
+
+
+def _handle_error(context):
+    # a failed statement never reaches after_cursor_execute
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(sync_engine):
+    """Times every statement of the engine (for an AsyncEngine pass .sync_engine)."""
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
@@ -1,12 +1,13 @@
+from startup import lifespan
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine
-import models
+from fastapi.middleware.gzip import GZipMiddleware
 from api import all_routers
+from api.formats import COMPRESSION_MIN_BYTES
+from instrumentation import TimingMiddleware, TimedJSONResponse
 
-models.Base.metadata.create_all(bind=engine)
-
-app=FastAPI()
+#the schema is created by "python create_db.py" (or SCHEMA_ON_STARTUP=true), not at import
+app=FastAPI(lifespan=lifespan, default_response_class=TimedJSONResponse)
 
 #settings for frontend
 app.add_middleware(
@@ -15,8 +16,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Next-Cursor", "Server-Timing"],
 )
 
+#large responses are gzipped (skipped when an endpoint already compressed with zstd)
+app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_BYTES, compresslevel=5)
+
+#per-request timings (Server-Timing header, /metrics), outermost so it sees the whole request
+app.add_middleware(TimingMiddleware)
+
 for router in all_routers:
     app.include_router(router)
 
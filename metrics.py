@@ -0,0 +1,68 @@
+import bisect
+import threading
+
+#Small in-process metric primitives (no external dependency).
+
+# seconds, from 1ms up to 10s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram, cumulative counts like Prometheus."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._sum += value
+            self._count += 1
+            if value > self._max:
+                self._max = value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative = []
+            total = 0
+            for count in self._counts:
+                total += count
+                cumulative.append(total)
+            return {
+                "buckets": {str(le): c for le, c in zip(self.buckets + ("+Inf",), cumulative)},
+                "count": self._count,
+                "sum": self._sum,
+                "max": self._max,
+            }
+
+
+class PoolStats:
+    """Checkout latency / wait statistics of one connection pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkout_latency = Histogram()
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def record_checkout(self, seconds: float, waited: bool):
+        self.checkout_latency.observe(seconds)
+        with self._lock:
+            self.checkouts += 1
+            if waited:
+                self.waits += 1
+                self.wait_seconds_total += seconds
+                self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
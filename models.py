@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer,String,Float,Boolean,ForeignKey,DateTime
+from sqlalchemy import Column, Integer,String,Float,Boolean,ForeignKey,DateTime,Date,Index,UniqueConstraint
 from sqlalchemy.orm import relationship
 from database import Base
 import datetime
@@ -56,12 +56,22 @@ class PowerPlant(Base):
     plant_events=relationship("PlantEvent",back_populates="power_plant")
 
 
+#Hourly time-series tables are range partitioned by day on "timestamp".
+#Partitions are created / dropped by partitions.py, so the partition key
+#has to be part of every primary key and unique constraint.
+PARTITION_BY_DAY={"postgresql_partition_by": 'RANGE ("timestamp")'}
+
 #4. GENERATION DATA
 class GenerationData(Base):
     __tablename__="generation_data"
-
-    id=Column(Integer,primary_key=True,index=True)
-    timestamp=Column(DateTime)
+    __table_args__=(
+        UniqueConstraint("timestamp","power_plant_id",name="uq_generation_data_timestamp_plant"),
+        Index("ix_generation_data_plant_timestamp","power_plant_id","timestamp"),
+        PARTITION_BY_DAY,
+    )
+
+    id=Column(Integer,primary_key=True,autoincrement=True)
+    timestamp=Column(DateTime,primary_key=True)
     actual_generation=Column(Float)
     planned_generation=Column(Float)
     settlement_generation=Column(Float)
@@ -72,6 +82,8 @@ class GenerationData(Base):
 #5. PLANT EVENT
 class PlantEvent(Base):
     __tablename__="plant_events"
+    #keyset pagination of the event list (start_time DESC, id DESC)
+    __table_args__=(Index("ix_plant_events_start_time_id","start_time","id"),)
 
     id=Column(Integer,primary_key=True,index=True)
     event_type=Column(String)
@@ -88,17 +100,97 @@ class PlantEvent(Base):
 #6. MARKET PRICE
 class MarketPrice(Base):
     __tablename__="market_prices"
+    __table_args__=(PARTITION_BY_DAY,)
 
-    id=Column(Integer,primary_key=True,index=True)
-    timestamp=Column(DateTime,unique=True)
+    id=Column(Integer,primary_key=True,autoincrement=True)
+    timestamp=Column(DateTime,primary_key=True,unique=True)
     price_ptf=Column(Float)
     price_smf=Column(Float)
 
 #7. NATIONAL CONSUMPTION 
 class NationalConsumption(Base):
     __tablename__="national_consumption"
+    __table_args__=(PARTITION_BY_DAY,)
 
-    id=Column(Integer,primary_key=True,index=True)
-    timestamp=Column(DateTime,unique=True)
+    id=Column(Integer,primary_key=True,autoincrement=True)
+    timestamp=Column(DateTime,primary_key=True,unique=True)
     actual_consumption=Column(Float)
     demand_forecast=Column(Float)
+
+
+#Daily / weekly summaries of the hourly tables. They are maintained by triggers
+#(rollups.py) on every insert / update, and they outlive the retention of the raw hours.
+
+#8. MARKET PRICE ROLLUP
+class MarketPriceRollup(Base):
+    __tablename__="market_price_rollups"
+
+    period=Column(String,primary_key=True) # day / week
+    period_start=Column(DateTime,primary_key=True)
+    hours=Column(Integer)
+    price_ptf_min=Column(Float)
+    price_ptf_max=Column(Float)
+    price_ptf_avg=Column(Float)
+    price_ptf_sum=Column(Float)
+    price_smf_min=Column(Float)
+    price_smf_max=Column(Float)
+    price_smf_avg=Column(Float)
+    price_smf_sum=Column(Float)
+
+#9. CONSUMPTION ROLLUP
+class ConsumptionRollup(Base):
+    __tablename__="consumption_rollups"
+
+    period=Column(String,primary_key=True) # day / week
+    period_start=Column(DateTime,primary_key=True)
+    hours=Column(Integer)
+    actual_consumption_min=Column(Float)
+    actual_consumption_max=Column(Float)
+    actual_consumption_avg=Column(Float)
+    actual_consumption_sum=Column(Float)
+    demand_forecast_min=Column(Float)
+    demand_forecast_max=Column(Float)
+    demand_forecast_avg=Column(Float)
+    demand_forecast_sum=Column(Float)
+
+#10. DATA VERSIONS
+#one row per table, bumped by statement triggers on every write (versions.py).
+#The read endpoints build their ETag from it without running the list query.
+class DataVersion(Base):
+    __tablename__="data_versions"
+
+    table_name=Column(String,primary_key=True)
+    version=Column(Integer,default=1)
+    updated_at=Column(DateTime) # UTC
+
+#11. ARCHIVED PARTITIONS
+#one row per daily partition written to the Parquet archive (archive.py).
+#A partition is dropped only after its row exists; the list endpoints read older days from the archive.
+class ArchivedPartition(Base):
+    __tablename__="archived_partitions"
+
+    table_name=Column(String,primary_key=True)
+    day=Column(Date,primary_key=True)
+    rows=Column(Integer)
+    path=Column(String)
+    archived_at=Column(DateTime) # UTC
+
+#12. APP SETTINGS
+#name -> value flags shared between the API and the database jobs (simulation.sql).
+class AppSetting(Base):
+    __tablename__="app_settings"
+
+    name=Column(String,primary_key=True)
+    value=Column(String)
+    updated_at=Column(DateTime) # UTC
+
+#13. STREAM TICKETS
+#one-time tickets of /stream/events (EventSource can not send the token as a header).
+#Kept in the database so any worker can redeem them; a ticket is deleted when it is used.
+class StreamTicket(Base):
+    __tablename__="stream_tickets"
+
+    id=Column(String,primary_key=True)
+    user_id=Column(Integer)
+    expires_at=Column(DateTime) # UTC
+    token_expires_at=Column(DateTime) # UTC, the stream ends with the token
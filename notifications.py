@@ -0,0 +1,247 @@
+from sqlalchemy.engine import make_url
+import asyncio
+import json
+import logging
+import os
+
+import asyncpg
+
+from database import ASYNC_DATABASE_URL, DB_SSLMODE
+
+#Live updates: the database announces its writes with pg_notify, the API fans them out to the
+#Server-Sent Events clients (/stream/events).
+#The notifications come from triggers, so every writer is covered: the pg_cron job
+#simulate_hourly_energy_data(), simulation.py, the plant event endpoints, imports.
+#One LISTEN connection per process serves any number of viewers; a notification is parsed and
+#framed once and the same bytes are queued for every subscriber allowed to see it.
+#Payloads are small deltas (which hours / which plant changed), clients refetch what they show.
+
+CHANNEL = "energysys_events"
+
+# tables whose new hours are announced (range of the written hours, no values: publication lags apply)
+HOURLY_TABLES = ("generation_data", "market_prices", "national_consumption")
+
+# frames waiting per client, a slower client gets a single "resync" instead
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", 100))
+MAX_SUBSCRIBERS = int(os.getenv("STREAM_MAX_SUBSCRIBERS", 1000))
+# the LISTEN connection is checked this often (and reopened after a loss)
+LISTENER_CHECK_SECONDS = float(os.getenv("STREAM_LISTENER_CHECK_SECONDS", 15))
+
+logger = logging.getLogger("energysys.notifications")
+
+
+#------database-----------
+def hours_trigger_sql(table: str) -> list:
+    statements = []
+    # transition tables allow only one event per trigger, INSERT ... ON CONFLICT fires both
+    for event in ("insert", "update"):
+        name = f"{table}_notify_{event}"
+        statements.append(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+        statements.append(
+            f"CREATE TRIGGER {name} AFTER {event.upper()} ON {table} "
+            f"REFERENCING NEW TABLE AS changed_rows "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION notify_hours()"
+        )
+    return statements
+
+
+FUNCTIONS_SQL = f"""
+CREATE OR REPLACE FUNCTION notify_hours() RETURNS trigger AS $$
+DECLARE
+    from_hour timestamp;
+    to_hour timestamp;
+BEGIN
+    SELECT min("timestamp"), max("timestamp") INTO from_hour, to_hour FROM changed_rows;
+    -- identical payloads of one transaction are delivered once (the per-plant loop of the pg_cron job)
+    IF from_hour IS NOT NULL THEN
+        PERFORM pg_notify('{CHANNEL}', json_build_object(
+            'type', 'hours', 'table', TG_TABLE_NAME, 'from', from_hour, 'to', to_hour)::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_plant_status() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{CHANNEL}', json_build_object(
+        'type', 'plant_status', 'power_plant_id', NEW.id, 'organization_id', NEW.organization_id,
+        'status', NEW.current_status)::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_plant_event() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{CHANNEL}', json_build_object(
+        'type', 'plant_event',
+        'action', CASE WHEN NEW.end_time IS NULL THEN 'started' ELSE 'finished' END,
+        'event_id', NEW.id, 'power_plant_id', NEW.power_plant_id,
+        'organization_id', (SELECT organization_id FROM power_plants WHERE id = NEW.power_plant_id),
+        'event_type', NEW.event_type, 'affected_capacity', NEW.affected_capacity,
+        'start_time', NEW.start_time, 'end_time', NEW.end_time)::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def install_notifications(engine):
+    """Creates the notify triggers. Safe to run on every start."""
+    with engine.begin() as conn:
+        conn.exec_driver_sql(FUNCTIONS_SQL)
+        for table in HOURLY_TABLES:
+            for statement in hours_trigger_sql(table):
+                conn.exec_driver_sql(statement)
+
+        conn.exec_driver_sql("DROP TRIGGER IF EXISTS power_plants_notify_status ON power_plants")
+        conn.exec_driver_sql(
+            "CREATE TRIGGER power_plants_notify_status AFTER UPDATE OF current_status ON power_plants "
+            "FOR EACH ROW WHEN (OLD.current_status IS DISTINCT FROM NEW.current_status) "
+            "EXECUTE FUNCTION notify_plant_status()"
+        )
+        conn.exec_driver_sql("DROP TRIGGER IF EXISTS plant_events_notify_insert ON plant_events")
+        conn.exec_driver_sql(
+            "CREATE TRIGGER plant_events_notify_insert AFTER INSERT ON plant_events "
+            "FOR EACH ROW EXECUTE FUNCTION notify_plant_event()"
+        )
+        conn.exec_driver_sql("DROP TRIGGER IF EXISTS plant_events_notify_update ON plant_events")
+        conn.exec_driver_sql(
+            "CREATE TRIGGER plant_events_notify_update AFTER UPDATE OF end_time ON plant_events "
+            "FOR EACH ROW WHEN (OLD.end_time IS DISTINCT FROM NEW.end_time) "
+            "EXECUTE FUNCTION notify_plant_event()"
+        )
+
+
+#------fan out-----------
+def sse_frame(event: str, data: str, event_id: int = None) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {data}\n\n".encode()
+
+
+RESYNC_FRAME = sse_frame("resync", "{}")
+
+
+class Subscription:
+    def __init__(self, principal):
+        self.principal = principal
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def can_see(self, message: dict) -> bool:
+        # plant messages only reach the plant's organization, new hours reach everybody
+        if "organization_id" not in message or self.principal.role == "super_admin":
+            return True
+        return message["organization_id"] == self.principal.organization_id
+
+    def push(self, frame: bytes) -> bool:
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            # the client can not keep up: the backlog is replaced by one resync (refetch everything)
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_FRAME)
+            return False
+
+
+class NotificationHub:
+    """One LISTEN connection, started with the first subscriber and reopened after a loss."""
+
+    def __init__(self, dsn: str, ssl=None):
+        self.dsn = dsn
+        self.ssl = ssl
+        self.subscribers = set()
+        self.sequence = 0
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0  # frames replaced by a resync
+        self.reconnects = 0
+        self.connected = False
+        self._task = None
+
+    def full(self) -> bool:
+        return len(self.subscribers) >= MAX_SUBSCRIBERS
+
+    def subscribe(self, principal) -> Subscription:
+        subscription = Subscription(principal)
+        self.subscribers.add(subscription)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._listen())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+    def publish(self, payload: str):
+        self.received += 1
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("invalid notification payload: %s", payload)
+            return
+        self.sequence += 1
+        frame = sse_frame(message.get("type", "message"), payload, self.sequence)
+        for subscription in list(self.subscribers):
+            if subscription.can_see(message):
+                if subscription.push(frame):
+                    self.delivered += 1
+                else:
+                    self.dropped += 1
+
+    def _on_notification(self, connection, pid, channel, payload):
+        self.publish(payload)
+
+    async def _listen(self):
+        retry = 1.0
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn, ssl=self.ssl)
+                await connection.add_listener(CHANNEL, self._on_notification)
+                if self.reconnects:
+                    # notifications sent while the connection was down are lost
+                    for subscription in list(self.subscribers):
+                        subscription.push(RESYNC_FRAME)
+                self.connected, retry = True, 1.0
+                while True:
+                    await asyncio.sleep(LISTENER_CHECK_SECONDS)
+                    await asyncio.wait_for(connection.fetchval("SELECT 1"), LISTENER_CHECK_SECONDS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("notification listener lost, retrying in %ss: %s", retry, e)
+            finally:
+                self.connected = False
+                if connection is not None:
+                    connection.terminate()
+            self.reconnects += 1
+            await asyncio.sleep(retry)
+            retry = min(retry * 2, 30.0)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.connected,
+            "subscribers": len(self.subscribers),
+            "received": self.received,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "reconnects": self.reconnects,
+        }
+
+
+def listen_dsn(async_url: str) -> str:
+    # asyncpg takes the plain postgresql:// form of the SQLAlchemy url
+    return make_url(async_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+# LISTEN needs the primary: notifications are not replicated
+notification_hub = NotificationHub(listen_dsn(ASYNC_DATABASE_URL), DB_SSLMODE or None)
@@ -0,0 +1,228 @@
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from datetime import date, datetime, timedelta
+import logging
+import os
+
+from versions import bump_version
+
+#Daily partition management for the hourly time-series tables.
+#Every table below is declared with PARTITION BY RANGE ("timestamp") in models.py,
+#one partition per day is named <table>_pYYYYMMDD.
+#Retention is a cheap DETACH + DROP of whole days instead of row-by-row DELETEs.
+#With ARCHIVE_DIR set the days are written to Parquet first (archive.py).
+
+PARTITIONED_TABLES = ("generation_data", "market_prices", "national_consumption")
+
+# how many days of hourly data are kept in the hot tables
+RETENTION_DAYS = int(os.getenv("DATA_RETENTION_DAYS", 7))
+# how many future days get a partition in advance (simulation runs in UTC+3)
+PRECREATE_DAYS = int(os.getenv("PARTITION_PRECREATE_DAYS", 2))
+# a DETACH waiting longer than this gives up, the day is dropped on the next run
+LOCK_TIMEOUT = os.getenv("PARTITION_LOCK_TIMEOUT", "5s")
+
+# one maintainer at a time across processes (API workers, python archive.py, create_db.py, pg_cron)
+MAINTENANCE_LOCK_KEY = 7301
+
+logger = logging.getLogger("energysys.partitions")
+
+
+def partition_name(table: str, day: date) -> str:
+    return f"{table}_p{day:%Y%m%d}"
+
+
+def is_partitioned(conn, table: str) -> bool:
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :table AND c.relnamespace = current_schema()::regnamespace"
+    ), {"table": table}).first() is not None
+
+
+def list_partitions(conn, table: str) -> dict:
+    """Returns {day: partition_name} for the daily partitions attached to the table."""
+    rows = conn.execute(text(
+        "SELECT child.relname FROM pg_inherits i "
+        "JOIN pg_class parent ON parent.oid = i.inhparent "
+        "JOIN pg_class child ON child.oid = i.inhrelid "
+        "WHERE parent.relname = :table AND parent.relnamespace = current_schema()::regnamespace"
+    ), {"table": table}).scalars().all()
+
+    partitions = {}
+    prefix = f"{table}_p"
+    for name in rows:
+        if not name.startswith(prefix):
+            continue
+        try:
+            day = datetime.strptime(name[len(prefix):], "%Y%m%d").date()
+        except ValueError:
+            continue
+        partitions[day] = name
+    return partitions
+
+
+def create_partitions(conn, table: str, start_day: date, end_day: date):
+    """Creates the missing daily partitions between start_day and end_day (inclusive)."""
+    existing = list_partitions(conn, table)
+    day = start_day
+    while day <= end_day:
+        if day not in existing:
+            conn.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{partition_name(table, day)}" '
+                f'PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+            ))
+        day += timedelta(days=1)
+
+
+def drop_partition(conn, table: str, day: date, name: str, before_drop=None):
+    """Detaches and drops one daily partition in the caller's transaction.
+
+    before_drop(conn, table, name, day) runs first (the archive export): the partition is locked
+    against writes, rows written to the day wait and land in the file or fail after the drop.
+    """
+    # a long query on the table must not queue every new request behind the DETACH
+    conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+    conn.execute(text(f'LOCK TABLE "{name}" IN SHARE MODE'))
+    if before_drop is not None:
+        before_drop(conn, table, name, day)
+    conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+    conn.execute(text(f'DROP TABLE "{name}"'))
+    # no trigger fires for DETACH / DROP, cached responses must still be invalidated
+    bump_version(conn, table)
+
+
+def drop_partitions_before(conn, table: str, cutoff_day: date, before_drop=None) -> list:
+    """Detaches and drops every daily partition that ends before cutoff_day, in the caller's transaction."""
+    dropped = []
+    for day, name in sorted(list_partitions(conn, table).items()):
+        if day >= cutoff_day:
+            continue
+        drop_partition(conn, table, day, name, before_drop)
+        dropped.append(name)
+    return dropped
+
+
+def convert_to_partitioned(conn, table: str) -> int:
+    """Moves a plain heap table (created before the partitioned layout) into the partitioned one.
+
+    In the caller's transaction: the heap table is renamed, the partitioned table is created from
+    models.py with a partition for every day of data, the rows are copied (ids kept) and the heap
+    table is dropped. Its triggers go with it, the later create_db.py steps install them again.
+    Returns the number of copied rows.
+    """
+    import models
+
+    heap = f"{table}_heap"
+    conn.execute(text(f'ALTER TABLE "{table}" RENAME TO "{heap}"'))
+    # index and sequence names are unique per schema, the new table creates the same ones
+    indexes = conn.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE tablename = :heap AND schemaname = current_schema()"
+    ), {"heap": heap}).scalars().all()
+    for index in indexes:
+        conn.execute(text(f'ALTER INDEX "{index}" RENAME TO "{index}_heap"'))
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence(:heap, 'id')"), {"heap": heap}).scalar()
+    if sequence is not None:
+        conn.execute(text(f'ALTER SEQUENCE {sequence} RENAME TO "{heap}_id_seq"'))
+
+    models.Base.metadata.tables[table].create(bind=conn)
+    first_day, last_day = conn.execute(text(f'SELECT min("timestamp")::date, max("timestamp")::date FROM "{heap}"')).one()
+    if first_day is not None:
+        create_partitions(conn, table, first_day, last_day)
+
+    existing = set(conn.execute(text(
+        "SELECT column_name FROM information_schema.columns WHERE table_name = :heap AND table_schema = current_schema()"
+    ), {"heap": heap}).scalars().all())
+    columns = ", ".join(f'"{column.name}"' for column in models.Base.metadata.tables[table].columns if column.name in existing)
+    # duplicate hours of the heap table (no unique constraint there) keep their first row
+    copied = conn.execute(text(
+        f'INSERT INTO "{table}" ({columns}) SELECT {columns} FROM "{heap}" WHERE "timestamp" IS NOT NULL '
+        f"ORDER BY id ON CONFLICT DO NOTHING"
+    )).rowcount
+    conn.execute(text(
+        f"SELECT setval(pg_get_serial_sequence(:table, 'id'), (SELECT coalesce(max(id), 0) + 1 FROM \"{table}\"), false)"
+    ), {"table": table})
+    conn.execute(text(f'DROP TABLE "{heap}"'))
+    return copied
+
+
+def convert_heap_tables(engine):
+    """Converts the hourly tables that are still plain heap tables, one transaction per table."""
+    for table in PARTITIONED_TABLES:
+        with engine.begin() as conn:
+            # waits for a running maintainer or converter, none starts while the table is converted;
+            # checked after the lock (new snapshot): a table converted meanwhile is left alone
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+            if is_partitioned(conn, table):
+                continue
+            rows = convert_to_partitioned(conn, table)
+            logger.info("%s is now partitioned by day (%d rows copied)", table, rows)
+
+
+def maintain_partitions(engine, today: date = None) -> dict:
+    """Keeps RETENTION_DAYS of history and PRECREATE_DAYS of future partitions for every table.
+
+    Called right after Base.metadata.create_all. Tables that were created before the
+    partitioned layout (plain heap tables) are skipped with a warning until
+    convert_heap_tables (create_db.py) has converted them.
+    Everything runs under an advisory lock (one maintainer at a time, pg_cron's
+    drop_expired_partitions() takes it too); with ARCHIVE_DIR set every expired day is exported
+    and dropped in one transaction. Returns {table: [dropped partitions]}.
+    """
+    if today is None:
+        today = datetime.now().date()
+
+    cutoff_day = today - timedelta(days=RETENTION_DAYS)
+
+    import archive
+    export = archive.archive_partition if archive.ARCHIVE_DIR else None
+
+    dropped = {}
+    with engine.connect() as conn:
+        # session lock: held across the transactions below, a second maintainer skips the run
+        locked = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}).scalar()
+        conn.commit()
+        if not locked:
+            logger.info("partition maintenance is running elsewhere, skipped")
+            return dropped
+        try:
+            tables = []
+            with conn.begin():
+                archive.set_archive_flag(conn, export is not None)
+                for table in PARTITIONED_TABLES:
+                    if not is_partitioned(conn, table):
+                        logger.warning("%s is not a partitioned table (run python create_db.py), "
+                                       "partition maintenance skipped", table)
+                        continue
+                    create_partitions(conn, table, cutoff_day, today + timedelta(days=PRECREATE_DAYS))
+                    tables.append(table)
+
+            for table in tables:
+                for day, name in sorted(list_partitions(conn, table).items()):
+                    if day >= cutoff_day:
+                        continue
+                    conn.commit()
+                    # a day that fails (lock timeout, full disk) and the newer ones stay for the next run,
+                    # the archive never has a gap (archive_read.py reads everything before its last day)
+                    try:
+                        with conn.begin():
+                            drop_partition(conn, table, day, name, export)
+                    except (DBAPIError, OSError) as e:
+                        logger.warning("%s was not dropped, retried on the next run: %s", name, e)
+                        break
+                    dropped.setdefault(table, []).append(name)
+                if table in dropped:
+                    logger.info("%s: %d expired days dropped (%s .. %s)", table, len(dropped[table]),
+                                dropped[table][0], dropped[table][-1])
+        finally:
+            conn.rollback()
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+            conn.commit()
+    return dropped
+
+
+if __name__ == "__main__":
+    from database import engine
+    for table, dropped in maintain_partitions(engine).items():
+        print(f"{table}: {len(dropped)} expired days dropped ({dropped[0]} .. {dropped[-1]})")
+    print("Partitions are up to date.")
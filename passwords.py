@@ -0,0 +1,143 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+import bcrypt
+
+#Password hashing (bcrypt) off the event loop.
+#bcrypt costs tens of milliseconds of CPU per call on purpose; it runs in a small dedicated thread
+#pool (bcrypt releases the GIL) so a login storm queues behind PASSWORD_HASH_WORKERS threads
+#instead of taking every request worker. Beyond PASSWORD_HASH_QUEUE waiting jobs logins get a 503.
+
+# bcrypt cost factor (2^rounds iterations), hashes with a lower cost are upgraded at the next login
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", 64))
+
+# failed logins per username before it is locked for the rest of the window
+LOGIN_MAX_ATTEMPTS = int(os.getenv("LOGIN_MAX_ATTEMPTS", 5))
+LOGIN_ATTEMPT_WINDOW_SECONDS = int(os.getenv("LOGIN_ATTEMPT_WINDOW_SECONDS", 300))
+LOGIN_LIMITER_MAX_SIZE = 10000
+
+
+class PasswordPoolBusy(Exception):
+    """More hashing jobs are waiting than PASSWORD_HASH_QUEUE allows."""
+
+
+class PasswordHasher:
+    def __init__(self, rounds: int, workers: int, queue: int):
+        self.rounds = rounds
+        self.limit = workers + queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._dummy_hash = None
+
+    # --- blocking part, runs in the pool
+    @staticmethod
+    def _secret(password: str) -> bytes:
+        # bcrypt only reads 72 bytes, longer passwords are pre-hashed so no part of them is ignored
+        secret = password.encode()
+        if len(secret) > 72:
+            secret = base64.b64encode(hashlib.sha256(secret).digest())
+        return secret
+
+    def _hash(self, password: str) -> str:
+        return bcrypt.hashpw(self._secret(password), bcrypt.gensalt(self.rounds)).decode()
+
+    def _verify(self, password: str, stored: Optional[str]):
+        if stored is None:
+            # unknown user: same cost as a wrong password, the response time does not reveal usernames
+            if self._dummy_hash is None:
+                self._dummy_hash = self._hash("dummy password").encode()
+            bcrypt.checkpw(self._secret(password), self._dummy_hash)
+            return False, None
+
+        if not is_hashed(stored):
+            # plain-text row from before hashing, migrated on the first successful login
+            if hmac.compare_digest(password.encode(), stored.encode()):
+                return True, self._hash(password)
+            return False, None
+
+        if not bcrypt.checkpw(self._secret(password), stored.encode()):
+            return False, None
+        if hash_rounds(stored) < self.rounds:
+            return True, self._hash(password)
+        return True, None
+
+    # --- async API
+    async def _run(self, function, *args):
+        with self._lock:
+            if self._pending >= self.limit:
+                raise PasswordPoolBusy()
+            self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self._hash, password)
+
+    async def verify(self, password: str, stored: Optional[str]):
+        """(valid, new_hash): new_hash is set when the stored value must be replaced (plain text / low cost)."""
+        return await self._run(self._verify, password, stored)
+
+
+def is_hashed(stored: str) -> bool:
+    return stored.startswith(("$2a$", "$2b$", "$2y$"))
+
+
+def hash_rounds(stored: str) -> int:
+    # $2b$12$<salt+hash>
+    return int(stored.split("$")[2])
+
+
+class LoginAttemptLimiter:
+    """Failed login attempts per username in a fixed window (bounded, oldest usernames are dropped)."""
+
+    def __init__(self, max_attempts: int, window_seconds: int, max_size: int):
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self.max_size = max_size
+        self._failures = OrderedDict()  # username -> (failures, window_started_at)
+        self._lock = threading.Lock()
+
+    def retry_after(self, username: str) -> Optional[int]:
+        """Seconds until the username may try again, None when it is not locked."""
+        with self._lock:
+            entry = self._failures.get(username)
+            if entry is None:
+                return None
+            failures, started = entry
+            remaining = started + self.window_seconds - time.monotonic()
+            if remaining <= 0:
+                del self._failures[username]
+                return None
+            return int(remaining) + 1 if failures >= self.max_attempts else None
+
+    def failed(self, username: str):
+        now = time.monotonic()
+        with self._lock:
+            failures, started = self._failures.pop(username, (0, now))
+            if started + self.window_seconds <= now:
+                failures, started = 0, now
+            self._failures[username] = (failures + 1, started)
+            while len(self._failures) > self.max_size:
+                self._failures.popitem(last=False)
+
+    def reset(self, username: str):
+        with self._lock:
+            self._failures.pop(username, None)
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE)
+login_limiter = LoginAttemptLimiter(LOGIN_MAX_ATTEMPTS, LOGIN_ATTEMPT_WINDOW_SECONDS, LOGIN_LIMITER_MAX_SIZE)
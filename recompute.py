@@ -0,0 +1,143 @@
+from datetime import datetime
+from typing import Optional
+from collections import OrderedDict
+import asyncio
+import itertools
+import threading
+import traceback
+
+from database import engine
+from simulation import current_hour, simulate_range
+
+#Background recompute of a plant's generation after its events change.
+#Event writes only queue a job and return; one worker thread runs the jobs outside the request.
+#Jobs of the same plant that are still waiting are merged into one (the hour range grows),
+#so a burst of event changes costs one run per plant.
+
+# finished jobs kept for polling
+JOB_HISTORY = 1000
+
+
+class RecomputeJob:
+    def __init__(self, job_id: int, power_plant_id: int, start: datetime, end: datetime):
+        self.id = job_id
+        self.power_plant_id = power_plant_id
+        self.start = start
+        self.end = end
+        self.status = "pending"
+        self.error = None
+        self.submitted_at = datetime.now()
+        self.finished_at = None
+        self.done = threading.Event()
+        self._waiters = []  # (event loop, asyncio.Event) of the requests polling with ?wait=
+        self._lock = threading.Lock()
+
+    def finish(self, status: str, error: Optional[str]):
+        """Called by the worker thread, wakes up the waiting requests in their event loops."""
+        with self._lock:
+            self.status, self.error, self.finished_at = status, error, datetime.now()
+            self.done.set()
+            waiters, self._waiters = self._waiters, []
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    async def wait(self, timeout: float) -> bool:
+        """Waits up to timeout seconds for the job without holding a thread, True when it finished."""
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._lock:
+            if self.done.is_set():
+                return True
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "power_plant_id": self.power_plant_id,
+            "start": self.start,
+            "end": self.end,
+            "status": self.status,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class RecomputeWorker:
+    def __init__(self, engine):
+        self.engine = engine
+        self._ids = itertools.count(1)
+        self._pending = OrderedDict()  # power_plant_id -> job waiting to run
+        self._jobs = OrderedDict()  # job_id -> job (pending, running and the last JOB_HISTORY finished)
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def submit(self, power_plant_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None) -> RecomputeJob:
+        """Queues the recompute of one plant's generation between start and end (default: current hour)."""
+        start = start or current_hour()
+        end = end or start
+        with self._condition:
+            job = self._pending.get(power_plant_id)
+            if job is not None:
+                # coalesce with the waiting job of the same plant
+                job.start = min(job.start, start)
+                job.end = max(job.end, end)
+            else:
+                job = RecomputeJob(next(self._ids), power_plant_id, start, end)
+                self._pending[power_plant_id] = job
+                self._jobs[job.id] = job
+                self._trim()
+            self._start()
+            self._condition.notify()
+        return job
+
+    def get(self, job_id: int) -> Optional[RecomputeJob]:
+        with self._condition:
+            return self._jobs.get(job_id)
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="plant-recompute", daemon=True)
+            self._thread.start()
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done.is_set()]
+        for job_id in finished[:max(len(finished) - JOB_HISTORY, 0)]:
+            del self._jobs[job_id]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                # everything queued so far, plants with the same range run together
+                batch = list(self._pending.values())
+                self._pending.clear()
+                for job in batch:
+                    job.status = "running"
+
+            groups = {}
+            for job in batch:
+                groups.setdefault((job.start, job.end), []).append(job)
+
+            for (start, end), jobs in groups.items():
+                try:
+                    simulate_range(self.engine, start, end, plant_ids=[job.power_plant_id for job in jobs])
+                    status, error = "done", None
+                except Exception as e:
+                    traceback.print_exc()
+                    status, error = "failed", str(e)
+                for job in jobs:
+                    job.finish(status, error)
+
+
+recompute_worker = RecomputeWorker(engine)
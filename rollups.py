@@ -0,0 +1,120 @@
+from sqlalchemy import text
+from datetime import date
+
+#Daily and weekly rollups (min / max / avg / sum) of the hourly market and consumption tables.
+#They are kept up to date by statement-level triggers on the raw tables, so every writer
+#(simulate_hourly_energy_data, imports, manual upserts) refreshes only the days it touched.
+#Weeks are recomputed from the daily rows, the raw hours are not scanned again.
+#Retention drops whole partitions (no DELETE trigger fires), so the rollups keep the history.
+
+# raw table -> (rollup table, metric columns)
+ROLLUPS = {
+    "market_prices": ("market_price_rollups", ("price_ptf", "price_smf")),
+    "national_consumption": ("consumption_rollups", ("actual_consumption", "demand_forecast")),
+}
+
+# writers can skip the triggers with SET LOCAL energysys.skip_rollups = 'on' and
+# call refresh_rollups() once at the end (bulk backfills)
+SKIP_SETTING = "energysys.skip_rollups"
+
+
+def refresh_function_sql(rollup: str, source: str, metrics: tuple) -> str:
+    columns = ", ".join(f"{m}_{a}" for m in metrics for a in ("min", "max", "avg", "sum"))
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in ["hours"] + columns.split(", "))
+    day_values = ", ".join(f"min({m}), max({m}), avg({m}), sum({m})" for m in metrics)
+    week_values = ", ".join(
+        f"min({m}_min), max({m}_max), sum({m}_sum) / nullif(sum(hours), 0), sum({m}_sum)" for m in metrics
+    )
+    return f"""
+CREATE OR REPLACE FUNCTION refresh_{rollup}(from_day date, to_day date) RETURNS void AS $$
+BEGIN
+    -- 1. days, from the raw hours of the given range only
+    INSERT INTO {rollup} (period, period_start, hours, {columns})
+    SELECT 'day', date_trunc('day', "timestamp"), count(*), {day_values}
+    FROM {source}
+    WHERE "timestamp" >= from_day AND "timestamp" < to_day + 1
+    GROUP BY 2
+    ON CONFLICT (period, period_start) DO UPDATE SET {updates};
+
+    -- 2. weeks, from the daily rollups
+    INSERT INTO {rollup} (period, period_start, hours, {columns})
+    SELECT 'week', date_trunc('week', period_start), sum(hours), {week_values}
+    FROM {rollup}
+    WHERE period = 'day'
+      AND period_start >= date_trunc('week', from_day::timestamp)
+      AND period_start < date_trunc('week', to_day::timestamp) + interval '7 days'
+    GROUP BY 2
+    ON CONFLICT (period, period_start) DO UPDATE SET {updates};
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def trigger_sql(rollup: str, source: str) -> list:
+    function = f"""
+CREATE OR REPLACE FUNCTION {source}_rollup_trigger() RETURNS trigger AS $$
+DECLARE
+    from_day date;
+    to_day date;
+BEGIN
+    IF current_setting('{SKIP_SETTING}', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    SELECT min("timestamp")::date, max("timestamp")::date INTO from_day, to_day FROM changed_rows;
+    IF from_day IS NOT NULL THEN
+        PERFORM refresh_{rollup}(from_day, to_day);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+    statements = [function]
+    # transition tables allow only one event per trigger, INSERT ... ON CONFLICT fires both
+    for event in ("insert", "update"):
+        name = f"{source}_rollup_{event}"
+        statements.append(f"DROP TRIGGER IF EXISTS {name} ON {source}")
+        statements.append(
+            f"CREATE TRIGGER {name} AFTER {event.upper()} ON {source} "
+            f"REFERENCING NEW TABLE AS changed_rows "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION {source}_rollup_trigger()"
+        )
+    return statements
+
+
+def refresh_rollups(conn, start_day: date, end_day: date):
+    """Recomputes the day and week rollups between start_day and end_day (inclusive)."""
+    for rollup, _ in ROLLUPS.values():
+        conn.execute(text(f"SELECT refresh_{rollup}(:start_day, :end_day)"),
+                     {"start_day": start_day, "end_day": end_day})
+
+
+def install_rollups(engine):
+    """Creates the refresh functions and triggers. Empty rollup tables are filled from the raw data.
+
+    Called right after Base.metadata.create_all, safe to run on every start.
+    """
+    with engine.begin() as conn:
+        for source, (rollup, metrics) in ROLLUPS.items():
+            conn.exec_driver_sql(refresh_function_sql(rollup, source, metrics))
+            for statement in trigger_sql(rollup, source):
+                conn.exec_driver_sql(statement)
+
+            if conn.execute(text(f"SELECT 1 FROM {rollup} LIMIT 1")).first() is None:
+                first, last = conn.execute(text(f'SELECT min("timestamp"), max("timestamp") FROM {source}')).one()
+                if first is not None:
+                    conn.execute(text(f"SELECT refresh_{rollup}(:start_day, :end_day)"),
+                                 {"start_day": first.date(), "end_day": last.date()})
+
+
+if __name__ == "__main__":
+    import sys
+    from datetime import datetime
+    from database import engine
+
+    install_rollups(engine)
+    # python rollups.py 2025-01-01 2025-01-31  -> full refresh of the given days
+    if len(sys.argv) == 3:
+        start_day, end_day = (datetime.strptime(arg, "%Y-%m-%d").date() for arg in sys.argv[1:])
+        with engine.begin() as conn:
+            refresh_rollups(conn, start_day, end_day)
+    print("Rollups are up to date.")
@@ -0,0 +1,108 @@
+from sqlalchemy import select, func, case
+from datetime import datetime
+import numpy as np
+import os
+
+import models
+
+#Imbalance (deviation) settlement of the generation against the market prices.
+#deviation = settlement_generation - planned_generation (MWh, actual_generation when not settled yet).
+#Surplus is bought at min(PTF, SMF) * (1 - margin), deficit is paid at max(PTF, SMF) * (1 + margin).
+#The imbalance cost is what the deviation costs compared to trading it at PTF, so it is never negative.
+#Everything per plant-hour is summed in one GROUP BY in the database; organization totals and the
+#fleet total are added up from the plant rows with NumPy.
+
+# imbalance price margin of the balancing market (3%)
+IMBALANCE_MARGIN = float(os.getenv("IMBALANCE_MARGIN", 0.03))
+
+PLANT_METRICS = ["hours", "planned_mwh", "settled_mwh", "net_deviation_mwh", "surplus_mwh", "deficit_mwh",
+                 "imbalance_amount", "imbalance_cost"]
+
+
+def plant_settlement_query(start: datetime, end: datetime, plant_ids=None, margin: float = IMBALANCE_MARGIN):
+    """One row per plant with the summed deviation and imbalance amounts.
+
+    plant_ids (a select of plant ids) limits the plants, None settles the whole fleet.
+    Only hours whose SMF is published (not null) are settled. The plant columns are joined
+    after the aggregation, not to every plant-hour.
+    """
+    settled = func.coalesce(models.GenerationData.settlement_generation, models.GenerationData.actual_generation)
+    generation = select(
+        models.GenerationData.power_plant_id,
+        models.GenerationData.timestamp,
+        models.GenerationData.planned_generation.label("planned"),
+        settled.label("settled"),
+        (settled - models.GenerationData.planned_generation).label("deviation")
+    ).filter(
+        models.GenerationData.timestamp >= start,
+        models.GenerationData.timestamp <= end
+    )
+    if plant_ids is not None:
+        generation = generation.filter(models.GenerationData.power_plant_id.in_(plant_ids))
+    generation = generation.subquery("generation")
+
+    deviation = generation.c.deviation
+    ptf, smf = models.MarketPrice.price_ptf, models.MarketPrice.price_smf
+    # signed: positive is received for the surplus, negative is paid for the deficit
+    amount = deviation * case(
+        (deviation >= 0, func.least(ptf, smf) * (1 - margin)),
+        else_=func.greatest(ptf, smf) * (1 + margin)
+    )
+
+    totals = select(
+        generation.c.power_plant_id,
+        func.count().label("hours"),
+        func.sum(generation.c.planned).label("planned_mwh"),
+        func.sum(generation.c.settled).label("settled_mwh"),
+        func.sum(deviation).label("net_deviation_mwh"),
+        func.sum(func.greatest(deviation, 0)).label("surplus_mwh"),
+        func.sum(func.least(deviation, 0)).label("deficit_mwh"),
+        func.sum(amount).label("imbalance_amount"),
+        func.sum(deviation * ptf - amount).label("imbalance_cost"),
+    ).join(
+        models.MarketPrice, models.MarketPrice.timestamp == generation.c.timestamp
+    ).filter(
+        models.MarketPrice.timestamp >= start,
+        models.MarketPrice.timestamp <= end,
+        smf != None,
+        deviation != None
+    ).group_by(generation.c.power_plant_id).subquery("totals")
+
+    return select(
+        models.PowerPlant.id.label("power_plant_id"),
+        models.PowerPlant.name.label("plant_name"),
+        models.PowerPlant.organization_id,
+        *[totals.c[metric] for metric in PLANT_METRICS]
+    ).join(totals, totals.c.power_plant_id == models.PowerPlant.id)
+
+
+def group_totals(plant_rows: list, group_key: str) -> list:
+    """Sums the PLANT_METRICS of plant rows per group_key, vectorized with bincount."""
+    if not plant_rows:
+        return []
+    keys, group_index = np.unique(np.array([row[group_key] if row[group_key] is not None else -1 for row in plant_rows]),
+                                  return_inverse=True)
+    totals = {metric: np.bincount(group_index, weights=np.array([row[metric] or 0.0 for row in plant_rows], dtype=float),
+                                  minlength=len(keys))
+              for metric in PLANT_METRICS}
+    return [{group_key: (None if key == -1 else int(key)),
+             **{metric: (int(totals[metric][i]) if metric == "hours" else round(float(totals[metric][i]), 4))
+                for metric in PLANT_METRICS}}
+            for i, key in enumerate(keys)]
+
+
+def forecast_error_query(start: datetime, end: datetime):
+    """MAPE (%), MAE and bias of demand_forecast against actual_consumption over the published hours."""
+    actual = models.NationalConsumption.actual_consumption
+    error = models.NationalConsumption.demand_forecast - actual
+    return select(
+        func.count().label("hours"),
+        (func.avg(func.abs(error) / func.nullif(actual, 0)) * 100).label("mape"),
+        func.avg(func.abs(error)).label("mae"),
+        func.avg(error).label("bias"),
+    ).filter(
+        models.NationalConsumption.timestamp >= start,
+        models.NationalConsumption.timestamp <= end,
+        actual != None,
+        models.NationalConsumption.demand_forecast != None
+    )
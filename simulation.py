@@ -0,0 +1,245 @@
+from sqlalchemy import text
+from datetime import date, datetime, timedelta, timezone
+import argparse
+import io
+import numpy as np
+
+from availability import HOUR, DEFAULT_CAPACITY, affected_capacity, event_arrays
+from partitions import PARTITIONED_TABLES, is_partitioned, create_partitions
+from rollups import SKIP_SETTING, refresh_rollups
+
+#Python version of simulate_hourly_energy_data() (simulation.sql), same consumption / price /
+#generation model but computed with NumPy for all plants and hours at once.
+#Rows are written with binary COPY into temp tables and one upsert per table, so it also works
+#for long backfills on a local Postgres without pg_cron.
+
+# hours written per COPY round (memory stays flat for long backfills)
+CHUNK_DAYS = 7
+# simulation clock runs in UTC+3 like the SQL version
+CLOCK_OFFSET = timedelta(hours=3)
+
+# consumption base per hour of day: night, morning, working hours, evening peak, late evening
+CONSUMPTION_BASE = np.array([32000] * 6 + [38000] * 3 + [44000] * 8 + [49000] * 5 + [40000] * 2, dtype=float)
+
+PG_EPOCH = np.datetime64("2000-01-01T00:00:00", "us")
+PG_TYPES = {"timestamp": ">i8", "int4": ">i4", "float8": ">f8"}
+
+
+#------model-----------
+def simulate_consumption(hours_of_day, rng):
+    forecast = CONSUMPTION_BASE[hours_of_day] + (rng.random(len(hours_of_day)) * 4000 - 2000)
+    # actual may deviate by 5% from the forecast
+    actual = forecast * (0.95 + rng.random(len(hours_of_day)) * 0.10)
+    return actual, forecast
+
+
+def simulate_prices(hours_of_day, rng):
+    n = len(hours_of_day)
+    expensive = (hours_of_day >= 8) & (hours_of_day < 22)
+    ptf = np.where(expensive, 2500 + rng.random(n) * 1500, 1500 + rng.random(n) * 700)
+    # SMP may deviate 15% up/down from PTF
+    smf = ptf * (0.85 + rng.random(n) * 0.30)
+    return ptf, smf
+
+
+def simulate_generation(capacity, affected, rng):
+    shape = affected.shape
+    capacity = capacity[:, None]
+    planned = capacity * (0.60 + rng.random(shape) * 0.40)
+
+    available = np.maximum(capacity - affected, 0)
+    actual = np.minimum(available * (0.85 + rng.random(shape) * 0.15), available)
+    settlement = actual * (0.99 + rng.random(shape) * 0.02)
+    return planned, actual, settlement
+
+
+#------database-----------
+def load_plants_and_events(conn, start: datetime, end: datetime, plant_ids: list = None):
+    """One joined query: every plant (or the given ones) with the events overlapping [start, end]."""
+    rows = conn.execute(text(
+        "SELECT p.id, p.installed_capacity, e.start_time, e.end_time, e.affected_capacity "
+        "FROM power_plants p "
+        "LEFT JOIN plant_events e ON e.power_plant_id = p.id "
+        "  AND e.start_time < :end + interval '1 hour' "
+        "  AND (e.end_time >= :start OR e.end_time IS NULL) "
+        + ("WHERE p.id = ANY(:plant_ids) " if plant_ids is not None else "")
+        + "ORDER BY p.id"
+    ), {"start": start, "end": end, "plant_ids": list(plant_ids or [])}).all()
+
+    plant_ids, capacity, index = [], [], {}
+    for plant_id, installed_capacity, *_ in rows:
+        if plant_id not in index:
+            index[plant_id] = len(plant_ids)
+            plant_ids.append(plant_id)
+            capacity.append(DEFAULT_CAPACITY if installed_capacity is None else installed_capacity)
+
+    # plants without events come with a NULL event row (LEFT JOIN), event_arrays skips them
+    events = event_arrays([(plant_id, start_time, end_time, affected)
+                           for plant_id, _, start_time, end_time, affected in rows], index)
+    return np.array(plant_ids, dtype=np.int32), np.array(capacity, dtype=float), events
+
+
+def copy_binary(cursor, table: str, columns: list):
+    """COPY ... FROM STDIN (FORMAT binary) built from numpy arrays, no per-row Python work.
+
+    columns is a list of (name, pg_type, array), pg_type in PG_TYPES.
+    """
+    n = len(columns[0][2])
+    dtype = [("count", ">i2")]
+    for i, (_, pg_type, _) in enumerate(columns):
+        dtype += [(f"len{i}", ">i4"), (f"val{i}", PG_TYPES[pg_type])]
+
+    rows = np.empty(n, dtype=dtype)
+    rows["count"] = len(columns)
+    for i, (_, pg_type, values) in enumerate(columns):
+        if pg_type == "timestamp":
+            values = (values.astype("datetime64[us]") - PG_EPOCH).astype(np.int64)
+        rows[f"len{i}"] = np.dtype(PG_TYPES[pg_type]).itemsize
+        rows[f"val{i}"] = values
+
+    buffer = io.BytesIO()
+    buffer.write(b"PGCOPY\n\xff\r\n\x00" + b"\x00" * 8)
+    buffer.write(rows.tobytes())
+    buffer.write(b"\xff\xff")
+    buffer.seek(0)
+
+    names = ", ".join(f'"{name}"' for name, _, _ in columns)
+    cursor.copy_expert(f"COPY {table} ({names}) FROM STDIN WITH (FORMAT binary)", buffer)
+
+
+STAGING = {
+    "sim_consumption": (
+        '"timestamp" timestamp, actual_consumption float8, demand_forecast float8',
+        'INSERT INTO national_consumption ("timestamp", actual_consumption, demand_forecast) '
+        'SELECT "timestamp", actual_consumption, demand_forecast FROM sim_consumption '
+        'ON CONFLICT ("timestamp") DO UPDATE SET '
+        'actual_consumption = EXCLUDED.actual_consumption, demand_forecast = EXCLUDED.demand_forecast',
+    ),
+    "sim_prices": (
+        '"timestamp" timestamp, price_ptf float8, price_smf float8',
+        'INSERT INTO market_prices ("timestamp", price_ptf, price_smf) '
+        'SELECT "timestamp", price_ptf, price_smf FROM sim_prices '
+        'ON CONFLICT ("timestamp") DO UPDATE SET '
+        'price_ptf = EXCLUDED.price_ptf, price_smf = EXCLUDED.price_smf',
+    ),
+    "sim_generation": (
+        '"timestamp" timestamp, power_plant_id int4, planned_generation float8, '
+        'actual_generation float8, settlement_generation float8',
+        'INSERT INTO generation_data ("timestamp", power_plant_id, planned_generation, actual_generation, settlement_generation) '
+        'SELECT "timestamp", power_plant_id, planned_generation, actual_generation, settlement_generation FROM sim_generation '
+        'ON CONFLICT ("timestamp", power_plant_id) DO UPDATE SET '
+        'actual_generation = EXCLUDED.actual_generation, '
+        'settlement_generation = EXCLUDED.settlement_generation, '
+        'planned_generation = EXCLUDED.planned_generation',
+    ),
+}
+
+
+def simulate_range(engine, start: datetime, end: datetime, seed: int = None, plant_ids: list = None) -> int:
+    """Simulates every hour between start and end (inclusive), returns the number of hours.
+
+    Existing hours are overwritten (upsert), like the pg_cron job. Days older than the
+    retention window are dropped again by the next partition maintenance.
+    With plant_ids only the generation of those plants is recomputed (no consumption / prices).
+    """
+    start = start.replace(minute=0, second=0, microsecond=0)
+    end = end.replace(minute=0, second=0, microsecond=0)
+    if end < start:
+        return 0
+
+    rng = np.random.default_rng(seed)
+
+    with engine.begin() as conn:
+        # partitions for every simulated day
+        for table in PARTITIONED_TABLES:
+            if is_partitioned(conn, table):
+                create_partitions(conn, table, start.date(), end.date())
+
+        # rollups are refreshed once at the end instead of per chunk
+        conn.execute(text(f"SET LOCAL {SKIP_SETTING} = 'on'"))
+
+        market = plant_ids is None
+        staging = {table: sql for table, sql in STAGING.items() if market or table == "sim_generation"}
+
+        plant_ids, capacity, (event_plant, event_start, event_end, event_capacity) = \
+            load_plants_and_events(conn, start, end, plant_ids)
+
+        cursor = conn.connection.cursor()
+        for table, (columns, _) in staging.items():
+            cursor.execute(f"CREATE TEMP TABLE {table} ({columns}) ON COMMIT DROP")
+
+        chunk_start = np.datetime64(start, "h")
+        last_hour = np.datetime64(end, "h")
+        while chunk_start <= last_hour:
+            chunk_end = min(chunk_start + np.timedelta64(CHUNK_DAYS * 24, "h"), last_hour + HOUR)
+            hours = np.arange(chunk_start, chunk_end, HOUR)
+            hours_of_day = (hours - hours.astype("datetime64[D]")).astype(np.int64)
+
+            # --- 1. consumption / 2. market price
+            actual, forecast = simulate_consumption(hours_of_day, rng)
+            ptf, smf = simulate_prices(hours_of_day, rng)
+
+            # --- 3. generation (plants x hours)
+            affected = affected_capacity(event_plant, event_start, event_end, event_capacity,
+                                         hours[0], len(hours), len(plant_ids))
+            planned, generated, settlement = simulate_generation(capacity, affected, rng)
+
+            for table in staging:
+                cursor.execute(f"TRUNCATE {table}")
+            if market:
+                copy_binary(cursor, "sim_consumption", [
+                    ("timestamp", "timestamp", hours),
+                    ("actual_consumption", "float8", actual),
+                    ("demand_forecast", "float8", forecast),
+                ])
+                copy_binary(cursor, "sim_prices", [
+                    ("timestamp", "timestamp", hours),
+                    ("price_ptf", "float8", ptf),
+                    ("price_smf", "float8", smf),
+                ])
+            if len(plant_ids):
+                copy_binary(cursor, "sim_generation", [
+                    ("timestamp", "timestamp", np.tile(hours, len(plant_ids))),
+                    ("power_plant_id", "int4", np.repeat(plant_ids, len(hours))),
+                    ("planned_generation", "float8", planned.ravel()),
+                    ("actual_generation", "float8", generated.ravel()),
+                    ("settlement_generation", "float8", settlement.ravel()),
+                ])
+
+            for _, upsert in staging.values():
+                cursor.execute(upsert)
+            chunk_start = chunk_end
+
+        if market:
+            refresh_rollups(conn, start.date(), end.date())
+
+    return int((np.datetime64(end, "h") - np.datetime64(start, "h")) / HOUR) + 1
+
+
+def current_hour() -> datetime:
+    # same clock as the pg_cron job: date_trunc('hour', now() at UTC + 3 hours)
+    now = datetime.now(timezone.utc).replace(tzinfo=None) + CLOCK_OFFSET
+    return now.replace(minute=0, second=0, microsecond=0)
+
+
+def simulate_current_hour(engine, seed: int = None) -> int:
+    now = current_hour()
+    return simulate_range(engine, now, now, seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Energy data simulation (current hour or backfill)")
+    parser.add_argument("--start", type=date.fromisoformat, help="first day of the backfill (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="last day of the backfill, default: start")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    from database import engine
+
+    if args.start:
+        end_day = args.end or args.start
+        hours = simulate_range(engine, datetime.combine(args.start, datetime.min.time()),
+                               datetime.combine(end_day, datetime.min.time()) + timedelta(hours=23), args.seed)
+    else:
+        hours = simulate_current_hour(engine, args.seed)
+    print(f"{hours} hours simulated.")
@@ -1,6 +1,95 @@
 --pg_cron in subabase has been activated for data simulation.
 CREATE extension if not exists pg_cron;
 
+
+
+-- ***********************
+-- DAILY PARTITIONS
+-- ***********************
+-- generation_data, market_prices and national_consumption are partitioned by day
+-- (see models.py / partitions.py). One partition per day: <table>_pYYYYMMDD.
+
+CREATE OR REPLACE FUNCTION create_daily_partitions(from_day date, to_day date)
+RETURNS void AS $$
+DECLARE
+  tbl text;
+  d date;
+BEGIN
+  foreach tbl in array array['generation_data', 'market_prices', 'national_consumption'] loop
+    -- a table created before the partitioned layout takes the rows itself until create_db.py converts it
+    if not exists (select 1 from pg_partitioned_table where partrelid = to_regclass(tbl)) then
+      continue;
+    end if;
+    d := from_day;
+    while d <= to_day loop
+      execute format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+        tbl || '_p' || to_char(d, 'YYYYMMDD'), tbl, d, d + 1
+      );
+      d := d + 1;
+    end loop;
+  end loop;
+END;
+$$ language plpgsql;
+
+
+-- detach + drop is a catalog operation, no dead tuples are left behind (unlike DELETE)
+CREATE OR REPLACE FUNCTION drop_expired_partitions(cutoff_day date)
+RETURNS void AS $$
+DECLARE
+  part RECORD;
+  tbl text;
+  archive_active boolean;
+BEGIN
+  -- same advisory lock as partitions.maintain_partitions(): one maintainer at a time
+  if not pg_try_advisory_xact_lock(7301) then
+    return;
+  end if;
+
+  -- tables not converted to partitions yet (python create_db.py) are cleaned up row by row as before
+  foreach tbl in array array['generation_data', 'market_prices', 'national_consumption'] loop
+    if to_regclass(tbl) is not null
+       and not exists (select 1 from pg_partitioned_table where partrelid = to_regclass(tbl)) then
+      execute format('DELETE FROM %I WHERE "timestamp" < %L', tbl, cutoff_day);
+    end if;
+  end loop;
+
+  -- the Parquet archive of the API (archive.py) renews this flag on every run,
+  -- without a recent run (archive off, archiver not scheduled) the days are dropped unarchived
+  archive_active := to_regclass('app_settings') is not null and exists (
+    select 1 from app_settings
+    where name = 'archive_active_until' and value::timestamp > now() at time zone 'utc'
+  );
+  for part in
+    select parent.relname as parent_name, child.relname as child_name
+    from pg_inherits i
+    join pg_class parent on parent.oid = i.inhparent
+    join pg_class child on child.oid = i.inhrelid
+    where parent.relname in ('generation_data', 'market_prices', 'national_consumption')
+      and child.relname ~ '_p[0-9]{8}$'
+  loop
+    -- while the archive is active a day is dropped only after it is archived
+    if archive_active and not exists (
+      select 1 from archived_partitions a
+      where a.table_name = part.parent_name and a.day = to_date(right(part.child_name, 8), 'YYYYMMDD')
+    ) then
+      continue;
+    end if;
+    if to_date(right(part.child_name, 8), 'YYYYMMDD') < cutoff_day then
+      execute format('ALTER TABLE %I DETACH PARTITION %I', part.parent_name, part.child_name);
+      execute format('DROP TABLE %I', part.child_name);
+      -- ETag markers of the API (versions.py), no trigger fires for DETACH / DROP
+      if to_regproc('bump_data_version') is not null then
+        perform bump_data_version(part.parent_name);
+      end if;
+    end if;
+  end loop;
+END;
+$$ language plpgsql;
+
+-- simulation.py runs the same model with NumPy (backfills, local Postgres without pg_cron):
+--   python simulation.py --start 2025-01-01 --end 2025-12-31
+
 """Simulation Function
 
     NOTE: The mathematical models, logic, and deviations used here are based on the AI's explanations of 
@@ -37,6 +126,9 @@ BEGIN
   curr_time := date_trunc('hour', (now() AT TIME ZONE 'UTC' + interval '3 hours'));
   h := extract(hour from curr_time)::int;
 
+  -- the partition of the current day must exist before inserting
+  perform create_daily_partitions(curr_time::date, curr_time::date);
+
 
 
   -------------------------------------------------------
@@ -151,18 +243,11 @@ CREATE OR REPLACE FUNCTION delete_old_data()
 RETURNS void AS $$
 BEGIN
   
-  DELETE FROM generation_data 
-  WHERE timestamp < now() - interval '7 days';
-
-  
-  DELETE FROM market_prices 
-  WHERE timestamp < now() - interval '7 days';
-
-  
-  DELETE FROM national_consumption 
-  WHERE timestamp < now() - interval '7 days';
-  
+  -- whole days older than 7 days are detached and dropped
+  perform drop_expired_partitions((now() - interval '7 days')::date);
 
+  -- partitions for the next days are prepared in advance
+  perform create_daily_partitions(current_date, current_date + 2);
 
 END;
 $$ LANGUAGE plpgsql;
@@ -0,0 +1,126 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import os
+import time
+
+from database import engine, async_engine, replica_async_engine, POOL_SETTINGS
+from notifications import notification_hub
+
+#Start up of the API process.
+#Nothing but imports happen before the first request can be served: the schema belongs to
+#create_db.py (run once per deploy), and the pool warm up runs in the background after start up.
+#/healthz answers as soon as the process runs, /readyz once the pools are warm.
+
+# runs create_db.create_schema in the lifespan, for local development without the explicit step
+SCHEMA_ON_STARTUP = os.getenv("SCHEMA_ON_STARTUP", "false").lower() == "true"
+# connections opened in parallel per engine before the app reports ready
+POOL_WARMUP_CONNECTIONS = min(int(os.getenv("POOL_WARMUP_CONNECTIONS", 2)), POOL_SETTINGS["pool_size"])
+# partition maintenance (archive + drop of the expired days, partitions.py) in the API process,
+# first run one interval after start up (never at boot); 0 leaves it to a cron running "python archive.py"
+MAINTENANCE_INTERVAL_HOURS = float(os.getenv("MAINTENANCE_INTERVAL_HOURS", 0))
+
+logger = logging.getLogger("energysys.startup")
+
+# module import time, close enough to the process start (main imports this first)
+PROCESS_STARTED = time.perf_counter()
+
+
+class StartupState:
+    def __init__(self):
+        self.phases = {}  # phase -> seconds
+        self.ready = False
+        self.error = None
+
+    def record(self, phase: str, started: float):
+        self.phases[phase] = round(time.perf_counter() - started, 4)
+
+    def to_dict(self) -> dict:
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "phases": self.phases,
+            "uptime_seconds": round(time.perf_counter() - PROCESS_STARTED, 1),
+        }
+
+
+startup_state = StartupState()
+
+
+async def warm_async_pool(n: int):
+    results = await asyncio.gather(*(async_engine.connect().start() for _ in range(n)), return_exceptions=True)
+    connections = [c for c in results if not isinstance(c, BaseException)]
+    try:
+        await asyncio.gather(*(c.exec_driver_sql("SELECT 1") for c in connections))
+    finally:
+        # back to the pool, open
+        for connection in connections:
+            await connection.close()
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+def warm_sync_pool(n: int):
+    def open_connection(_):
+        connection = engine.connect()
+        connection.exec_driver_sql("SELECT 1")
+        return connection
+
+    with ThreadPoolExecutor(max_workers=n) as executor:
+        connections = list(executor.map(open_connection, range(n)))
+    for connection in connections:
+        connection.close()
+
+
+async def warm_up():
+    started = time.perf_counter()
+    try:
+        if POOL_WARMUP_CONNECTIONS > 0:
+            await asyncio.gather(warm_async_pool(POOL_WARMUP_CONNECTIONS),
+                                 asyncio.to_thread(warm_sync_pool, POOL_WARMUP_CONNECTIONS))
+        startup_state.record("pool_warmup", started)
+        startup_state.record("ready", PROCESS_STARTED)
+        startup_state.ready = True
+    except Exception as e:
+        # the database may still be waking up, /readyz retries the check
+        startup_state.error = str(e)
+        logger.warning("pool warm up failed: %s", e)
+
+
+async def maintenance_loop():
+    from partitions import maintain_partitions
+    while True:
+        # every worker runs the loop, the advisory lock lets one of them do the work
+        await asyncio.sleep(MAINTENANCE_INTERVAL_HOURS * 3600)
+        try:
+            await asyncio.to_thread(maintain_partitions, engine)
+        except Exception as e:
+            # the expired days stay in the hot table until the next run
+            logger.warning("partition maintenance failed: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    startup_state.record("imports", PROCESS_STARTED)
+
+    if SCHEMA_ON_STARTUP:
+        from create_db import create_schema
+        started = time.perf_counter()
+        startup_state.phases["schema_steps"] = await asyncio.to_thread(create_schema, engine)
+        startup_state.record("schema", started)
+
+    startup_state.record("startup", PROCESS_STARTED)
+    task = asyncio.create_task(warm_up())
+    maintenance = asyncio.create_task(maintenance_loop()) if MAINTENANCE_INTERVAL_HOURS > 0 else None
+    try:
+        yield
+    finally:
+        task.cancel()
+        if maintenance is not None:
+            maintenance.cancel()
+        await notification_hub.stop()
+        await async_engine.dispose()
+        if replica_async_engine is not None:
+            await replica_async_engine.dispose()
@@ -0,0 +1,63 @@
+from sqlalchemy import text
+
+#Per-table change markers for conditional requests (ETag / Last-Modified).
+#Every transaction that writes the tables below (INSERT / UPDATE / DELETE / TRUNCATE) bumps
+#data_versions once: a transaction-local setting marks the table as bumped, so the per-plant
+#statements of the pg_cron job cost one row update, not one per statement.
+#Partition drops do not fire triggers, partitions.py calls bump_version() itself.
+
+VERSIONED_TABLES = (
+    "generation_data",
+    "market_prices",
+    "national_consumption",
+    "market_price_rollups",
+    "consumption_rollups",
+    "power_plants",
+    "plant_events",
+)
+
+BUMP_SQL = (
+    "INSERT INTO data_versions (table_name, version, updated_at) "
+    "VALUES ({table}, 1, now() AT TIME ZONE 'utc') "
+    "ON CONFLICT (table_name) DO UPDATE SET "
+    "version = data_versions.version + 1, updated_at = EXCLUDED.updated_at"
+)
+
+
+def bump_version(conn, table: str):
+    conn.execute(text(BUMP_SQL.format(table=":table")), {"table": table})
+
+
+def install_versions(engine):
+    """Creates the version triggers and the missing version rows. Safe to run on every start."""
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"""
+CREATE OR REPLACE FUNCTION bump_data_version(tbl text) RETURNS void AS $$
+BEGIN
+    {BUMP_SQL.format(table="tbl")};
+END;
+$$ LANGUAGE plpgsql;
+""")
+        conn.exec_driver_sql("""
+CREATE OR REPLACE FUNCTION data_version_trigger() RETURNS trigger AS $$
+BEGIN
+    -- readers see the new version with the commit, one bump covers every later statement
+    IF current_setting('energysys.version_bumped_' || TG_TABLE_NAME, true) IS DISTINCT FROM 'on' THEN
+        PERFORM bump_data_version(TG_TABLE_NAME);
+        PERFORM set_config('energysys.version_bumped_' || TG_TABLE_NAME, 'on', true);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+""")
+        for table in VERSIONED_TABLES:
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {table}_data_version ON {table}")
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER {table}_data_version "
+                f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION data_version_trigger()"
+            )
+            conn.execute(text(
+                "INSERT INTO data_versions (table_name, version, updated_at) "
+                "VALUES (:table, 1, now() AT TIME ZONE 'utc') ON CONFLICT (table_name) DO NOTHING"
+            ), {"table": table})